@@ -1,73 +1,131 @@
 import json
+import os
 from typing import List
-import requests
+import httpx
 from markdownify import markdownify
 import re
-from parsel import Selector
-from typing_extensions import TypedDict
+
+from src import events
+from src.bootstrap import Lazy
+from src.listings.store import PropertyStore
+from src.scraping.async_scraper import AsyncScraper
+from src.scraping.http_cache import ResponseCache
+from src.scraping.next_data import REDUX_PATH, extract_next_data
+from src.scraping.records import PropertyRecord
+from src.scraping.throttle import FetchScheduler
+from src.telemetry import metrics
 
 # TEST 2
 ## PROMPT SCRAPING SINGLE PROPERTY DATA FROM URL (LIVE DATA)
 
-# First, we sneed to establish a persisten HTTPX session 
-# with browser-like headers to avoid instant blocking
-BASE_HEADERS = {
-    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
-    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
-    "accept-language": "en-US;en;q=0.9",
-    "accept-encoding": "gzip, deflate, br",
-}
-
-# Replace async httpx client with regular requests session
-session = requests.Session()
-session.headers.update(BASE_HEADERS)
-
-# type hints fo expected results - property listing has a lot of data!
-class PropertyResult(TypedDict):
-    property_id: str
-    listing_id: str
-    href: str
-    status: str
-    list_price: int
-    list_date: str
-    ...  # and much more!
-
-
-def parse_property(response: requests.Response) -> PropertyResult:
+# First, we need to establish a persistent HTTPX session (HTTP/2, shared connection pool)
+# with browser-like headers to avoid instant blocking. Pages are fetched concurrently,
+# at most SCRAPER_PER_HOST_CONCURRENCY at a time per host; the scheduler backs off
+# (rate and concurrency) when realtor.com starts answering 429/403. A 403 is usually a
+# bot block, so it is tried only SCRAPER_BLOCK_ATTEMPTS times (default 2) in all.
+per_host_concurrency = int(os.environ.get("SCRAPER_PER_HOST_CONCURRENCY", 4))
+scheduler = FetchScheduler(
+    max_concurrency=per_host_concurrency,
+    rate=float(os.environ.get("SCRAPER_RATE_PER_HOST", 4.0)),
+    max_rate=float(os.environ.get("SCRAPER_MAX_RATE_PER_HOST", 8.0)),
+    max_attempts=int(os.environ.get("SCRAPER_MAX_ATTEMPTS", 6)),
+    block_attempts=int(os.environ.get("SCRAPER_BLOCK_ATTEMPTS", 2)),
+)
+
+# Listing pages are cached on disk (SCRAPER_CACHE=0 turns it off). Sold listings stay
+# fresh for SCRAPER_TTL_SOLD seconds, active ones for SCRAPER_TTL_ACTIVE; after that
+# they are revalidated with ETag/Last-Modified. SCRAPER_OFFLINE=1 serves only
+# what is already cached (tests, replays) and never touches the network.
+def open_cache():
+    if os.environ.get("SCRAPER_CACHE", "1") == "0":
+        return None
+    active_ttl = float(os.environ.get("SCRAPER_TTL_ACTIVE", 3600))
+    return ResponseCache(
+        os.environ.get("SCRAPER_CACHE_PATH", "./.scrape_cache/pages.sqlite"),
+        ttls={
+            "sold": float(os.environ.get("SCRAPER_TTL_SOLD", 7 * 24 * 3600)),
+            "for_sale": active_ttl,
+            "for_rent": active_ttl,
+            "pending": active_ttl,
+            "contingent": active_ttl,
+        },
+        default_ttl=active_ttl,
+        offline=os.environ.get("SCRAPER_OFFLINE", "0") == "1",
+    )
+
+
+def build_scraper() -> AsyncScraper:
+    return AsyncScraper(
+        per_host_concurrency=per_host_concurrency,
+        max_connections=int(os.environ.get("SCRAPER_MAX_CONNECTIONS", 20)),
+        scheduler=scheduler,
+        cache=cache.get(),
+    )
+
+
+# Every listing fetched from the site is also kept in a local Parquet store (partitioned
+# by ZIP, newest version per property wins) so comps questions don't start from zero.
+# PROPERTY_STORE=0 turns it off.
+def open_store():
+    if os.environ.get("PROPERTY_STORE", "1") == "0":
+        return None
+    return PropertyStore(os.environ.get("PROPERTY_STORE_PATH", "./.property_store"))
+
+
+# Built on the first scrape (or by the warm-up in demo.py), so importing this module touches no disk
+cache = Lazy("scrape_cache", open_cache)
+scraper = Lazy("scraper", build_scraper)
+store = Lazy("property_store", open_store)
+
+# Listings are projected onto a compact record (price, size, location, HOA, tax and
+# price history); the full Redux state is only kept when asked for (include_raw).
+PropertyResult = PropertyRecord
+
+
+PARSE_SECONDS = metrics.histogram("scrape_parse_seconds", "parse_property per page")
+
+
+def parse_property(response: httpx.Response, include_raw: bool = False) -> PropertyResult:
     """parse Realtor.com property page"""
-    # load response's HTML tree for parsing:
-    # print(response.text)
-        # Convert the HTML content to Markdown
-    # markdown_content = markdownify(response.text).strip()
-
-    # # Remove multiple line breaks
-    # markdown_content = re.sub(r"\n{3,}", "\n\n", markdown_content)
-
-    selector = Selector(text=response.text)
-    # find <script id="__NEXT_DATA__"> node and select it's text:
-    data = selector.css("script#__NEXT_DATA__::text").get()
-    if not data:
-        print(f"page {response.url} is not a property listing page")
-        return
-    # load JSON as python dictionary and select property value:
-    data = json.loads(data)
-    return data["props"]["pageProps"]["initialReduxState"]
-
-
-def scrape_properties(urls: List[str]) -> List[PropertyResult]:
-    """Scrape Realtor.com properties"""
+    with metrics.span("scrape.parse", PARSE_SECONDS):
+        # find <script id="__NEXT_DATA__"> with a byte scan (no DOM) and decode it with orjson;
+        # falls back to parsel if the page layout changes
+        data = extract_next_data(response.content, REDUX_PATH)
+        if data is None:
+            print(f"page {response.url} is not a property listing page")
+            return
+        return PropertyRecord.from_redux(data, keep_raw=include_raw)
+
+
+def scrape_properties(urls: List[str], include_raw: bool = False) -> List[PropertyResult]:
+    """Scrape Realtor.com properties concurrently, keeping the order of `urls`"""
     properties = []
-    for url in urls:
-        response = session.get(url)
-        if response.status_code != 200:
-            print(f"|can't scrape property: {response.url}")
+    fetched = []
+    emit = events.emitter()
+    on_result = None
+    if emit is not None:
+        emit("progress", text=f"Fetching {len(urls)} listing page(s)...")
+
+        def on_result(url, r):
+            emit("progress", text=f"{'failed' if r is None else r.headers.get('x-cache', r.status_code)}: {url}")
+
+    for url, response in zip(urls, scraper.get().fetch_all_sync(urls, on_result)):
+        if response is None or response.status_code != 200:
+            print(f"|can't scrape property: {url}")
             continue
-        properties.append(parse_property(response))
+        record = parse_property(response, include_raw)
+        properties.append(record)
+        if "x-cache" not in response.headers:  # cached pages are already in the store
+            fetched.append(record)
+    if store.get() is not None and fetched:
+        store.get().append(fetched)
     return properties
 
-# some realtor.com property urls
-urls = [
-    "https://www.realtor.com/realestateandhomes-detail/12355-Attlee-Dr_Houston_TX_77077_M70330-35605"
-]
-results = scrape_properties(urls)
-print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    # some realtor.com property urls
+    urls = [
+        "https://www.realtor.com/realestateandhomes-detail/12355-Attlee-Dr_Houston_TX_77077_M70330-35605"
+    ]
+    results = scrape_properties(urls)
+    print(json.dumps([r.to_dict() for r in results if r is not None], indent=2))
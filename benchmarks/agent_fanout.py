@@ -0,0 +1,98 @@
+"""
+Sequential vs. parallel delegation to managed agents.
+
+Three CodeAgents stand in for realtor_agent, comparable_agent and
+document_agent, each backed by litellm's mock model with its own latency,
+so a branch costs `steps x latency` like a real sub-agent. It times
+calling them one after another (what the manager did) against one
+delegate_parallel call, checks the merged answers come back in the fixed
+order, and runs a never-finishing agent under a short timeout to check it
+is reported, refuses other calls until it stops at its next step, and is
+callable again afterwards.
+
+    python -m benchmarks.agent_fanout --latency 0.5
+"""
+import argparse
+import threading
+import time
+
+from smolagents import CodeAgent, LiteLLMModel
+
+from src.tools.delegation import AgentBusy, ParallelDelegationTool
+
+FINISH = "Thought: done.\nCode:\n```py\nfinal_answer('{name} report')\n```<end_code>"
+WORK = "Thought: keep looking.\nCode:\n```py\nprint('searching')\n```<end_code>"
+
+
+def make_agent(name, steps, latency):
+    # The first `steps - 1` calls keep working, the last one answers
+    responses = iter([WORK] * (steps - 1) + [FINISH.format(name=name)] * 1000)
+
+    class Scripted(LiteLLMModel):
+        def __call__(self, messages, **kwargs):
+            return super().__call__(messages, mock_response=next(responses), **kwargs)
+
+    model = Scripted("openai/gpt-4o", mock_delay=latency)
+    return CodeAgent(tools=[], model=model, name=name, description=f"stand-in for {name}", max_steps=50, verbosity_level=0)
+
+
+def run(latency=0.5):
+    plan = {"realtor_agent": 4, "comparable_agent": 6, "document_agent": 2}
+    tasks = {name: f"task for {name}" for name in plan}
+
+    agents = [make_agent(name, steps, latency) for name, steps in plan.items()]
+    start = time.perf_counter()
+    sequential = [str(agent(tasks[agent.name])) for agent in agents]
+    sequential_s = time.perf_counter() - start
+
+    agents = [make_agent(name, steps, latency) for name, steps in plan.items()]
+    tool = ParallelDelegationTool(agents)
+    start = time.perf_counter()
+    tool.forward(dict(reversed(list(tasks.items()))))  # task order must not change the merge order
+    parallel_s = time.perf_counter() - start
+    branches = tool.last_branches
+
+    stuck = make_agent("stuck_agent", 10_000, latency)
+    timeout_tool = ParallelDelegationTool([stuck])
+    start = time.perf_counter()
+    timeout_tool.forward({"stuck_agent": "never finishes"}, timeout=latency * 3)
+    returned_s = time.perf_counter() - start
+    try:
+        stuck("called while the cancelled branch is still running")
+        busy = False
+    except AgentBusy:
+        busy = True
+    while any(t.name.startswith("fan-out") for t in threading.enumerate()):
+        time.sleep(0.01)
+    stopped_s = time.perf_counter() - start
+    cleared = not timeout_tool.cancel["stuck_agent"].event.is_set()
+
+    return {
+        "branch_steps": plan,
+        "sequential_s": round(sequential_s, 2),
+        "parallel_s": round(parallel_s, 2),
+        "speedup": round(sequential_s / parallel_s, 2),
+        "branch_s": {b.agent: round(b.seconds, 2) for b in branches},
+        "fixed_order": [b.agent for b in branches] == list(plan),
+        "same_answers": [b.result for b in branches] == sequential,
+        "timeout_status": timeout_tool.last_branches[0].status,
+        "timeout_returned_s": round(returned_s, 2),
+        "timeout_branch_stopped_s": round(stopped_s, 2),
+        "busy_until_stopped": busy,
+        "cancel_cleared_after_stop": cleared,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated model latency per step, seconds")
+    args = parser.parse_args()
+    result = run(args.latency)
+    print(result)
+    if not (result["fixed_order"] and result["same_answers"] and result["timeout_status"] == "timeout"
+            and result["busy_until_stopped"] and result["cancel_cleared_after_stop"]):
+        raise SystemExit("parallel delegation did not match the sequential run")
+
+
+if __name__ == "__main__":
+    main()
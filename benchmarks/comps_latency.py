@@ -0,0 +1,107 @@
+"""
+Comparable-sales query latency over a synthetic metro-sized listing table.
+
+Generates N listings scattered over a Houston-sized area (clustered around
+neighbourhood centres, with correlated size, beds, baths, age and price),
+builds a ComparablesEngine, and times k-comps queries for random
+subjects. It also checks the BallTree candidates against a brute-force
+haversine scan for a sample of subjects.
+
+    python -m benchmarks.comps_latency --rows 1000000 --queries 1000
+"""
+import argparse
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from src.listings.comps import ComparablesEngine, Subject
+from src.listings.store import haversine_miles
+
+TYPES = ["single_family", "condos", "townhomes", "multi_family"]
+
+
+def synthetic_listings(rows: int, seed: int = 0) -> pa.Table:
+    rng = np.random.default_rng(seed)
+    centres = np.column_stack([rng.uniform(29.5, 30.1, 400), rng.uniform(-95.8, -95.0, 400)])
+    which = rng.integers(0, len(centres), rows)
+    lat = centres[which, 0] + rng.normal(0, 0.02, rows)
+    lon = centres[which, 1] + rng.normal(0, 0.02, rows)
+    sqft = np.clip(rng.lognormal(7.6, 0.35, rows), 500, 9000).astype(np.int32)
+    beds = np.clip(np.round(sqft / 650 + rng.normal(0, 0.6, rows)), 1, 8).astype(np.int16)
+    baths = np.clip(np.round((beds * 0.75 + rng.normal(0, 0.4, rows)) * 2) / 2, 1, 6).astype(np.float32)
+    year = rng.integers(1950, 2024, rows).astype(np.int16)
+    ppsf = rng.normal(170, 35, rows).clip(60)
+    return pa.table(
+        {
+            "property_id": pa.array(np.char.add("P", np.arange(rows).astype(str))),
+            "lat": lat,
+            "lon": lon,
+            "sqft": sqft,
+            "beds": beds,
+            "baths": baths,
+            "year_built": year,
+            "property_type": pa.array(np.array(TYPES)[rng.choice(4, rows, p=[0.7, 0.15, 0.1, 0.05])]),
+            "price": (sqft * ppsf).astype(np.int64),
+            "status": pa.array(np.where(rng.random(rows) < 0.6, "sold", "for_sale")),
+        }
+    )
+
+
+def run(rows=1_000_000, queries=1000, k=5, checks=50):
+    table = synthetic_listings(rows)
+    start = time.perf_counter()
+    engine = ComparablesEngine(table)
+    load_s = time.perf_counter() - start
+    start = time.perf_counter()
+    engine.tree("sold")
+    build_s = time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    subjects = [
+        Subject(float(rng.uniform(29.6, 30.0)), float(rng.uniform(-95.7, -95.1)), float(rng.integers(900, 4000)), float(rng.integers(2, 6)), 2.0, float(rng.integers(1960, 2020)), "single_family")
+        for _ in range(queries)
+    ]
+    engine.query(subjects[0], k=k)  # warm-up
+    times = []
+    for subject in subjects:
+        start = time.perf_counter()
+        engine.query(subject, k=k)
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1000
+
+    # BallTree candidates must be exactly the nearest sold listings
+    sold = np.flatnonzero(table.column("status").to_numpy(zero_copy_only=False) == "sold")
+    lat, lon = engine.lat[sold], engine.lon[sold]
+    mismatches = 0
+    for subject in subjects[:checks]:
+        _, idx = engine.tree("sold").query(np.radians([[subject.lat, subject.lon]]), k=200)
+        brute = np.argsort(haversine_miles(subject.lat, subject.lon, lat, lon))[:200]
+        mismatches += set(idx[0]) != set(brute)
+
+    return {
+        "rows": rows,
+        "sold_rows": len(sold),
+        "engine_load_s": round(load_s, 2),
+        "tree_build_s": round(build_s, 2),
+        "query_p50_ms": round(float(np.percentile(times, 50)), 3),
+        "query_p95_ms": round(float(np.percentile(times, 95)), 3),
+        "query_max_ms": round(float(times.max()), 3),
+        "neighbour_mismatches": f"{mismatches}/{checks}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    result = run(args.rows, args.queries, args.k)
+    print(result)
+    if not result["neighbour_mismatches"].startswith("0/"):
+        raise SystemExit("BallTree neighbours differ from the brute-force scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Form routing from the static catalog against the document_agent path.
+
+"Which forms do I need for ..." used to go manager -> document_agent ->
+retriever -> model, i.e. at least three model calls and a search. The
+catalog answers it from a table. The report shows:
+  - building the catalog from the PDFs (cold) and re-syncing a saved one,
+  - whether each golden question gets the expected agreement and addenda,
+  - the median lookup time,
+  - for scale, one retriever search plus the model calls the agent path
+    makes (litellm's mock model with `--llm-latency`).
+
+    python -m benchmarks.form_catalog --repeat 1000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from src.forms.catalog import FormCatalog
+
+DOCS_DIR = "./reator_agent_docs"
+
+# question -> (agreement, addenda)
+GOLDEN = {
+    "What forms do I need to buy a single family home with a conventional loan?": ("21", {"22A", "35"}),
+    "Condo purchase, FHA financing, multiple offers expected": ("28", {"22A", "35", "35E"}),
+    "Buying vacant land with seller financing": ("25", {"22C"}),
+    "Cash offer on a duplex, no inspection, the seller is a foreign national": ("21", {"22E"}),
+    "I want to buy a lot and develop it": ("25", {"22A"}),
+    "Offer on a 12 unit apartment building with a loan and a title review": ("20", {"22A", "35", "22T"}),
+    "Townhouse with an HOA and a neighborhood review": ("21", {"22A", "35", "22D", "35N"}),
+    "Which forms for a home with a lot of trees, escalation clause, all cash?": ("21", {"35", "35E"}),
+    "Amend the closing date on a condo deal": ("28", {"22A", "35", "34"}),
+    "Single-family home on a half-acre lot with an FHA loan": ("21", {"22A", "35"}),
+    "3 bed house on a corner lot, conventional loan": ("21", {"22A", "35"}),
+    "Vacant lot, we want to build a house on it": ("25", {"22A"}),
+    "Condo where the seller is financing part of it": ("28", {"22C", "35"}),
+    "What forms are there?": (None, set()),
+}
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def agent_path(question, llm_latency, model_calls):
+    import litellm
+
+    from rag import retriever_tool
+
+    retriever_tool.forward(question)  # load the index outside the timing
+    start = time.perf_counter()
+    retriever_tool.forward(question)
+    search_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(model_calls):
+        litellm.completion(
+            model="openai/gpt-4o",
+            messages=[{"role": "user", "content": question}],
+            mock_response="Form 21 with 22A and 35.",
+            mock_delay=llm_latency,
+        )
+    return search_s, time.perf_counter() - start
+
+
+def run(repeat=1000, llm_latency=2.0, model_calls=3, with_agent=True):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "form_catalog.json")
+        start = time.perf_counter()
+        catalog = FormCatalog.open(path)
+        catalog.sync(DOCS_DIR)
+        catalog.save()
+        cold_s = time.perf_counter() - start
+        start = time.perf_counter()
+        catalog = FormCatalog.open(path)
+        changed = catalog.sync(DOCS_DIR)
+        warm_s = time.perf_counter() - start
+
+    rows = []
+    for question, (agreement, addenda) in GOLDEN.items():
+        result = catalog.lookup(question)
+        got_agreement = result["agreement"].entry.form_id if result["agreement"] else None
+        got_addenda = {m.entry.form_id for m in result["addenda"]}
+        rows.append({
+            "question": question,
+            "ok": got_agreement == agreement and got_addenda == addenda,
+            "agreement": got_agreement,
+            "addenda": sorted(got_addenda),
+            "lookup_us": round(timed(lambda: catalog.answer(question), repeat) * 1e6, 1),
+        })
+    summary = {
+        "forms": len(catalog),
+        "cold_sync_ms": round(cold_s * 1e3, 1),
+        "saved_sync_ms": round(warm_s * 1e3, 2),
+        "saved_sync_changed": changed,
+    }
+    if with_agent:
+        search_s, llm_s = agent_path(next(iter(GOLDEN)), llm_latency, model_calls)
+        summary["agent_search_ms"] = round(search_s * 1e3, 1)
+        summary[f"agent_{model_calls}_model_calls_ms"] = round(llm_s * 1e3)
+    return rows, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="seconds one mocked model call takes")
+    parser.add_argument("--model-calls", type=int, default=3, help="model calls on the document_agent path")
+    parser.add_argument("--no-agent", action="store_true", help="skip loading the index for the agent-path timing")
+    args = parser.parse_args()
+    rows, summary = run(args.repeat, args.llm_latency, args.model_calls, not args.no_agent)
+    for row in rows:
+        print(row)
+    print(summary)
+    if not all(row["ok"] for row in rows):
+        raise SystemExit("some questions were routed to the wrong forms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Scenario-grid throughput: vectorized scenario_grid vs. a per-scenario Python loop.
+
+Evaluates cash-on-cash, DSCR and cash flow for P properties over
+R rates x D down payments x F rent levels, once with one broadcast
+scenario_grid call and once the way hand-written agent code does it
+(one property_metrics call per property and scenario), and checks both
+agree. It also checks that InvestmentMetricsTool reads prices written as
+displayed ("$350,000") the same as plain numbers.
+
+    python -m benchmarks.investment_grid --properties 2000 --grid 5
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.analysis.investment import property_metrics, scenario_grid
+from src.tools.investment import InvestmentMetricsTool
+
+
+def run(properties=2000, grid=5, seed=0):
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(150_000, 900_000, properties)
+    rent = price * rng.uniform(0.005, 0.009, properties)
+    hoa = rng.choice([0, 0, 50, 250], properties).astype(float)
+    rates = np.linspace(0.05, 0.08, grid)
+    downs = np.linspace(0.05, 0.30, grid)
+    factors = np.linspace(0.85, 1.15, grid)
+
+    start = time.perf_counter()
+    vectorized = scenario_grid(price, rent, hoa, rates=rates, down_payments=downs, rent_factors=factors)
+    vectorized_s = time.perf_counter() - start
+
+    loop_properties = min(properties, 200)  # the loop is slow; time a slice and scale up
+    start = time.perf_counter()
+    looped = np.empty((loop_properties, grid, grid, grid))
+    for i in range(loop_properties):
+        for r, rate in enumerate(rates):
+            for d, down in enumerate(downs):
+                for f, factor in enumerate(factors):
+                    m = property_metrics(price[i], rent[i] * factor, hoa_fee=hoa[i], rate=rate, down_payment=down)
+                    looped[i, r, d, f] = m["cash_on_cash"]
+    loop_s = (time.perf_counter() - start) * properties / loop_properties
+
+    return {
+        "properties": properties,
+        "scenarios_per_property": grid**3,
+        "evaluations": properties * grid**3,
+        "vectorized_ms": round(vectorized_s * 1000, 2),
+        "loop_ms_estimated": round(loop_s * 1000, 1),
+        "speedup": round(loop_s / vectorized_s),
+        "same_results": bool(np.allclose(vectorized["cash_on_cash"][:loop_properties], looped)),
+        "display_prices_read": display_prices_read(price[:20], rent[:20], hoa[:20]),
+    }
+
+
+def display_prices_read(price, rent, hoa) -> bool:
+    tool = InvestmentMetricsTool()
+    plain = [{"price": round(p), "monthly_rent": round(r), "hoa_fee": round(h)} for p, r, h in zip(price, rent, hoa)]
+    displayed = [{key: f"${value:,}" for key, value in item.items()} for item in plain]
+    return json.loads(tool.forward(plain)) == json.loads(tool.forward(displayed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--properties", type=int, default=2000)
+    parser.add_argument("--grid", type=int, default=5)
+    args = parser.parse_args()
+    result = run(args.properties, args.grid)
+    print(result)
+    if not result["same_results"]:
+        raise SystemExit("vectorized grid disagrees with the scalar loop")
+    if not result["display_prices_read"]:
+        raise SystemExit("the investment tool read '$350,000'-style prices differently from numbers")
+
+
+if __name__ == "__main__":
+    main()
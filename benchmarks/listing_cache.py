@@ -0,0 +1,87 @@
+"""
+Listing page cache: cold, warm, revalidated and offline scrapes.
+
+Serves the saved pages in benchmarks/fixtures/realtor with an artificial
+latency and scrapes the same listings four times through an AsyncScraper
+backed by a fresh ResponseCache:
+
+  cold         empty cache, every page goes over the network
+  warm         every page fresh on disk, no requests at all
+  revalidate   clock moved past the active-listing TTL, so active pages
+               are revalidated (304) and sold pages are still fresh
+  offline      cache-only mode, network never touched
+
+and checks every pass returns the same bodies.
+
+    python -m benchmarks.listing_cache --listings 30 --latency 0.2
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from src.scraping.async_scraper import AsyncScraper
+from src.scraping.fixture_server import FixtureServer
+from src.scraping.http_cache import ResponseCache
+
+FIXTURES = Path(__file__).parent / "fixtures" / "realtor"
+
+
+class Clock:
+    def __init__(self):
+        self.offset = 0.0
+
+    def __call__(self):
+        return time.time() + self.offset
+
+
+def run(listings=30, latency=0.2):
+    clock = Clock()
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(str(FIXTURES), latency=latency) as server:
+        cache = ResponseCache(str(Path(tmp) / "pages.sqlite"), clock=clock)
+        scraper = AsyncScraper(per_host_concurrency=8, cache=cache)
+        scraper.scheduler.rate = scraper.scheduler.max_rate = 1000.0
+        urls = server.listing_urls(repeat=-(-listings // len(server.slugs())))[:listings]
+
+        passes = {}
+        bodies = None
+        for name in ("cold", "warm", "revalidate", "offline"):
+            if name == "revalidate":
+                clock.offset = cache.ttl_for("for_sale") + 1
+            cache.offline = name == "offline"
+            before = len(server.requests)
+            start = time.perf_counter()
+            responses = scraper.fetch_all_sync(urls)
+            elapsed = time.perf_counter() - start
+            sources = [r.headers.get("x-cache", "network") for r in responses]
+            passes[name] = {
+                "seconds": round(elapsed, 3),
+                "requests": len(server.requests) - before,
+                **{source: sources.count(source) for source in sorted(set(sources))},
+            }
+            current = [r.content for r in responses]
+            bodies = bodies or current
+            passes[name]["same_bodies"] = current == bodies
+        scraper.close()
+        raw = sum(len(b) for b in bodies)
+        stored = cache.stored_bytes()
+        cache.close()
+    return {"listings": len(urls), "latency_s": latency, "passes": passes, "raw_bytes": raw, "stored_bytes": stored, "stats": cache.stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    result = run(args.listings, args.latency)
+    for name, row in result["passes"].items():
+        print(f"{name:<11} {row}")
+    print({k: v for k, v in result.items() if k != "passes"})
+    passes = result["passes"]
+    if not all(row["same_bodies"] for row in passes.values()) or passes["warm"]["requests"] or passes["offline"]["requests"]:
+        raise SystemExit("cached scrape did not match the network scrape")
+
+
+if __name__ == "__main__":
+    main()
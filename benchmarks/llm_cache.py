@@ -0,0 +1,75 @@
+"""
+Record/replay of a full agent run through the LLM response cache.
+
+Runs a CodeAgent over N questions against litellm's built-in mock model
+(a fixed answer after `--latency` seconds, no network), first in "auto"
+mode, which records every call, then in "replay" mode, where every call
+must be served from the cache. The answers must match, and the report
+shows the hit rate and the model time saved. A last pass with a tiny
+size limit checks that LRU eviction keeps the file under the limit.
+
+    python -m benchmarks.llm_cache --questions 20 --latency 0.5
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from smolagents import CodeAgent
+
+from src.llm.cache import LLMCache
+from src.llm.models import CachedLiteLLMModel
+
+ANSWER = "Thought: I can answer directly.\nCode:\n```py\nfinal_answer('4 bedrooms, built 1978')\n```<end_code>"
+
+
+def run_agent(model, questions):
+    agent = CodeAgent(tools=[], model=model, max_steps=2, verbosity_level=0)
+    start = time.perf_counter()
+    answers = [agent.run(q) for q in questions]
+    return answers, time.perf_counter() - start
+
+
+def run(questions=20, latency=0.5):
+    questions = [f"How many bedrooms does listing #{i} have, and when was it built?" for i in range(questions)]
+    mock = {"mock_response": ANSWER, "mock_delay": latency}
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(os.path.join(tmp, "responses.sqlite"))
+        recorded, record_s = run_agent(CachedLiteLLMModel("openai/gpt-4o", cache=cache, mode="auto", **mock), questions)
+        recorded_stats = dict(cache.stats)
+
+        cache.stats = dict.fromkeys(cache.stats, 0)
+        replay_model = CachedLiteLLMModel("openai/gpt-4o", cache=cache, mode="replay", **mock)
+        replayed, replay_s = run_agent(replay_model, questions)
+
+        small = LLMCache(os.path.join(tmp, "small.sqlite"), max_bytes=2048)
+        run_agent(CachedLiteLLMModel("openai/gpt-4o", cache=small, mode="auto", mock_response=ANSWER), questions)
+
+        return {
+            "questions": len(questions),
+            "model_calls": recorded_stats["stored"],
+            "record_s": round(record_s, 2),
+            "replay_s": round(replay_s, 3),
+            "replay_hit_rate": round(cache.hit_rate(), 3),
+            "seconds_saved": round(cache.stats["seconds_saved"], 2),
+            "tokens_saved": cache.stats["tokens_saved"],
+            "same_answers": replayed == recorded,
+            "cache_kb": round(cache.stored_bytes() / 1024, 1),
+            "evicted_with_2kb_limit": small.stats["evicted"],
+            "under_limit": small.stored_bytes() <= small.max_bytes,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated model latency per call, seconds")
+    args = parser.parse_args()
+    result = run(args.questions, args.latency)
+    print(result)
+    if not (result["same_answers"] and result["replay_hit_rate"] == 1.0 and result["under_limit"]):
+        raise SystemExit("replay did not reproduce the recorded run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+__NEXT_DATA__ extraction: parsel + json (old parse_property) vs. byte scan + orjson.
+
+Parses every saved page in benchmarks/fixtures/realtor, as-is and padded
+to roughly the size of a live listing page (--pad-kb of markup before the
+script plus the same again of unrelated JSON in pageProps), and reports
+the median time per page for:
+
+  parsel     Selector(...).css("script#__NEXT_DATA__::text") + json.loads
+  orjson     find_next_data byte scan + orjson.loads of the whole blob
+  subtree    byte scan + decode only props.pageProps.initialReduxState
+  auto       extract_next_data's default (subtree above SUBTREE_MIN_BYTES)
+
+All four must return the same initialReduxState.
+
+    python -m benchmarks.next_data_parse --pad-kb 1500 --repeat 20
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from parsel import Selector
+
+from src.scraping.next_data import REDUX_PATH, extract_next_data
+
+FIXTURES = Path(__file__).parent / "fixtures" / "realtor"
+
+
+def parsel_parse(body: bytes):
+    data = Selector(text=body.decode()).css("script#__NEXT_DATA__::text").get()
+    return json.loads(data)["props"]["pageProps"]["initialReduxState"]
+
+
+PARSERS = {
+    "parsel": parsel_parse,
+    "orjson": lambda body: extract_next_data(body, REDUX_PATH, subtree=False),
+    "subtree": lambda body: extract_next_data(body, REDUX_PATH, subtree=True),
+    "auto": lambda body: extract_next_data(body, REDUX_PATH),
+}
+
+
+def pad(body: bytes, kb: int) -> bytes:
+    """Inflate a page with markup and an unrelated pageProps subtree, like a live listing page."""
+    if kb <= 0:
+        return body
+    card = b'<div class="card"><a href="/realestateandhomes-detail/x">Nearby home</a><span>$350,000</span></div>\n'
+    markup = card * (kb * 1024 // len(card))
+    nearby = [{"property_id": str(i), "address": {"line": f"{i} Main St", "city": "Houston"}, "price": 350000 + i, "photos": [{"href": f"https://ap.rdcpix.com/{i}.jpg"}] * 3} for i in range(kb * 4)]
+    blob = json.dumps({"nearbyHomes": nearby}, separators=(",", ":")).encode()[1:-1]
+    body = body.replace(b"<main>", b"<main>" + markup, 1)
+    return body.replace(b'"pageProps":{', b'"pageProps":{' + blob + b",", 1)
+
+
+def run(pad_kb=1500, repeat=20):
+    rows = []
+    for path in sorted(FIXTURES.glob("*.html")):
+        for padded in (0, pad_kb):
+            body = pad(path.read_bytes(), padded)
+            expected = parsel_parse(body)
+            row = {"page": path.stem[:28], "kb": round(len(body) / 1024)}
+            for name, parse in PARSERS.items():
+                assert parse(body) == expected, f"{name} disagrees on {path.name}"
+                times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    parse(body)
+                    times.append(time.perf_counter() - start)
+                row[name] = statistics.median(times) * 1000
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pad-kb", type=int, default=1500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(f"{'page':<30}{'KB':>6}{'parsel ms':>11}{'orjson ms':>11}{'subtree ms':>12}{'auto ms':>9}{'speedup':>9}")
+    for row in run(args.pad_kb, args.repeat):
+        print(
+            f"{row['page']:<30}{row['kb']:>6}{row['parsel']:>11.3f}{row['orjson']:>11.3f}{row['subtree']:>12.3f}"
+            f"{row['auto']:>9.3f}{row['parsel'] / row['auto']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Query latency of the inverted-index BM25 engine vs. langchain's BM25Retriever.
+
+Synthetic corpora are built by replicating the form chunks with a random
+10% of words dropped from every copy, so the vocabulary and posting
+lengths grow with the corpus like they would for more real forms.
+
+    python -m benchmarks.retriever_latency --scales 1 10 100 --queries 200
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+from langchain_community.retrievers import BM25Retriever
+
+from src.retrieval.bm25 import BM25Index
+
+
+def synthetic_corpus(texts, scale, rng):
+    if scale == 1:
+        return list(texts)
+    corpus = []
+    for _ in range(scale):
+        for text in texts:
+            words = text.split()
+            corpus.append(" ".join(w for w in words if rng.random() > 0.1))
+    return corpus
+
+
+def sample_queries(texts, n, rng):
+    queries = []
+    for _ in range(n):
+        words = rng.choice(texts).split()
+        queries.append(" ".join(rng.sample(words, min(len(words), rng.randint(2, 8)))))
+    return queries
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 3), "p99_ms": round(float(np.percentile(ms, 99)), 3)}
+
+
+def time_queries(search, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def run(texts, scales=(1, 10, 100), n_queries=200, k=5, seed=0, baseline=True):
+    rng = random.Random(seed)
+    queries = sample_queries(texts, n_queries, rng)
+    results = []
+    for scale in scales:
+        corpus = synthetic_corpus(texts, scale, rng)
+        row = {"scale": scale, "chunks": len(corpus)}
+
+        start = time.perf_counter()
+        engine = BM25Index.from_texts(corpus)
+        row["engine_build_s"] = round(time.perf_counter() - start, 3)
+        row["engine"] = time_queries(lambda q: engine.search(q, k), queries)
+
+        if baseline:
+            start = time.perf_counter()
+            reference = BM25Retriever.from_texts(corpus, k=k)
+            row["rank_bm25_build_s"] = round(time.perf_counter() - start, 3)
+            row["rank_bm25"] = time_queries(reference.invoke, queries)
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--no-baseline", action="store_true", help="skip rank_bm25 (slow at large scales)")
+    args = parser.parse_args()
+
+    from rag import retriever
+
+    texts = [doc.page_content for doc in retriever.get().docs]
+    for row in run(texts, args.scales, args.queries, baseline=not args.no_baseline):
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Retrieval and scraping benchmark suite, offline, with JSON results to diff.
+
+Four parts, each a key in the results file:
+
+  quality   golden question -> (form, page) pairs in fixtures/golden_queries.json,
+            scored for recall@k and MRR over the 14 library forms, BM25 alone
+            and hybrid (BM25 + LSA); each question and its case and stopword
+            variants must rank the same through the query cache as without it
+  latency   RetrieverTool.forward percentiles (search + formatting, no query
+            cache) on synthetic corpora of 1x, 10x, 100x the form chunks
+  parse     LiveData.parse_property throughput on the saved listing pages in
+            fixtures/realtor, as saved and padded to a live page's size
+  index     full index build from the PDFs into a temporary directory
+            (extraction, BM25 statistics, LSA), reloading it, and memory
+
+Nothing touches the network, the scraper cache or the saved index. Results
+are written as JSON with the commit, Python version and machine alongside;
+--compare prints every metric that moved against an earlier results file.
+
+    python -m benchmarks.run --out bench-new.json
+    python -m benchmarks.run --only quality parse --compare bench-old.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+FIXTURES = Path(__file__).parent / "fixtures"
+GOLDEN_PATH = FIXTURES / "golden_queries.json"
+SECTIONS = ("quality", "latency", "parse", "index")
+
+# Metrics where a larger number is better; sizes of the inputs are neither; everything else is a cost
+HIGHER_IS_BETTER = ("recall", "mrr", "pages_per_s", "mb_per_s")
+INPUT_SIZES = ("chunks", "files", "pages", "queries", "avg_kb")
+
+
+def form_page(doc) -> str:
+    """'21:3' for a chunk of page 3 of 21_ResidentialPSA.pdf."""
+    return f"{Path(doc.metadata['source']).name.split('_')[0]}:{doc.metadata.get('page', 0) + 1}"
+
+
+def percentiles(samples) -> dict:
+    ms = np.array(samples) * 1000
+    row = {f"p{p}_ms": round(float(np.percentile(ms, p)), 3) for p in (50, 90, 99)}
+    row["mean_ms"] = round(float(ms.mean()), 3)
+    return row
+
+
+def load_retriever():
+    """The app's retriever over the saved index, without its query cache."""
+    from rag import retriever
+
+    tool = retriever.get()
+    tool.cache = None
+    return tool
+
+
+def quality(ks=(1, 3, 5, 10)) -> dict:
+    golden = json.loads(GOLDEN_PATH.read_text())
+    tool = load_retriever()
+    dense, k = tool.dense, tool.k
+    tool.k = max(ks)
+    results = {}
+    try:
+        for mode in ("bm25", "hybrid"):
+            if mode == "hybrid" and dense is None:
+                continue
+            tool.dense = dense if mode == "hybrid" else None
+            ranks, misses = [], []
+            for item in golden:
+                keys = [form_page(doc) for doc in tool.search(item["query"])]
+                rank = next((i for i, key in enumerate(keys, 1) if key in item["relevant"]), None)
+                ranks.append(rank)
+                if rank is None:
+                    misses.append(item["query"])
+            row = {f"recall@{k}": round(sum(r is not None and r <= k for r in ranks) / len(ranks), 3) for k in ks}
+            row["mrr"] = round(sum(1 / r for r in ranks if r) / len(ranks), 3)
+            row["queries"] = len(ranks)
+            row["misses"] = misses
+            row["cache_mismatches"] = cache_mismatches(tool, [item["query"] for item in golden])
+            results[mode] = row
+    finally:
+        tool.dense, tool.k = dense, k
+    if any(row["cache_mismatches"] for row in results.values()):
+        raise SystemExit(f"the query cache served rankings the scorer would not give: {[row['cache_mismatches'] for row in results.values()]}")
+    return results
+
+
+def cache_mismatches(tool, queries) -> list:
+    """Queries (and case/stopword variants) whose cached ranking differs from a fresh one."""
+    from src.retrieval.cache import QueryCache
+
+    variants = [v for q in queries for v in (q, q.lower(), f"What is {q}", q)]
+    tool.cache = QueryCache()
+    try:
+        cached = [tool.search(v) for v in variants]
+    finally:
+        tool.cache = None
+    return sorted({v for v, docs in zip(variants, cached) if docs != tool.search(v)})
+
+
+def latency(scales=(1, 10, 100), n_queries=200, seed=0) -> dict:
+    from langchain.docstore.document import Document
+
+    from benchmarks.retriever_latency import sample_queries, synthetic_corpus
+    from src.retrieval.lsa import LSAIndex
+    from src.tools.retriever import RetrieverTool
+
+    docs = load_retriever().docs
+    rng = random.Random(seed)
+    queries = sample_queries([doc.page_content for doc in docs], n_queries, rng)
+    results = {}
+    for scale in scales:
+        texts = synthetic_corpus([doc.page_content for doc in docs], scale, rng)
+        corpus = [Document(page_content=text, metadata=docs[i % len(docs)].metadata) for i, text in enumerate(texts)]
+        row = {"chunks": len(corpus)}
+        for mode in ("bm25", "hybrid"):
+            start = time.perf_counter()
+            dense = LSAIndex(texts) if mode == "hybrid" else None
+            tool = RetrieverTool(corpus, dense=dense)
+            row[f"{mode}_build_s"] = round(time.perf_counter() - start, 3)
+            samples = []
+            for query in queries:
+                start = time.perf_counter()
+                tool.forward(query)
+                samples.append(time.perf_counter() - start)
+            row[mode] = percentiles(samples)
+        results[f"x{scale}"] = row
+    return results
+
+
+def parse(pad_kb=1500, repeat=100) -> dict:
+    import httpx
+
+    # No cache database or listing store for a parse-only run
+    os.environ.setdefault("SCRAPER_CACHE", "0")
+    os.environ.setdefault("PROPERTY_STORE", "0")
+    import LiveData
+
+    from benchmarks.next_data_parse import pad
+
+    pages = sorted((FIXTURES / "realtor").glob("*.html"))
+    results = {}
+    for label, kb in (("saved", 0), ("padded", pad_kb)):
+        responses = [
+            httpx.Response(200, content=pad(p.read_bytes(), kb), request=httpx.Request("GET", f"https://www.realtor.com/{p.stem}"))
+            for p in pages
+        ]
+        parsed = [LiveData.parse_property(r) for r in responses]
+        if any(record is None for record in parsed):
+            raise SystemExit(f"parse_property returned nothing for a fixture page ({label})")
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for response in responses:
+                LiveData.parse_property(response)
+            times.append(time.perf_counter() - start)
+        per_pass = statistics.median(times)
+        size = sum(len(r.content) for r in responses)
+        results[label] = {
+            "pages": len(responses),
+            "avg_kb": round(size / len(responses) / 1024, 1),
+            "ms_per_page": round(per_pass / len(responses) * 1000, 3),
+            "pages_per_s": round(len(responses) / per_pass, 1),
+            "mb_per_s": round(size / per_pass / 1e6, 1),
+        }
+    return results
+
+
+def index() -> dict:
+    from rag import DOCS_DIR, SPLITTER_CONFIG, extract_chunks
+    from src.retrieval.index_store import PersistentIndex
+    from src.retrieval.lsa import LSAIndex
+    from src.tools.retriever import RetrieverTool
+
+    result = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bm25_index.json")
+        start = time.perf_counter()
+        built = PersistentIndex.open(path, SPLITTER_CONFIG)
+        built.sync(DOCS_DIR, extract_chunks, glob="*.pdf")
+        built.save()
+        result["extract_and_index_s"] = round(time.perf_counter() - start, 3)
+        docs = built.documents()
+        start = time.perf_counter()
+        dense = LSAIndex([doc.page_content for doc in docs])
+        result["lsa_fit_s"] = round(time.perf_counter() - start, 3)
+        start = time.perf_counter()
+        RetrieverTool(docs, term_frequencies=built.term_frequencies(), dense=dense)
+        result["retriever_init_s"] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        reopened = PersistentIndex.open(path, SPLITTER_CONFIG)
+        result["reopen_s"] = round(time.perf_counter() - start, 4)
+        start = time.perf_counter()
+        changes = reopened.sync(DOCS_DIR, extract_chunks, glob="*.pdf")
+        result["resync_unchanged_s"] = round(time.perf_counter() - start, 4)
+        if any(changes.values()):
+            raise SystemExit(f"re-sync of an unchanged corpus reported changes: {changes}")
+        result["touched_resync"] = touched_resync(tmp, path)
+        result["files"] = len(built.files)
+        result["chunks"] = len(built)
+        result["index_file_mb"] = round(os.path.getsize(path) / 2**20, 2)
+
+        # What a loaded retriever holds (index, chunks, BM25 and LSA), traced apart from the timings above
+        del built, docs, dense, reopened
+        tracemalloc.start()
+        loaded = PersistentIndex.open(path, SPLITTER_CONFIG)
+        docs = loaded.documents()
+        tool = RetrieverTool(docs, term_frequencies=loaded.term_frequencies(), dense=LSAIndex([doc.page_content for doc in docs]))
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del loaded, docs, tool
+        result["retriever_mb"] = round(current / 2**20, 1)
+        result["retriever_peak_mb"] = round(peak / 2**20, 1)
+    # ru_maxrss is KiB on Linux; the extraction workers are counted separately
+    result["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    result["workers_max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    return result
+
+
+def touched_resync(tmp: str, path: str) -> dict:
+    """
+    Touch one form without changing it, sync and save as rag.py does, then
+    reopen and sync again: the refreshed stat must have been saved, so the
+    second sync neither re-hashes nor reports anything.
+    """
+    from rag import DOCS_DIR, SPLITTER_CONFIG, extract_chunks
+    from src.retrieval.index_store import PersistentIndex
+
+    # Copies keep their mtimes, so the copied index matches the copied forms
+    corpus = Path(tmp) / "docs"
+    shutil.copytree(DOCS_DIR, corpus)
+    saved = shutil.copy(path, Path(tmp) / "touched_index.json")
+    index = PersistentIndex.open(str(saved), SPLITTER_CONFIG)
+    name = next(iter(index.files))
+    os.utime(corpus / name, ns=(time.time_ns(), index.files[name]["mtime_ns"] + 10**9))
+    result = {}
+    start = time.perf_counter()
+    changes = index.sync(str(corpus), extract_chunks, glob="*.pdf")
+    result["touched_s"] = round(time.perf_counter() - start, 4)
+    if changes != {"added": [], "updated": [], "removed": [], "touched": [name]}:
+        raise SystemExit(f"touching {name} without changing it reported: {changes}")
+    index.save()
+    start = time.perf_counter()
+    changes = PersistentIndex.open(str(saved), SPLITTER_CONFIG).sync(str(corpus), extract_chunks, glob="*.pdf")
+    result["after_touch_s"] = round(time.perf_counter() - start, 4)
+    if any(changes.values()):
+        raise SystemExit(f"the refreshed stat of a touched file was not saved; the next sync reported: {changes}")
+    return result
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(old: dict, new: dict, threshold: float = 0.1):
+    """Print the metrics that moved by more than `threshold` (relative)."""
+    before, after = flatten({s: old.get(s, {}) for s in SECTIONS}), flatten({s: new.get(s, {}) for s in SECTIONS})
+    print(f"vs. {old.get('environment', {}).get('commit')} ({old.get('environment', {}).get('date')})")
+    for key in sorted(before.keys() & after.keys()):
+        a, b = before[key], after[key]
+        change = (b - a) / a if a else (0.0 if b == a else float("inf"))
+        if abs(change) <= threshold:
+            continue
+        if key.rsplit(".", 1)[-1] in INPUT_SIZES:
+            verdict = "input changed"
+        else:
+            verdict = "better" if (change > 0) == any(word in key for word in HIGHER_IS_BETTER) else "worse"
+        print(f"  {key:<40}{a:>12g} -> {b:<12g}{change:+.1%} {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--out", default="bench-results.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="an earlier results file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change --compare reports")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="synthetic corpus sizes (x the form chunks)")
+    parser.add_argument("--queries", type=int, default=200, help="queries per corpus size")
+    parser.add_argument("--pad-kb", type=int, default=1500, help="padding for the live-size listing pages")
+    parser.add_argument("--repeat", type=int, default=100, help="passes over the listing pages")
+    args = parser.parse_args()
+
+    # Build the index into a temporary directory first, before the saved one is loaded into this process
+    runners = {
+        "index": index,
+        "quality": quality,
+        "latency": lambda: latency(args.scales, args.queries),
+        "parse": lambda: parse(args.pad_kb, args.repeat),
+    }
+    results = {"environment": environment()}
+    for name in runners:
+        if name in args.only:
+            start = time.perf_counter()
+            results[name] = runners[name]()
+            print(f"{name}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    results = {key: results[key] for key in ("environment", *SECTIONS) if key in results}
+
+    Path(args.out).write_text(json.dumps(results, indent=1) + "\n")
+    print(json.dumps(results, indent=1))
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text()), results, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Serial vs. concurrent listing fetches against a local stand-in server.
+
+Serves the saved pages in benchmarks/fixtures/realtor with an artificial
+per-request latency, scrapes N listings once one-by-one (the old
+requests.Session loop) and once through LiveData.scrape_properties, and
+checks both return the same parsed listings in the same order.
+
+With --throttle-above N the server answers 429 whenever more than N
+requests are in flight; the scheduler has to back off and retry until
+every listing is fetched, and its throttle/retry counters are reported.
+
+    python -m benchmarks.scrape_concurrency --listings 50 --latency 0.2
+    python -m benchmarks.scrape_concurrency --per-host 8 --throttle-above 3
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+import requests
+
+from src.scraping.fixture_server import FixtureServer
+
+FIXTURES = Path(__file__).parent / "fixtures" / "realtor"
+
+
+def serial_scrape(urls, parse):
+    session = requests.Session()
+    results = []
+    for url in urls:
+        response = session.get(url)
+        if response.status_code == 200:
+            results.append(parse(response))
+    return results
+
+
+def run(listings=50, latency=0.2, per_host=8, throttle_above=None, retry_after=None):
+    # Measure the network path: no page cache, no listing store (both are opened on first use)
+    os.environ["SCRAPER_CACHE"] = "0"
+    os.environ["PROPERTY_STORE"] = "0"
+    import LiveData
+
+    LiveData.scheduler.max_concurrency = per_host
+    LiveData.scheduler.rate = LiveData.scheduler.max_rate = 1000.0
+    LiveData.scheduler.hosts = {}
+    with FixtureServer(str(FIXTURES), latency=latency) as server:
+        urls = server.listing_urls(repeat=-(-listings // len(server.slugs())))[:listings]
+
+        start = time.perf_counter()
+        expected = serial_scrape(urls, LiveData.parse_property)
+        serial_s = time.perf_counter() - start
+
+        server.peak_in_flight = 0
+        server.max_in_flight, server.retry_after = throttle_above, retry_after
+        start = time.perf_counter()
+        actual = LiveData.scrape_properties(urls)
+        concurrent_s = time.perf_counter() - start
+
+        return {
+            "listings": len(urls),
+            "latency_s": latency,
+            "per_host_concurrency": per_host,
+            "serial_s": round(serial_s, 3),
+            "concurrent_s": round(concurrent_s, 3),
+            "speedup": round(serial_s / concurrent_s, 1),
+            "peak_in_flight": server.peak_in_flight,
+            "same_results": actual == expected,
+            "server_throttled": server.throttled,
+            "scheduler": LiveData.scheduler.metrics()["total"],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--per-host", type=int, default=8)
+    parser.add_argument("--throttle-above", type=int, default=None, help="server returns 429 above this many in-flight requests")
+    parser.add_argument("--retry-after", default=None, help="Retry-After value sent with those 429s")
+    args = parser.parse_args()
+    result = run(args.listings, args.latency, args.per_host, args.throttle_above, args.retry_after)
+    print(result)
+    if not result["same_results"] or result["peak_in_flight"] > args.per_host:
+        raise SystemExit("concurrent scrape did not match the serial baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Load test: N concurrent chat sessions through the session-isolated agent pool.
+
+Each session asks one question through StreamingGradioUI backed by an
+AgentPool. The run goes as follows:
+  1. The manager delegates to its document_agent.
+  2. It asks the user a clarification through human_intervention, and the
+     run parks.
+  3. The session answers in a second message, and the run resumes.
+  4. It answers with every session tag it has seen in its memory.
+Every model call is served by a local OpenAI-compatible stub with a fixed
+time to first token and token rate, and all sessions share one model
+client.
+
+The run checks four things:
+  - Every session sees only its own tag (no shared memory).
+  - Every session's question reaches the UI while the others are parked.
+  - No server thread blocks on a question.
+  - Two sessions calling one cached model at once, one always hitting the
+    cache and one always missing, each get their own outcome and token
+    counts.
+
+It reports throughput and latency at each concurrency level.
+
+    python -m benchmarks.session_load --sessions 1 4 16 32
+"""
+import argparse
+import json
+import re
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from smolagents import CodeAgent
+
+from src import events
+from src.llm.cache import LLMCache
+from src.llm.models import REQUEST_SECONDS, TOKENS, StreamingLiteLLMModel
+from src.llm.stub_server import TOKEN, StubLLMServer
+from src.sessions import AgentPool
+from src.tools.human_intervention import HumanInterventionTool
+from src.ui.streaming import StreamingGradioUI
+
+TAG = re.compile(r"session-\d+")
+
+
+def script(messages):
+    text = json.dumps(messages)
+    if "named 'document_agent'" in text:
+        return "Thought: The PSA is Form 25.\nCode:\n```py\nfinal_answer('Form 25')\n```<end_code>"
+    if "Form 25" not in text:
+        return "Thought: Ask the document agent.\nCode:\n```py\nprint(document_agent(task='Which purchase form?'))\n```<end_code>"
+    if "ZIP-" not in text:
+        return "Thought: I need the ZIP code.\nCode:\n```py\nprint(human_intervention(scenario='clarification', message_for_human='Which ZIP code?'))\n```<end_code>"
+    tags = ",".join(sorted(set(TAG.findall(text))))
+    return f"Thought: Done.\nCode:\n```py\nfinal_answer('{tags}')\n```<end_code>"
+
+
+def make_pool(base_url):
+    model = StreamingLiteLLMModel("openai/stub", api_base=base_url, api_key="stub")
+
+    def build_manager(channel):
+        document_agent = CodeAgent(tools=[], model=model, name="document_agent", description="Finds forms.", verbosity_level=0)
+        events.attach(document_agent)
+        return CodeAgent(tools=[HumanInterventionTool(channel)], model=model, managed_agents=[document_agent], verbosity_level=0)
+
+    return AgentPool(build_manager, max_sessions=1024)
+
+
+def one_session(ui, i, results, parked, all_parked):
+    session_id = f"s{i}"
+    start = time.perf_counter()
+    messages = list(ui.interact_with_agent(f"Which forms for session-{i}?", [], session_id))[-1]
+    asked = "asks:" in messages[-1].content
+    asked_at = time.perf_counter() - start
+    parked.release()
+    all_parked.wait()  # every session is waiting for its user at the same time
+    resumed = time.perf_counter()
+    messages = list(ui.interact_with_agent(f"ZIP-{i}", messages, session_id))[-1]
+    final = str(messages[-1].content)
+    results[i] = {
+        "asked": asked,
+        "asked_s": asked_at,
+        "answer_s": time.perf_counter() - resumed,
+        "isolated": TAG.findall(final) == [f"session-{i}"],
+    }
+
+
+def run_level(base_url, sessions):
+    ui = StreamingGradioUI(make_pool(base_url))
+    results = {}
+    parked = threading.Semaphore(0)
+    all_parked = threading.Event()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=one_session, args=(ui, i, results, parked, all_parked), daemon=True) for i in range(sessions)]
+    for t in threads:
+        t.start()
+    for _ in range(sessions):
+        parked.acquire(timeout=120)
+    parked_s = time.perf_counter() - start
+    all_parked.set()
+    for t in threads:
+        t.join(300)
+    wall = time.perf_counter() - start
+    work_s = [r["asked_s"] + r["answer_s"] for r in results.values()]
+    return {
+        "sessions": sessions,
+        "completed": len(results),
+        "all_parked_at_once_s": round(parked_s, 2),
+        "wall_s": round(wall, 2),
+        "throughput_sessions_per_s": round(sessions / wall, 2),
+        "latency_p50_s": round(statistics.median(work_s), 2),
+        "latency_max_s": round(max(work_s), 2),
+        "all_asked": all(r["asked"] for r in results.values()),
+        "all_isolated": all(r["isolated"] for r in results.values()),
+    }
+
+
+def shared_model(server, rounds=20):
+    """Race a cache-hitting and a cache-missing session on one model; True if each kept its own outcome and tokens."""
+    with tempfile.TemporaryDirectory() as tmp:
+        model = StreamingLiteLLMModel("openai/stub-shared", api_base=server.base_url, api_key="stub", cache=LLMCache(os.path.join(tmp, "llm.sqlite")))
+        cached = [{"role": "user", "content": "Which forms for session-0?"}]
+        reply = model(cached).content  # recorded outside a request: a plain call
+        sinks = {"hit": events.EventSink(), "miss": events.EventSink()}
+        replies = []
+
+        def session(outcome):
+            with events.subscribe(sinks[outcome]):
+                for i in range(rounds):
+                    message = model(cached if outcome == "hit" else [{"role": "user", "content": f"Fresh question {i}"}])
+                    if outcome == "miss":
+                        replies.append(message.content)
+
+        threads = [threading.Thread(target=session, args=(outcome,)) for outcome in sinks]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(120)
+
+    hit_tokens = [e.data for e in sinks["hit"].queue.queue]
+    miss_tokens = [e.data for e in sinks["miss"].queue.queue]
+    return (
+        REQUEST_SECONDS.count(model="openai/stub-shared", cache="hit", status="ok") == rounds
+        and REQUEST_SECONDS.count(model="openai/stub-shared", cache="miss", status="ok") == rounds + 1
+        and TOKENS.value(model="openai/stub-shared", kind="output", cache="hit") == rounds * len(TOKEN.findall(reply))
+        and TOKENS.value(model="openai/stub-shared", kind="output", cache="miss") == sum(len(TOKEN.findall(r)) for r in [reply, *replies])
+        and all(t.get("cached") for t in hit_tokens) and "".join(t["text"] for t in hit_tokens) == reply * rounds
+        and not any(t.get("cached") for t in miss_tokens) and "".join(t["text"] for t in miss_tokens) == "".join(replies)
+    )
+
+
+def run(levels=(1, 4, 16, 32), first_token=0.3, tokens_per_second=200):
+    with StubLLMServer(script, first_token_latency=first_token, tokens_per_second=tokens_per_second) as server:
+        run_level(server.base_url, 1)  # warm-up: imports, connections
+        return [run_level(server.base_url, n) for n in levels], shared_model(server)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--first-token", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    args = parser.parse_args()
+    rows, shared_model_ok = run(args.sessions, args.first_token, args.tokens_per_second)
+    for row in rows:
+        print(row)
+    print({"shared_model_outcomes_isolated": shared_model_ok})
+    if not all(row["completed"] == row["sessions"] and row["all_asked"] and row["all_isolated"] for row in rows):
+        raise SystemExit("sessions were not isolated or did not all complete")
+    if not shared_model_ok:
+        raise SystemExit("concurrent calls on the shared model mixed up their cache outcomes or token counts")
+
+
+if __name__ == "__main__":
+    main()
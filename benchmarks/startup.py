@@ -0,0 +1,98 @@
+"""
+Startup cost of the demo app, broken down per subsystem.
+
+Every measurement runs in a fresh interpreter so imports are cold (the OS
+file cache is warm after the first repeat, as it is on a restarted
+server). For each subsystem it reports the import time and the time its
+lazy initializer takes on first use; then the time until demo.py has
+built its agents (what the UI waits for now) against the old eager path
+that did every initialization at import. It also checks that importing
+the retriever tool does not pull in langchain or scikit-learn, which are
+only needed once the index is built.
+
+    python -m benchmarks.startup --repeat 3
+
+Tracing is set up against dummy Arize credentials: the exporter is
+configured but nothing is sent unless a span is recorded.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (import statement, initialization run after it)
+SUBSYSTEMS = {
+    "smolagents": ("import smolagents", None),
+    "retriever": ("import rag", "rag.retriever.get()"),
+    "scraper": ("import LiveData", "LiveData.scraper.get().warm()"),
+    "tracing": ("import demo", "demo.tracing.get()"),
+    "gradio": ("import gradio", None),
+    "litellm": ("import litellm", None),
+}
+
+SNIPPET = """
+import json, time
+start = time.perf_counter()
+{import_}
+imported = time.perf_counter()
+{init}
+done = time.perf_counter()
+print(json.dumps({{"import_s": imported - start, "init_s": done - imported}}))
+"""
+
+EAGER_INIT = "demo.tracing.get(); demo.retriever.get(); demo.scraper_session.get()"
+
+# Imports that must stay light, and the heavy packages they must not load
+LIGHT_IMPORTS = {"src.tools.retriever": ("langchain", "sklearn")}
+
+
+def measure(import_: str, init=None) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT, ARIZE_SPACE_ID="benchmark", ARIZE_API_KEY="benchmark", OPEN_API_KEY="benchmark")
+    code = SNIPPET.format(import_=import_, init=init or "pass")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def heavy_imports(module: str, heavy) -> list:
+    """Which of the `heavy` top-level packages importing `module` loads, in a fresh interpreter."""
+    code = f"import sys, {module}; print(sorted({{m.split('.')[0] for m in sys.modules}} & {set(heavy)!r}))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=dict(os.environ, PYTHONPATH=ROOT), capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1].replace("'", '"'))
+
+
+def run(repeat=3) -> dict:
+    def median(import_, init=None):
+        samples = [measure(import_, init) for _ in range(repeat)]
+        return {key: round(statistics.median(s[key] for s in samples), 3) for key in ("import_s", "init_s")}
+
+    measure("import demo")  # builds the document index once so every run below reuses it
+    subsystems = {name: median(import_, init) for name, (import_, init) in SUBSYSTEMS.items()}
+    # The tracing import is measured on top of demo; report only what tracing itself adds
+    subsystems["tracing"]["import_s"] = None
+    lazy = median("import demo")
+    eager = median("import demo", EAGER_INIT)
+    return {
+        "subsystems": subsystems,
+        "demo_ready_lazy_s": lazy["import_s"],
+        "demo_ready_eager_s": round(eager["import_s"] + eager["init_s"], 3),
+        "deferred_to_warm_up_s": eager["init_s"],
+        "heavy_imports": {module: heavy_imports(module, heavy) for module, heavy in LIGHT_IMPORTS.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    result = run(args.repeat)
+    print(json.dumps(result, indent=2))
+    if any(result["heavy_imports"].values()):
+        raise SystemExit(f"light imports loaded heavy packages: {result['heavy_imports']}")
+
+
+if __name__ == "__main__":
+    main()
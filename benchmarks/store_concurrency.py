@@ -0,0 +1,106 @@
+"""
+Listing store under concurrent appends, compactions and queries.
+
+One writer appends batches of synthetic listings to a PropertyStore with a
+low compaction threshold, so every few batches a ZIP's files are rewritten
+and the old ones deleted, while reader threads query the same ZIPs the
+whole time. It checks that no query fails and that every query sees at
+least the listings whose append had finished before it started, and it
+reports query latency with and without the writer running.
+
+    python -m benchmarks.store_concurrency --batches 200 --readers 4
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+
+from src.listings.store import PropertyStore
+from src.scraping.records import PropertyRecord
+
+ZIPS = ["77077", "77079", "77082"]
+
+
+def batch(number: int, size: int):
+    return [
+        PropertyRecord(
+            property_id=f"P{number}-{i}",
+            status="for_sale",
+            list_price=300_000 + 1000 * i,
+            list_date="2024-06-01",
+            property_type="single_family",
+            city="Houston",
+            postal_code=ZIPS[i % len(ZIPS)],
+            lat=29.75,
+            lon=-95.6,
+        )
+        for i in range(size)
+    ]
+
+
+def reader(store, written, stop, latencies, errors):
+    while not stop.is_set():
+        floor = written[0]
+        start = time.perf_counter()
+        try:
+            table = store.query(postal_codes=ZIPS, columns=["property_id", "remarks"])
+        except Exception as e:
+            errors.append(repr(e))
+            continue
+        latencies.append(time.perf_counter() - start)
+        if table.num_rows < floor:
+            errors.append(f"saw {table.num_rows} listings, {floor} were already written")
+
+
+def run(batches=200, size=30, readers=4):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PropertyStore(tmp, compact_after=3)
+        store.append(batch(0, size))
+        written = [size]
+        idle = []
+        for _ in range(50):
+            start = time.perf_counter()
+            store.query(postal_codes=ZIPS, columns=["property_id", "remarks"])
+            idle.append(time.perf_counter() - start)
+
+        stop = threading.Event()
+        latencies, errors = [], []
+        threads = [threading.Thread(target=reader, args=(store, written, stop, latencies, errors), daemon=True) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        start = time.perf_counter()
+        for number in range(1, batches + 1):
+            written[0] += store.append(batch(number, size))
+        wall = time.perf_counter() - start
+        stop.set()
+        for t in threads:
+            t.join(60)
+        final = store.query(postal_codes=ZIPS, columns=["property_id"]).num_rows
+    return {
+        "batches": batches,
+        "listings": written[0],
+        "final_rows": final,
+        "writer_s": round(wall, 2),
+        "queries": len(latencies),
+        "idle_query_p50_ms": round(statistics.median(idle) * 1000, 2),
+        "busy_query_p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=200)
+    parser.add_argument("--size", type=int, default=30)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+    result = run(args.batches, args.size, args.readers)
+    print(result)
+    if result["errors"] or result["final_rows"] != result["listings"]:
+        raise SystemExit("a query failed or missed listings while the store was being written and compacted")
+
+
+if __name__ == "__main__":
+    main()
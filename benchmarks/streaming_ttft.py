@@ -0,0 +1,105 @@
+"""
+Time to first visible output in the chat: step-boundary UI vs. streaming UI.
+
+A manager CodeAgent delegates to a document_agent, both served by a local
+OpenAI-compatible stub (StubLLMServer) that streams each reply word by
+word after `--first-token` seconds. The same question is asked through
+smolagents' GradioUI with a non-streaming model and through
+StreamingGradioUI with StreamingLiteLLMModel. For each, it reports when
+the first assistant message appeared, the total time and the number of
+UI updates. It also reports the streaming request's TTFT as measured by
+its EventSink, and checks that the end of a token burst is shown while
+the model is idle, not held back until the next event.
+
+    python -m benchmarks.streaming_ttft --first-token 0.5 --tokens-per-second 40
+"""
+import argparse
+import json
+import threading
+import time
+
+from smolagents import CodeAgent, GradioUI
+
+from src import events
+from src.llm.models import CachedLiteLLMModel, StreamingLiteLLMModel
+from src.llm.stub_server import StubLLMServer
+from src.ui.streaming import REFRESH_SECONDS, StreamingGradioUI
+
+THOUGHT = (
+    "Thought: The user wants to know which forms a single family home purchase needs. The document agent can search "
+    "the form library, so I will ask it for the purchase agreement and the addenda that usually go with it, then "
+    "summarize its answer with the form numbers and what each one is for."
+)
+
+
+def script(messages):
+    text = json.dumps(messages)
+    if "named 'document_agent'" in text:
+        return THOUGHT + "\nCode:\n```py\nfinal_answer('Form 25 (residential PSA), 22A (financing), 35 (inspection)')\n```<end_code>"
+    if "Form 25" in text:
+        return THOUGHT + "\nCode:\n```py\nfinal_answer('You need Form 25 with addenda 22A and 35.')\n```<end_code>"
+    return THOUGHT + "\nCode:\n```py\nanswer = document_agent(task='Which forms does a single family home purchase need?')\nprint(answer)\n```<end_code>"
+
+
+def build(model_cls, base_url):
+    def model():
+        return model_cls("openai/stub", api_base=base_url, api_key="stub")
+
+    document_agent = CodeAgent(tools=[], model=model(), name="document_agent", description="Finds the forms.", verbosity_level=0)
+    events.attach(document_agent)
+    return CodeAgent(tools=[], model=model(), managed_agents=[document_agent], verbosity_level=0)
+
+
+def measure(ui, question):
+    start = time.perf_counter()
+    first_output, updates = None, 0
+    for messages in ui.interact_with_agent(question, []):
+        updates += 1
+        if first_output is None and any(m.role == "assistant" for m in messages):
+            first_output = time.perf_counter() - start
+    return {"first_output_s": round(first_output, 2), "total_s": round(time.perf_counter() - start, 2), "ui_updates": updates}
+
+
+def idle_tail(ui, words=("Form", " 25", " and", " 22A.")):
+    """True if a burst of tokens, followed only by idle time, is fully shown before the run ends."""
+    sink = events.EventSink()
+    shown = []
+    consumer = threading.Thread(target=lambda: shown.extend(str(m[-1].content) for m in ui._render(sink, []) if m), daemon=True)
+    consumer.start()
+    for word in words:
+        sink.emit("token", agent="manager", text=word)
+    time.sleep(5 * REFRESH_SECONDS)
+    seen_while_idle = list(shown)
+    sink.close()
+    consumer.join(10)
+    return "".join(words) in seen_while_idle
+
+
+def run(first_token=0.5, tokens_per_second=40):
+    question = "Which forms do I need to buy a single family home?"
+    with StubLLMServer(script, first_token_latency=first_token, tokens_per_second=tokens_per_second) as server:
+        measure(GradioUI(build(CachedLiteLLMModel, server.base_url)), question)  # warm-up: imports, connections
+        step_boundary = measure(GradioUI(build(CachedLiteLLMModel, server.base_url)), question)
+        ui = StreamingGradioUI(build(StreamingLiteLLMModel, server.base_url))
+        streaming = measure(ui, question)
+    return {
+        "model_calls_per_question": 3,
+        "step_boundary_ui": step_boundary,
+        "streaming_ui": dict(streaming, ttft_s=ui.request_stats[-1]["ttft_s"], tokens=ui.request_stats[-1]["tokens"]),
+        "idle_tail_shown": idle_tail(ui),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--first-token", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=40)
+    args = parser.parse_args()
+    result = run(args.first_token, args.tokens_per_second)
+    print(json.dumps(result, indent=2))
+    if not result["idle_tail_shown"]:
+        raise SystemExit("the end of a token burst was not shown while the model was idle")
+
+
+if __name__ == "__main__":
+    main()
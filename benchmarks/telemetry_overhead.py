@@ -0,0 +1,138 @@
+"""
+Cost of the in-process telemetry on the hot paths.
+
+Times, per operation:
+  - a counter increment and a histogram observation,
+  - a metrics.span() around an empty block: metrics only, and with an
+    OpenTelemetry tracer sampling 0%, 10% and 100% of traces (spans go to
+    a batch processor with an exporter that drops them, so the export
+    itself is not measured),
+  - a smolagents Tool call (the form catalog lookup) before and after
+    instrument_smolagents(),
+  - RetrieverTool.forward without the query cache, with TELEMETRY off,
+    metrics only, and tracing every search, in interleaved rounds.
+
+    python -m benchmarks.telemetry_overhead --repeat 20000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from src.telemetry import metrics
+
+
+def per_call(fn, repeat):
+    # Median of 5 batches, in microseconds per call
+    batches = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        batches.append((time.perf_counter() - start) / repeat)
+    return round(statistics.median(batches) * 1e6, 3)
+
+
+def tracer(sample_rate):
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    class Drop(SpanExporter):
+        def export(self, spans):
+            return SpanExportResult.SUCCESS
+
+    provider = TracerProvider(sampler=ParentBased(TraceIdRatioBased(sample_rate)))
+    provider.add_span_processor(BatchSpanProcessor(Drop()))
+    return provider
+
+
+def run(repeat=20000, queries=300):
+    counter = metrics.counter("bench_total")
+    histogram = metrics.histogram("bench_seconds")
+    results = {
+        "counter_inc_us": per_call(lambda: counter.inc(result="hit"), repeat),
+        "histogram_observe_us": per_call(lambda: histogram.observe(0.003, mode="bm25"), repeat),
+    }
+
+    def empty_span():
+        with metrics.span("bench", histogram, mode="bm25"):
+            pass
+
+    results["span_metrics_only_us"] = per_call(empty_span, repeat)
+    for rate in (0.0, 0.1, 1.0):
+        provider = tracer(rate)
+        metrics.set_tracer(provider.get_tracer("bench"))
+        results[f"span_traced_{rate:g}_us"] = per_call(empty_span, repeat // 4)
+        metrics.set_tracer(None)
+        provider.shutdown()
+    metrics.ENABLED = False
+    results["span_disabled_us"] = per_call(empty_span, repeat)
+    metrics.ENABLED = True
+
+    from src.forms.catalog import FormCatalog
+    from src.telemetry.instrument import instrument_smolagents
+    from src.tools.form_catalog import FormCatalogTool
+
+    catalog = FormCatalog()
+    catalog.sync("./reator_agent_docs")
+    tool = FormCatalogTool(catalog)
+    results["tool_call_plain_us"] = per_call(lambda: tool(query="condo with a loan"), repeat // 10)
+    instrument_smolagents()
+    results["tool_call_instrumented_us"] = per_call(lambda: tool(query="condo with a loan"), repeat // 10)
+
+    from benchmarks.retriever_latency import sample_queries
+    from rag import retriever
+
+    search = retriever.get()
+    search.cache = None
+    texts = sample_queries([doc.page_content for doc in search.docs], queries, random.Random(0))
+
+    def per_query():
+        start = time.perf_counter()
+        for query in texts:
+            search.forward(query)
+        return (time.perf_counter() - start) / len(texts)
+
+    def off():
+        metrics.ENABLED = False
+        try:
+            return per_query()
+        finally:
+            metrics.ENABLED = True
+
+    def traced():
+        metrics.set_tracer(provider.get_tracer("bench"))
+        try:
+            return per_query()
+        finally:
+            metrics.set_tracer(None)
+
+    provider = tracer(1.0)
+    per_query()  # warm up
+    # Interleaved rounds, so drift on a busy machine hits every mode alike
+    modes = {"forward_telemetry_off_us": off, "forward_metrics_us": per_query, "forward_traced_us": traced}
+    samples = {name: [] for name in modes}
+    for _ in range(7):
+        for name, fn in modes.items():
+            samples[name].append(fn())
+    provider.shutdown()
+    for name, values in samples.items():
+        results[name] = round(statistics.median(values) * 1e6, 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+    results = run(args.repeat, args.queries)
+    for name, value in results.items():
+        print(f"{name:<28}{value:>10}")
+    off, on = results["forward_telemetry_off_us"], results["forward_metrics_us"]
+    print(f"metrics overhead on RetrieverTool.forward: {(on - off) / off:+.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,165 +1,139 @@
+import json
 import os
 from dotenv import load_dotenv
-from smolagents import Tool
-from rag import retriever_tool
+from smolagents import (
+    CodeAgent,
+    VisitWebpageTool,
+    Tool
+)
+from rag import retriever, retriever_tool, batch_retriever_tool, form_fields, form_catalog, form_catalog_tool
+from real_estate_agent import TRECDocumentAnalyzer as FormAnalyzer
 
 # Add import for scrape_properties
-from LiveData import scrape_properties
+from LiveData import scrape_properties, scraper, store as property_store
+from src import events
+from src.bootstrap import Lazy, warm_up
+from src.forms.extraction import merge
+from src.llm.cache import LLMCache
+from src.llm.models import StreamingLiteLLMModel
+from src.tools.comparables import ComparablesTool
+from src.tools.delegation import ParallelDelegationTool
+from src.tools.investment import InvestmentMetricsTool
+from src.sessions import AgentPool
+from src.telemetry.exporters import configure as configure_telemetry
+from src.telemetry.instrument import instrument_smolagents
+from src.tools.human_intervention import HumanChannel, HumanInterventionTool
+from src.tools.property_search import PropertySearchTool
+from src.ui.streaming import StreamingGradioUI
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Get API key with error handling
 api_key = os.environ.get('OPEN_API_KEY')
-if not api_key:
-    raise ValueError("OPEN_API_KEY environment variable is not set. Please create a .env file with your API key.")
+REQUIRED_ENV = {
+    'OPEN_API_KEY': "API key",
+}
 
-arize_space_id = os.environ.get('ARIZE_SPACE_ID')
-if not arize_space_id:
-    raise ValueError("ARIZE_SPACE_ID environment variable is not set. Please create a .env file with your space ID.")
 
-arize_api_key = os.environ.get('ARIZE_API_KEY')
-if not arize_api_key:
-    raise ValueError("ARIZE_API_KEY environment variable is not set. Please create a .env file with your API key.")
+# Identical model requests are answered from disk; LLM_CACHE_MODE=replay runs offline on recorded responses
+LLM_CACHE_MODE = os.environ.get('LLM_CACHE_MODE', 'auto')
 
-from arize.otel import register
 
-tracer_provider = register(
-    space_id = arize_space_id,
-    api_key = arize_api_key,
-    project_name = "Realtor Agent", 
-)
+def open_llm_cache():
+    if os.environ.get('LLM_CACHE', '1') == '0':
+        return None
+    return LLMCache(
+        os.environ.get('LLM_CACHE_PATH', './.llm_cache/responses.sqlite'),
+        max_bytes=int(float(os.environ.get('LLM_CACHE_MAX_MB', 256)) * 2**20),
+    )
 
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
-from openinference.instrumentation.smolagents import SmolagentsInstrumentor
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SimpleSpanProcessor
+def check_env():
+    for name, what in REQUIRED_ENV.items():
+        if name == 'OPEN_API_KEY' and LLM_CACHE_MODE == 'replay':
+            continue  # replay never calls the API
+        if not os.environ.get(name):
+            raise ValueError(f"{name} environment variable is not set. Please create a .env file with your {what}.")
 
-SmolagentsInstrumentor().instrument(tracer_provider=tracer_provider)
 
-import litellm
+# Tool, agent, model, retriever and scraper latencies are recorded in-process from the start;
+# TELEMETRY=0 turns them off
+instrument_smolagents()
 
-from smolagents import (
-    load_tool,
-    CodeAgent,
-    VisitWebpageTool,
-    GradioUI, LiteLLMModel,
-    Tool
-)
-
-class HumanInterventionTool(Tool):
-    """
-    A universal human-in-the-loop tool:
-      - scenario="clarification": ask open-ended question.
-      - scenario="approval": ask yes/no (type 'YES' or 'NO').
-      - scenario="multiple_choice": present list of options.
-    """
-    name = "human_intervention"
-    description = (
-        "Single tool for clarifications, approvals, or multiple-choice from the user. "
-        "Call with scenario='clarification', 'approval', or 'multiple_choice'."
-    )
-    inputs = {
-        "scenario": {
-            "type": "string",
-            "description": "One of: 'clarification', 'approval', 'multiple_choice'."
-        },
-        "message_for_human": {
-            "type": "string",
-            "description": "Text or question to display to the user."
-        },
-        "choices": {
-            "type": "array",
-            "description": "List of options if scenario='multiple_choice'. Otherwise empty or null.",
-            "nullable": True
-        }
-    }
-    output_type = "string"
 
-    def forward(self, scenario: str, message_for_human: str, choices: list = None) -> str:
-        if scenario not in ("clarification", "approval", "multiple_choice"):
-            return "Error: Invalid scenario."
+def telemetry_exporters():
+    """TELEMETRY_EXPORTERS (console, prometheus, otlp, arize); Arize alone if unset and its keys are present."""
+    names = os.environ.get('TELEMETRY_EXPORTERS')
+    if names is None:
+        return ['arize'] if os.environ.get('ARIZE_SPACE_ID') and os.environ.get('ARIZE_API_KEY') else []
+    return [name.strip().lower() for name in names.split(',') if name.strip()]
 
-        print("\n[HUMAN INTERVENTION]")
-        print(f"Scenario: {scenario}")
-        print(f"Agent says: {message_for_human}")
 
-        if scenario == "clarification":
-            user_response = input("(Type your clarification): ")
-            return user_response
+def setup_tracing():
+    """Start the telemetry exporters and, for span exporters, instrument smolagents (~0.6s of imports)."""
+    telemetry = configure_telemetry(
+        telemetry_exporters(),
+        sample_rate=float(os.environ.get('TELEMETRY_SAMPLE_RATE', 1.0)),
+        project_name="Realtor Agent",
+        console_interval=float(os.environ.get('TELEMETRY_CONSOLE_INTERVAL', 60)),
+        prometheus_host=os.environ.get('TELEMETRY_PROMETHEUS_HOST', '127.0.0.1'),
+        prometheus_port=int(os.environ.get('TELEMETRY_PROMETHEUS_PORT', 9464)),
+    )
+    if telemetry.provider is not None:
+        from openinference.instrumentation.smolagents import SmolagentsInstrumentor
 
-        elif scenario == "approval":
-            print("Type 'YES' or 'NO' to proceed:")
-            user_decision = input("Your decision: ").strip().upper()
-            return user_decision
+        SmolagentsInstrumentor().instrument(tracer_provider=telemetry.provider)
+    return telemetry
 
-        elif scenario == "multiple_choice":
-            if not choices:
-                return "No choices provided."
-            print("\nPossible options:")
-            for i, option in enumerate(choices, start=1):
-                print(f"{i}. {option}")
-            user_input = input("\nPick an option number: ")
-            return user_input
 
+# Expensive pieces are built on first use; main() warms them up once the UI is listening
+tracing = Lazy("tracing", setup_tracing)
+scraper_session = Lazy("scraper_session", lambda: scraper.get().warm())
 
 class LoadRealtorDataTool(Tool):
     """
     Loads realtor data from the URL provided.
     """
     name = "load_realtor_data"
-    description = "Loads realtor data from website."
+    description = (
+        "Loads realtor data from website. Returns a JSON list with one compact record per listing: "
+        "price, beds, baths, sqft, lot_sqft, year_built, address, lat/lon, hoa_fee, property_tax_rate, "
+        "tax_history as [year, tax, assessment] and price_history as [date, event, price]."
+    )
     inputs = {
         "url": {
             "type": "string",
             "description": "The URL of the realtor data to load."
-        }
+        },
+        "include_raw": {
+            "type": "boolean",
+            "description": "Also return the full raw page state (very large; only if a field is missing from the record).",
+            "nullable": True,
+        },
     }
     output_type = "string"
 
-    def forward(self, url: str) -> str:
-        return scrape_properties([url])
+    def forward(self, url: str, include_raw: bool = False) -> str:
+        records = scrape_properties([url], include_raw=bool(include_raw))
+        return json.dumps([r.to_dict(include_raw=bool(include_raw)) for r in records if r is not None])
 
-# Instantiate the tools
-human_tool = HumanInterventionTool()
+# Instantiate the tools shared by all sessions
 load_realtor_data_tool = LoadRealtorDataTool()
+investment_tool = InvestmentMetricsTool()
+
+
+def build_property_tools():
+    store = property_store.get()
+    return [PropertySearchTool(store), ComparablesTool(store)] if store is not None else []
+
+
+listing_tools = Lazy("listing_tools", build_property_tools)
 
 model_id = "openai/gpt-4o"
-model = LiteLLMModel(model_id=model_id, api_key=api_key)
-
-realtor_agent = CodeAgent(
-    tools=[load_realtor_data_tool],
-    additional_authorized_imports=["time", "numpy", "bs4", "requests", "asyncio", "parsel", "httpx", "markdownify", "re", "json"],
-    model=model,
-    add_base_tools=False,
-    name="realtor_agent",
-    description="""Analyzes property data in detail following these steps (Only search web for realtor.com links):
-    1. Load the property data or find it on the web from realtor.com
-    2. Analyze basic property features and price
-    3. Calculate key metrics (price per sqft, estimated ROI)
-    4. Compare with similar properties
-    5. Assess investment potential
-    6. Generate detailed property report
-    Always explain calculations and reasoning. Do not make up information or make assumptions. Always search for realtor.com links.""",
-)
+# Streams tokens to the UI while a request is served; the response cache is opened with the first session
+model_client = Lazy("model", lambda: StreamingLiteLLMModel(model_id=model_id, api_key=api_key, cache=open_llm_cache(), mode=LLM_CACHE_MODE))
+
 
-comparable_agent = CodeAgent(
-    tools=[VisitWebpageTool(), human_tool],
-    model=model,
-    add_base_tools=True,
-    name="comparable_agent",
-    description="""Performs detailed web research for real estate information. Follow these steps:
-    1. Find similar properties in the area using the web tool or search the web for similar properties
-    2. Gather information about the neighborhood and amenities
-    3. Look for historical price trends in the area
-    4. Research local schools and transportation
-    5. Check for any recent news about the area
-    6. Use the realtor_agent to analyze the properties
-    Provide detailed summaries after each search with links to the sources. Never make up information or make assumptions. Alwayse search for realtor.com links.""",
-)
 
 class RealEstateAgent:
     def __init__(self):
@@ -188,8 +162,7 @@ class RealEstateAgent:
         - Important dates
         - Terms and conditions
         """
-        # Add contract analysis logic
-        pass
+        return form_fields.extract(document)
     
     def analyze_appraisal(self, document):
         """
@@ -198,8 +171,8 @@ class RealEstateAgent:
         - Comparable properties
         - Market analysis
         """
-        # Add appraisal analysis logic
-        pass
+        # Appraisal terms live in the financing addendum (appraisal less than sales price)
+        return form_fields.extract(document, '22A')
     
     def analyze_inspection(self, document):
         """
@@ -208,8 +181,7 @@ class RealEstateAgent:
         - Required repairs
         - Safety issues
         """
-        # Add inspection analysis logic
-        pass
+        return form_fields.extract(document, '35')
     
     def analyze_title(self, document):
         """
@@ -218,8 +190,7 @@ class RealEstateAgent:
         - Liens
         - Encumbrances
         """
-        # Add title analysis logic
-        pass
+        return form_fields.extract(document, '22T')
     
     def analyze_mortgage(self, document):
         """
@@ -228,29 +199,28 @@ class RealEstateAgent:
         - Payment terms
         - Loan conditions
         """
-        # Add mortgage analysis logic
-        pass
+        return form_fields.extract(document, '22A')
     
     def generate_summary(self, analyses):
         """
         Generates a comprehensive summary of all analyzed documents
         """
+        if isinstance(analyses, dict):
+            analyses = analyses.values()
+        merged = merge(analyses)
         summary = {
-            'key_findings': [],
-            'risks': [],
-            'recommendations': [],
-            'important_dates': [],
-            'financial_summary': {}
+            'key_findings': ([merged['contract_type']] if merged['contract_type'] else []) + merged['contingencies'],
+            'risks': merged['special_provisions'],
+            'recommendations': merged['required_actions'],
+            'important_dates': [f"{name}: {value}" for name, value in merged['key_dates'].items() if value],
+            'financial_summary': {name: value for name, value in merged['financial_terms'].items() if value}
         }
-        # Add summary generation logic
         return summary
 
-class TRECDocumentAnalyzer:
+class TRECDocumentAnalyzer(FormAnalyzer):
     def __init__(self):
-        # self.document_types = {
-        #     '20_MultiFamilyPSA': self.analyze_multifamily_contract,
-        #     # ... other document types ...
-        # }
+        # Library forms were extracted when the index was built; see rag.form_fields
+        super().__init__(extractor=form_fields)
         # Initialize the retriever tool for document search
         self.retriever = retriever_tool
         
@@ -262,11 +232,7 @@ class TRECDocumentAnalyzer:
             # Use the retriever to search through documents
             search_results = self.retriever.forward(query)
             return search_results
-            
-        doc_type = self._get_document_type(document_path)
-        if doc_type in self.document_types:
-            return self.document_types[doc_type](document_path)
-        return "Unsupported TREC document type"
+        return super().analyze_document(document_path)
 
 class RealEstateExpertTool(Tool):
     name = "real_estate_expert"
@@ -297,26 +263,17 @@ class RealEstateExpertTool(Tool):
         self.real_estate_agent = RealEstateAgent()
         
     def forward(self, query: str, document_type: str = None) -> str:
-        # First, search through all documents for relevant information
-        search_results = retriever_tool.forward(query)
+        # Search only the requested form when one is given, otherwise all documents
+        try:
+            search_results = retriever_tool.forward(query, document_type=document_type)
+        except ValueError:
+            search_results = retriever_tool.forward(query)
         
-        # If a specific document type is provided, perform detailed analysis
+        # If a specific document type is provided, add the form's extracted terms (no model call)
         if document_type:
-            if document_type.startswith('20_') or document_type.startswith('21_'):
-                analysis = self.real_estate_agent.analyze_document(
-                    search_results, 
-                    'contract'
-                )
-            elif document_type.startswith('22'):
-                analysis = self.real_estate_agent.analyze_document(
-                    search_results, 
-                    'financing'
-                )
-            elif document_type.startswith('35'):
-                analysis = self.real_estate_agent.analyze_document(
-                    search_results, 
-                    'inspection'
-                )
+            analysis = self.trec_analyzer.analyze_document(document_type)
+            if isinstance(analysis, str):
+                return search_results
             
             # Generate comprehensive response
             response = f"""
@@ -326,10 +283,10 @@ Search Results:
 {search_results}
 
 Detailed Analysis:
-{analysis}
+{json.dumps({k: v for k, v in analysis.items() if k != 'fields'}, indent=2)}
 
 Summary and Recommendations:
-{self.real_estate_agent.generate_summary({'search': search_results, 'analysis': analysis})}
+{self.real_estate_agent.generate_summary([analysis])}
 """
             return response
             
@@ -338,23 +295,99 @@ Summary and Recommendations:
 # Initialize the expert tool
 real_estate_expert = RealEstateExpertTool()
 
-# Initialize the agent with both tools
-document_agent = CodeAgent(
-    tools=[retriever_tool, real_estate_expert], 
-    model=model,
-    add_base_tools=False,
-    name="document_agent",
-    description="""Analyzes property data in detail following these steps (Input to this agent is for example: What are the forms we can use for single family homes?):
-    1. Explan which documents are needed based on the property details and the type of property.
+
+REALTOR_AGENT_DESCRIPTION = """Analyzes property data in detail following these steps (Only search web for realtor.com links):
+    1. Load the property data or find it on the web from realtor.com
+    2. Analyze basic property features and price
+    3. Calculate key metrics (price per sqft, cap rate, cash-on-cash, DSCR) with the investment_metrics tool
+    4. Compare with similar properties
+    5. Assess investment potential
+    6. Generate detailed property report
+    Always explain calculations and reasoning. Do not make up information or make assumptions. Always search for realtor.com links."""
+
+COMPARABLE_AGENT_DESCRIPTION = """Performs detailed web research for real estate information. Follow these steps:
+    1. Find similar properties in the area: first find_comparables / search_saved_properties (listings already scraped), then the web tool or a web search
+    2. Gather information about the neighborhood and amenities
+    3. Look for historical price trends in the area
+    4. Research local schools and transportation
+    5. Check for any recent news about the area
+    6. Use the realtor_agent to analyze the properties
+    Provide detailed summaries after each search with links to the sources. Never make up information or make assumptions. Alwayse search for realtor.com links."""
+
+DOCUMENT_AGENT_DESCRIPTION = """Analyzes property data in detail following these steps (Input to this agent is for example: What are the forms we can use for single family homes?):
+    1. Explan which documents are needed based on the property details and the type of property. Call form_catalog first; it answers from the form catalog without a search.
     2. Respond with the documents needed and the format of the documents.
-    Always use the documents from the memory. for example: If the document is single family home, then use the residential single family family home documents from the memory.""",
-)
+    Always use the documents from the memory. for example: If the document is single family home, then use the residential single family family home documents from the memory."""
+
+
+def build_manager(channel: HumanChannel) -> CodeAgent:
+    """
+    One session's agents. The model client, retriever and listing tools are
+    shared by every session (they are read-only or locked); the agents, and
+    with them their memory, and the human channel are the session's own.
+    """
+    human_tool = HumanInterventionTool(channel)
+    model = model_client.get()
+    property_tools = listing_tools.get()
+    realtor_agent = CodeAgent(
+        tools=[load_realtor_data_tool, investment_tool, *property_tools],
+        additional_authorized_imports=["time", "numpy", "bs4", "requests", "asyncio", "parsel", "httpx", "markdownify", "re", "json"],
+        model=model,
+        add_base_tools=False,
+        name="realtor_agent",
+        description=REALTOR_AGENT_DESCRIPTION,
+    )
+    comparable_agent = CodeAgent(
+        tools=[VisitWebpageTool(), human_tool, *property_tools],
+        model=model,
+        add_base_tools=True,
+        name="comparable_agent",
+        description=COMPARABLE_AGENT_DESCRIPTION,
+    )
+    document_agent = CodeAgent(
+        tools=[form_catalog_tool, retriever_tool, batch_retriever_tool, real_estate_expert],
+        model=model,
+        add_base_tools=False,
+        name="document_agent",
+        description=DOCUMENT_AGENT_DESCRIPTION,
+    )
+    managed_agents = [realtor_agent, comparable_agent, document_agent]
+
+    # Independent sub-tasks (e.g. analyze a listing + list the forms) run concurrently; AGENT_FANOUT_TIMEOUT caps each branch
+    delegate_parallel = ParallelDelegationTool(managed_agents)
+
+    # Sub-agents' steps and tokens are shown in the chat as they happen
+    for agent in managed_agents:
+        events.attach(agent)
+
+    # "Which forms do I need for ..." is answered straight from the catalog, without a document_agent run
+    return CodeAgent(
+        tools=[human_tool, delegate_parallel, form_catalog_tool],
+        model=model,
+        managed_agents=managed_agents,
+    )
+
+
+# Every browser session gets its own agents; idle sessions are dropped after SESSION_IDLE_TTL seconds
+sessions = Lazy("sessions", lambda: AgentPool(
+    build_manager,
+    max_sessions=int(os.environ.get('MAX_SESSIONS', 64)),
+    idle_ttl=float(os.environ.get('SESSION_IDLE_TTL', 3600)),
+))
+
+
+class RealtorGradioUI(StreamingGradioUI):
+    def interact_with_agent(self, prompt, messages, session_id="default"):
+        tracing.get()  # the first question must not run before the instrumentor is in place
+        yield from super().interact_with_agent(prompt, messages, session_id)
+
+
+def main():
+    check_env()
+    warm_up([tracing, form_catalog, retriever, scraper_session, model_client, listing_tools])
+    # Launch the Gradio interface
+    RealtorGradioUI(sessions.get()).launch()
 
-manager_agent = CodeAgent(
-    tools=[human_tool],
-    model=model,
-    managed_agents=[realtor_agent, comparable_agent, document_agent],
-)
 
-# Launch the Gradio interface
-GradioUI(manager_agent).launch()
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,30 @@
-import os
-from langchain.docstore.document import Document
+from pathlib import Path
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.retrievers import BM25Retriever
-from langchain_community.document_loaders import DirectoryLoader
+from langchain_community.document_loaders import UnstructuredFileLoader
 
-# Load documents from your local directory
-loader = DirectoryLoader(
-    path="./reator_agent_docs",
-    glob="**/*",  # This will match all files recursively
-    show_progress=True
-)
+from src.retrieval.ingest import IngestionPipeline
 
-# Load the documents
-source_docs = loader.load()
 
-# Split the documents into chunks
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=500,
-    chunk_overlap=50,
-    add_start_index=True,
-    strip_whitespace=True,
-    separators=["\n\n", "\n", ".", " ", ""],
-)
-docs_processed = text_splitter.split_documents(source_docs)
\ No newline at end of file
+def main():
+    # Collect the files from your local directory, in a stable order
+    paths = sorted(str(p) for p in Path("./reator_agent_docs").rglob("**/*") if p.is_file())
+
+    # Split the documents into chunks
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=500,
+        chunk_overlap=50,
+        add_start_index=True,
+        strip_whitespace=True,
+        separators=["\n\n", "\n", ".", " ", ""],
+    )
+
+    # Load the documents on a process pool (RAG_INGEST_WORKERS controls the pool size)
+    pipeline = IngestionPipeline(text_splitter, loader_cls=UnstructuredFileLoader)
+    docs_processed = pipeline.run(paths)
+    print(pipeline.report())
+    return docs_processed
+
+
+# The workers are spawned and re-import this module, so the pool may only start from here
+if __name__ == "__main__":
+    main()
@@ -1,65 +1,110 @@
-from smolagents import Tool
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
-from langchain_community.retrievers import BM25Retriever
-
-class RetrieverTool(Tool):
-    name = "retriever"
-    description = "Retrieves and searches through real estate forms and documents to find relevant information, Go through the documents and find the most relevant information for the user's query. Provide the document header information and the document file name. Provide the page number of the document where the information is found. "
-    inputs = {
-        "query": {
-            "type": "string",
-            "description": "The query to search for in the documents. Be specific about the form or information you need.",
-        }
-    }
-    output_type = "string"
-
-    def __init__(self, docs, **kwargs):
-        super().__init__(**kwargs)
-        self.docs = docs  # Store original documents for metadata access
-        self.retriever = BM25Retriever.from_documents(
-            docs, k=5  # Reduced number of results for clearer output
-        )
-
-    def forward(self, query: str) -> str:
-        assert isinstance(query, str), "Your search query must be a string"
-
-        docs = self.retriever.invoke(query)
-        
-        # Enhanced output formatting
-        output = "\nRelevant Documents Found:\n"
-        for i, doc in enumerate(docs, 1):
-            # Extract filename from source
-            filename = doc.metadata.get('source', '').split('/')[-1]
-            output += f"\n=== Document {i}: {filename} ===\n"
-            output += f"Page {doc.metadata.get('page', 'N/A')}\n"
-            output += f"Content: {doc.page_content.strip()}\n"
-        
-        return output
+import os
+from typing import Dict, List
 
-# Document loading and processing
-loader = DirectoryLoader(
-    './reator_agent_docs',
-    glob="*.pdf",  # Focus on PDF files
-    loader_cls=PyPDFLoader,
-    recursive=True
-)
-documents = loader.load()
+from src import events
+from src.bootstrap import Lazy, LazyTool
+from src.forms.catalog import FormCatalog
+from src.forms.extraction import FormExtractor
+from src.retrieval.cache import QueryCache
+from src.tools.form_catalog import FormCatalogTool
+from src.tools.retriever import BatchRetrieverTool, RetrieverTool
 
-print(f"Found {len(documents)} PDF documents")
+
+# Document loading and processing
+DOCS_DIR = './reator_agent_docs'
+INDEX_PATH = os.environ.get('RAG_INDEX_PATH', './.rag_index/bm25_index.json')
+LSA_PATH = os.path.join(os.path.dirname(INDEX_PATH), 'lsa.joblib')
+FORM_FIELDS_PATH = os.path.join(os.path.dirname(INDEX_PATH), 'form_fields.json')
+FORM_CATALOG_PATH = os.path.join(os.path.dirname(INDEX_PATH), 'form_catalog.json')
 
 # Enhanced text splitting for better context
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000,
-    chunk_overlap=200,
-    separators=["\n\n", "\n", ". ", " ", ""],
-    keep_separator=True
+SPLITTER_CONFIG = {
+    "chunk_size": 1000,
+    "chunk_overlap": 200,
+    "separators": ["\n\n", "\n", ". ", " ", ""],
+    "keep_separator": True,
+    "add_start_index": True,  # lets the result formatter merge overlapping chunks
+}
+
+# Agents repeat near-identical searches; results are cached per index version
+query_cache = QueryCache(
+    maxsize=int(os.environ.get('RAG_CACHE_SIZE', 512)),
+    ttl=float(os.environ.get('RAG_CACHE_TTL', 3600)),
 )
-docs_processed = text_splitter.split_documents(documents)
 
-print(f"Created {len(docs_processed)} searchable chunks")
+# Field extraction results per document hash; the library's forms are extracted while indexing
+form_fields = FormExtractor(FORM_FIELDS_PATH)
+
+
+def extract_chunks(paths: List[str]) -> Dict[str, list]:
+    """Load and split the given PDFs, keyed by path."""
+    # PDF extraction runs on a process pool; set RAG_INGEST_WORKERS=1 to stay single-process
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_community.document_loaders import PyPDFLoader
+
+    from src.retrieval.ingest import IngestionPipeline
+
+    pipeline = IngestionPipeline(RecursiveCharacterTextSplitter(**SPLITTER_CONFIG), loader_cls=PyPDFLoader)
+    chunks = pipeline.extract(paths)
+    print(pipeline.report())
+    return chunks
+
+
+def build_retriever() -> RetrieverTool:
+    """Open (or sync) the saved index and build the retriever over it."""
+    from src.retrieval.index_store import PersistentIndex
+    from src.retrieval.lsa import LSAIndex
+
+    # Reuse the saved index and only re-extract forms that were added or changed
+    index = PersistentIndex.open(INDEX_PATH, SPLITTER_CONFIG)
+    changes = index.sync(DOCS_DIR, extract_chunks, glob="*.pdf")
+    reindexed = {k: v for k, v in changes.items() if k != "touched"}
+    if any(reindexed.values()):
+        events.emit("progress", text=f"Re-indexed {sum(map(len, reindexed.values()))} changed form(s)")
+        print(f"Index changes: {sum(map(len, reindexed.values()))} files " + ", ".join(f"{k}={len(v)}" for k, v in reindexed.items() if v))
+    if any(changes.values()):
+        # Touched-only files are saved too, so their new stat spares a re-hash on the next start
+        index.save()
+
+    print(f"Found {len(index.files)} PDF documents")
+    form_fields.precompute(index)
+    form_catalog.get()
+
+    docs_processed = index.documents()
+
+    print(f"Created {len(docs_processed)} searchable chunks (index {index.version})")
+
+    if not docs_processed:
+        raise ValueError("No documents were processed. Please check the path and file pattern.")
+
+    # Local TF-IDF + SVD vectors catch paraphrased questions BM25 misses; saved per index version
+    dense = None
+    if os.environ.get('RAG_HYBRID', '1') != '0':
+        dense = LSAIndex.load_or_build(LSA_PATH, index.version, [doc.page_content for doc in docs_processed])
+
+    return RetrieverTool(
+        docs_processed,
+        term_frequencies=index.term_frequencies(),
+        dense=dense,
+        cache=query_cache,
+        index_version=index.version,
+        token_budget=int(os.environ.get('RAG_TOKEN_BUDGET', 1500)),
+    )
+
+
+def build_form_catalog() -> FormCatalogTool:
+    """Open the saved form catalog and refresh the entries of forms that changed."""
+    catalog = FormCatalog.open(FORM_CATALOG_PATH)
+    if catalog.sync(DOCS_DIR):
+        catalog.save()
+    print(f"Form catalog: {len(catalog)} forms")
+    return FormCatalogTool(catalog)
 
-if not docs_processed:
-    raise ValueError("No documents were processed. Please check the path and file pattern.")
 
-retriever_tool = RetrieverTool(docs_processed)
\ No newline at end of file
+# Built on the first search (or by the background warm-up in demo.py), not at import
+retriever = Lazy("retriever", build_retriever)
+retriever_tool = LazyTool(RetrieverTool, retriever)
+batch_retriever_tool = LazyTool(BatchRetrieverTool, Lazy("retriever_batch", lambda: BatchRetrieverTool(retriever.get())))
+# Form metadata only (no text extraction), so it is ready long before the retriever
+form_catalog = Lazy("form_catalog", build_form_catalog)
+form_catalog_tool = LazyTool(FormCatalogTool, form_catalog)
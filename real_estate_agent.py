@@ -1,5 +1,15 @@
+import os
+
+from src.forms.extraction import FORM_FILENAME, FormExtractor, detect_form, merge
+
+DOCS_DIR = './reator_agent_docs'
+
+
 class TRECDocumentAnalyzer:
-    def __init__(self):
+    def __init__(self, extractor=None, docs_dir=DOCS_DIR):
+        # Rule-based field extraction, cached per document hash
+        self.extractor = extractor or FormExtractor()
+        self.docs_dir = docs_dir
         self.document_types = {
             '20_MultiFamilyPSA': self.analyze_multifamily_contract,
             '21_ResidentialPSA': self.analyze_residential_contract,
@@ -16,16 +26,22 @@ class TRECDocumentAnalyzer:
             '35F_FeasibilityContingency': self.analyze_feasibility,
             '35N_NeighborhoodReview': self.analyze_neighborhood
         }
-        
+
     def analyze_document(self, document_path):
         """
         Main method to analyze TREC documents
         """
         doc_type = self._get_document_type(document_path)
         if doc_type in self.document_types:
-            return self.document_types[doc_type](document_path)
+            return self.document_types[doc_type](self._resolve(document_path, doc_type))
         return "Unsupported TREC document type"
 
+    def _extract(self, document, form_id):
+        """Fields of `document` (a file path or the form's text) under the rules of `form_id`."""
+        if os.path.isfile(document):
+            return self.extractor.extract_file(document, form_id)
+        return self.extractor.extract(document, form_id)
+
     def analyze_multifamily_contract(self, document):
         """
         Analyzes Multi-Family Contract (TREC 20)
@@ -35,7 +51,7 @@ class TRECDocumentAnalyzer:
         - Due diligence period
         - Income/expense verification
         """
-        pass
+        return self._extract(document, '20')
 
     def analyze_residential_contract(self, document):
         """
@@ -46,7 +62,7 @@ class TRECDocumentAnalyzer:
         - Option period
         - Seller's disclosures
         """
-        pass
+        return self._extract(document, '21')
 
     def analyze_financing_contingency(self, document):
         """
@@ -55,7 +71,68 @@ class TRECDocumentAnalyzer:
         - Approval deadlines
         - Financing conditions
         """
-        pass
+        return self._extract(document, '22A')
+
+    def analyze_seller_financing(self, document):
+        """
+        Analyzes Seller Financing Addendum (TREC 22C)
+        - Down payment
+        - Interest rate and installments
+        - Balloon date
+        """
+        return self._extract(document, '22C')
+
+    def analyze_optional_clauses(self, document):
+        """
+        Analyzes Optional Clauses Addendum (TREC 22D)
+        """
+        return self._extract(document, '22D')
+
+    def analyze_firpta(self, document):
+        """
+        Analyzes FIRPTA Certification (TREC 22E)
+        """
+        return self._extract(document, '22E')
+
+    def analyze_title_contingency(self, document):
+        """
+        Analyzes Title Contingency Addendum (TREC 22T)
+        - Title review period
+        """
+        return self._extract(document, '22T')
+
+    def analyze_vacant_land(self, document):
+        """
+        Analyzes Vacant Land Contract (TREC 25)
+        - Purchase price
+        - Closing date
+        - Feasibility period
+        """
+        return self._extract(document, '25')
+
+    def analyze_condo_contract(self, document):
+        """
+        Analyzes Condominium Contract (TREC 28)
+        - Purchase price
+        - Closing date
+        - Monthly assessment
+        - Resale certificate delivery
+        """
+        return self._extract(document, '28')
+
+    def analyze_blank_addendum(self, document):
+        """
+        Analyzes Addendum/Amendment (TREC 34)
+        """
+        return self._extract(document, '34')
+
+    def analyze_inspection(self, document):
+        """
+        Analyzes Inspection Addendum (TREC 35)
+        - Inspection period
+        - Repair response deadlines
+        """
+        return self._extract(document, '35')
 
     def analyze_escalation(self, document):
         """
@@ -65,34 +142,54 @@ class TRECDocumentAnalyzer:
         - Competing offer requirements
         - Proof of competing offer
         """
-        pass
+        return self._extract(document, '35E')
+
+    def analyze_feasibility(self, document):
+        """
+        Analyzes Feasibility Contingency Addendum (TREC 35F)
+        - Feasibility period
+        """
+        return self._extract(document, '35F')
+
+    def analyze_neighborhood(self, document):
+        """
+        Analyzes Neighborhood Review Contingency (TREC 35N)
+        - Review period
+        """
+        return self._extract(document, '35N')
 
     def generate_summary(self, analyses):
         """
         Generates a comprehensive summary of all TREC documents
         """
-        summary = {
-            'contract_type': '',
-            'key_dates': {
-                'effective_date': None,
-                'closing_date': None,
-                'option_period_end': None,
-                'financing_deadline': None
-            },
-            'financial_terms': {
-                'purchase_price': 0,
-                'earnest_money': 0,
-                'option_fee': 0
-            },
-            'contingencies': [],
-            'special_provisions': [],
-            'required_actions': []
-        }
-        return summary
+        if isinstance(analyses, dict):
+            analyses = analyses.values()
+        return merge(analyses)
 
     def _get_document_type(self, document_path):
         """
         Extracts TREC form type from filename
         """
-        # Implementation to extract document type from path
-        pass 
\ No newline at end of file
+        if not self._is_name(document_path):
+            return self._form_key(detect_form(document_path))
+        name = os.path.splitext(os.path.basename(document_path))[0]
+        if name in self.document_types:
+            return name
+        # "21", "21_offer.pdf", or "Form 21"
+        match = FORM_FILENAME.match(name + '_')
+        return self._form_key(match.group(1) if match else detect_form(name))
+
+    def _form_key(self, form_id):
+        return next((key for key in self.document_types if key.split('_')[0] == form_id), None)
+
+    @staticmethod
+    def _is_name(document):
+        """A path or form name rather than a document's text."""
+        return os.path.isfile(document) or ('\n' not in document and len(document) <= 128)
+
+    def _resolve(self, document, doc_type):
+        """A form name that is not a file ("21_ResidentialPSA", "21") stands for the library's copy."""
+        if os.path.isfile(document) or not self._is_name(document):
+            return document
+        library = os.path.join(self.docs_dir, doc_type + '.pdf')
+        return library if os.path.isfile(library) else document
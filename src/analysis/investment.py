@@ -0,0 +1,181 @@
+from dataclasses import dataclass, fields
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class Assumptions:
+    """Financing and operating assumptions; every rate is a fraction (0.07 = 7%)."""
+
+    rate: float = 0.07  # mortgage rate, annual
+    down_payment: float = 0.20
+    years: int = 30
+    closing_costs: float = 0.03  # of price, paid in cash
+    vacancy: float = 0.05  # of gross rent
+    management: float = 0.08  # of collected rent
+    maintenance: float = 0.01  # of price per year
+    property_tax_rate: float = 0.0212  # used when the listing has none
+    insurance_rate: float = 0.0035  # of price per year, when the listing has none
+    rent_to_price: float = 0.007  # monthly rent estimate when none is given (the "0.7% rule")
+
+    @classmethod
+    def from_dict(cls, values: Optional[dict]) -> "Assumptions":
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in (values or {}).items() if k in names and v is not None})
+
+
+def _array(values, default=np.nan) -> np.ndarray:
+    """Float array from numbers/None; missing values become `default`."""
+    if isinstance(values, (list, tuple)):
+        values = [np.nan if v is None else v for v in values]
+    array = np.asarray(values, dtype=np.float64)
+    return array if np.isnan(default) else np.where(np.isnan(array), default, array)
+
+
+def monthly_payment(principal, annual_rate, years) -> np.ndarray:
+    """Level monthly payment; broadcasts over all arguments and handles 0% loans."""
+    principal, annual_rate, years = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (principal, annual_rate, years)))
+    r = annual_rate / 12
+    n = years * 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = principal * r / (1 - (1 + r) ** -n)
+    return np.where(r == 0, principal / np.where(n == 0, 1, n), payment)
+
+
+def amortization_schedule(principal, annual_rate, years: int) -> Dict[str, np.ndarray]:
+    """
+    Month-by-month schedule for one or many loans at once.
+
+    Returns arrays of shape (loans, months): payment, interest, principal
+    and remaining balance. Uses the closed form for the balance, so there
+    is no Python loop over months.
+    """
+    principal = np.atleast_1d(np.asarray(principal, dtype=np.float64))[:, None]
+    r = np.atleast_1d(np.asarray(annual_rate, dtype=np.float64))[:, None] / 12
+    months = np.arange(1, int(years) * 12 + 1, dtype=np.float64)[None, :]
+    payment = monthly_payment(principal, r * 12, years)
+    growth = (1 + r) ** months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        balance = np.where(r == 0, principal - payment * months, principal * growth - payment * (growth - 1) / r)
+    balance = np.maximum(balance, 0.0)
+    previous = np.concatenate([np.broadcast_to(principal, (balance.shape[0], 1)), balance[:, :-1]], axis=1)
+    interest = previous * r
+    return {
+        "payment": np.broadcast_to(payment, balance.shape),
+        "interest": interest,
+        "principal": previous - balance,
+        "balance": balance,
+    }
+
+
+def yearly_schedule(schedule: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Collapse a monthly schedule to years: interest/principal paid and balance at year end."""
+    loans, months = schedule["balance"].shape
+
+    def by_year(a):
+        return a.reshape(loans, months // 12, 12)
+
+    return {
+        "interest": by_year(schedule["interest"]).sum(axis=2),
+        "principal": by_year(schedule["principal"]).sum(axis=2),
+        "balance": by_year(schedule["balance"])[:, :, -1],
+    }
+
+
+def property_metrics(
+    price,
+    monthly_rent=None,
+    sqft=None,
+    hoa_fee=None,
+    property_tax_rate=None,
+    insurance_rate=None,
+    assumptions: Optional[Assumptions] = None,
+    rate=None,
+    down_payment=None,
+) -> Dict[str, np.ndarray]:
+    """
+    Core investment metrics for many properties (and scenarios) at once.
+
+    Every argument broadcasts: pass (P,) arrays for P properties, and e.g.
+    rate with shape (P, R, 1) for a grid. Missing rents, tax and insurance
+    rates fall back to the assumptions. Returns annual figures except where
+    the name says monthly.
+    """
+    a = assumptions or Assumptions()
+    price = np.asarray(price, dtype=np.float64)
+    rent = _array(monthly_rent) if monthly_rent is not None else np.full(price.shape, np.nan)
+    rent_estimated = np.isnan(rent)
+    rent = np.where(rent_estimated, price * a.rent_to_price, rent)
+    tax_rate = _array(property_tax_rate, a.property_tax_rate) if property_tax_rate is not None else a.property_tax_rate
+    insurance = _array(insurance_rate, a.insurance_rate) if insurance_rate is not None else a.insurance_rate
+    hoa = _array(hoa_fee, 0.0) if hoa_fee is not None else 0.0
+    rate = a.rate if rate is None else np.asarray(rate, dtype=np.float64)
+    down = a.down_payment if down_payment is None else np.asarray(down_payment, dtype=np.float64)
+
+    gross_rent = rent * 12
+    effective_rent = gross_rent * (1 - a.vacancy)
+    operating_expenses = price * (tax_rate + insurance + a.maintenance) + hoa * 12 + effective_rent * a.management
+    noi = effective_rent - operating_expenses
+    loan = price * (1 - down)
+    debt_service = monthly_payment(loan, rate, a.years) * 12
+    cash_flow = noi - debt_service
+    cash_invested = price * (down + a.closing_costs)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "price_per_sqft": price / _array(sqft) if sqft is not None else np.full(price.shape, np.nan),
+            "monthly_rent": rent,
+            "rent_estimated": rent_estimated,
+            "gross_yield": gross_rent / price,
+            "grm": price / gross_rent,
+            "noi": noi,
+            "cap_rate": noi / price,
+            "monthly_payment": debt_service / 12,
+            "annual_debt_service": debt_service,
+            "cash_flow": cash_flow,
+            "monthly_cash_flow": cash_flow / 12,
+            "cash_invested": cash_invested,
+            "cash_on_cash": cash_flow / cash_invested,
+            "dscr": np.where(debt_service > 0, noi / debt_service, np.inf),
+        }
+
+
+def scenario_grid(
+    price,
+    monthly_rent=None,
+    hoa_fee=None,
+    property_tax_rate=None,
+    insurance_rate=None,
+    rates: Sequence[float] = (0.06, 0.07, 0.08),
+    down_payments: Sequence[float] = (0.10, 0.20, 0.25),
+    rent_factors: Sequence[float] = (0.9, 1.0, 1.1),
+    assumptions: Optional[Assumptions] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Metrics for every property x rate x down payment x rent factor, in one
+    broadcast evaluation. Arrays have shape (P, R, D, F).
+    """
+    a = assumptions or Assumptions()
+    price = np.asarray(price, dtype=np.float64)
+    rent = _array(monthly_rent) if monthly_rent is not None else np.full(price.shape, np.nan)
+    rent = np.where(np.isnan(rent), price * a.rent_to_price, rent)
+
+    def per_property(values, default):
+        return (_array(values, default) if values is not None else np.full(price.shape, default))[:, None, None, None]
+
+    rates = np.asarray(rates, dtype=np.float64)[None, :, None, None]
+    downs = np.asarray(down_payments, dtype=np.float64)[None, None, :, None]
+    factors = np.asarray(rent_factors, dtype=np.float64)[None, None, None, :]
+    grid = property_metrics(
+        price[:, None, None, None],
+        monthly_rent=rent[:, None, None, None] * factors,
+        hoa_fee=per_property(hoa_fee, 0.0),
+        property_tax_rate=per_property(property_tax_rate, a.property_tax_rate),
+        insurance_rate=per_property(insurance_rate, a.insurance_rate),
+        assumptions=a,
+        rate=rates,
+        down_payment=downs,
+    )
+    shape = np.broadcast_shapes(price[:, None, None, None].shape, rates.shape, downs.shape, factors.shape)
+    return {k: np.broadcast_to(v, shape) for k, v in grid.items() if k not in ("price_per_sqft", "rent_estimated")}
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Generic, Iterable, Optional, Type, TypeVar
+
+from smolagents import Tool
+
+from src import events
+
+T = TypeVar("T")
+
+# Seconds each Lazy took to initialize, by name; read by benchmarks/startup.py and the startup log
+timings: Dict[str, float] = {}
+
+
+class Lazy(Generic[T]):
+    """
+    A value built on first use, exactly once, from any thread.
+
+    Concurrent callers of get() wait for the one running factory instead of
+    building their own copy. A factory that raises is retried on the next
+    get(), so a failed warm-up does not poison the first real request.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self._value: Optional[T] = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def get(self) -> T:
+        if self._ready:
+            return self._value
+        with self._lock:
+            if not self._ready:
+                start = time.perf_counter()
+                self._value = self.factory()
+                timings[self.name] = time.perf_counter() - start
+                self._ready = True
+        return self._value
+
+
+class LazyTool(Tool):
+    """
+    A tool whose implementation is built on its first call.
+
+    It advertises the name, description and inputs of `tool_cls` so agents
+    can be assembled (and their prompts rendered) before the expensive
+    tool exists; forward() builds it through `lazy` and delegates.
+    """
+
+    skip_forward_signature_validation = True
+
+    def __init__(self, tool_cls: Type[Tool], lazy: Lazy, **kwargs):
+        self.name = tool_cls.name
+        self.description = tool_cls.description
+        self.inputs = tool_cls.inputs
+        self.output_type = tool_cls.output_type
+        super().__init__(**kwargs)
+        self.lazy = lazy
+
+    def forward(self, *args, **kwargs):
+        if not self.lazy.ready:
+            events.emit("progress", text=f"Loading {self.lazy.name} (first use)...")
+        return self.lazy.get().forward(*args, **kwargs)
+
+
+def warm_up(components: Iterable[Lazy], delay: Optional[float] = None) -> threading.Thread:
+    """
+    Initialize `components` one after another on a daemon thread.
+
+    The thread sleeps `delay` seconds first (BOOTSTRAP_WARMUP_DELAY, default
+    1s) so the UI can bind its port before warm-up competes for the CPU.
+    Failures are printed and left for the first real use to retry.
+    """
+    if delay is None:
+        delay = float(os.environ.get("BOOTSTRAP_WARMUP_DELAY", 1.0))
+    components = list(components)
+
+    def run():
+        time.sleep(delay)
+        for component in components:
+            try:
+                component.get()
+            except Exception as e:
+                print(f"warm-up of {component.name} failed: {e}")
+                continue
+            print(f"warmed up {component.name} in {timings[component.name]:.2f}s")
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,125 @@
+import contextvars
+import queue
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# The sink of the request being served, and the agent currently running in this context.
+# Worker threads must be started with contextvars.copy_context().run to inherit them.
+_sink: contextvars.ContextVar[Optional["EventSink"]] = contextvars.ContextVar("event_sink", default=None)
+current_agent: contextvars.ContextVar[str] = contextvars.ContextVar("current_agent", default="manager")
+
+
+@dataclass
+class Event:
+    kind: str  # token, step, progress, message, final, error
+    agent: str
+    at: float  # seconds since the request started
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class EventSink:
+    """
+    Thread-safe queue of one request's events, consumed by the UI.
+
+    Also keeps the request's latency milestones: time to the first model
+    token (TTFT), to the first event of any kind, and in total.
+    """
+
+    def __init__(self):
+        self.queue: "queue.Queue[Optional[Event]]" = queue.Queue()
+        self.started = time.perf_counter()
+        self.first_token: Optional[float] = None
+        self.first_event: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.tokens = 0
+
+    def emit(self, kind: str, agent: Optional[str] = None, **data):
+        at = time.perf_counter() - self.started
+        if self.first_event is None:
+            self.first_event = at
+        if kind == "token":
+            self.tokens += 1
+            if self.first_token is None:
+                self.first_token = at
+        self.queue.put(Event(kind, agent or current_agent.get(), at, data))
+
+    def close(self):
+        self.finished = time.perf_counter() - self.started
+        self.queue.put(None)
+
+    def __iter__(self) -> Iterator[Event]:
+        while (event := self.queue.get()) is not None:
+            yield event
+
+    def drain(self, timeout: float) -> Iterator[Optional[Event]]:
+        """Events as they come; yields None after `timeout` seconds without one, and stops at close()."""
+        while True:
+            try:
+                event = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                yield None
+                continue
+            if event is None:
+                return
+            yield event
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        def rounded(v):
+            return None if v is None else round(v, 3)
+
+        return {"ttft_s": rounded(self.first_token), "first_event_s": rounded(self.first_event), "total_s": rounded(self.finished), "tokens": self.tokens}
+
+
+@contextmanager
+def subscribe(sink: EventSink):
+    """Route events emitted in this context (and contexts copied from it) to `sink`."""
+    token = _sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _sink.reset(token)
+
+
+def current() -> Optional[EventSink]:
+    return _sink.get()
+
+
+def emit(kind: str, **data):
+    """Send an event to the current request's sink; a no-op outside a request."""
+    sink = _sink.get()
+    if sink is not None:
+        sink.emit(kind, **data)
+
+
+def emitter() -> Optional[Callable[..., None]]:
+    """
+    emit() bound to this context's sink and agent, for callbacks that run on
+    other threads (e.g. the scraper's event loop). None outside a request.
+    """
+    sink, agent = _sink.get(), current_agent.get()
+    if sink is None:
+        return None
+    return lambda kind, **data: sink.emit(kind, agent=agent, **data)
+
+
+def attach(agent):
+    """
+    Report a managed agent's steps as "step" events, and label everything
+    emitted while it runs (model tokens, progress) with its name.
+    """
+    run = agent.run
+
+    def labelled_run(task, stream=False, **kwargs):
+        if stream:
+            return run(task, stream=True, **kwargs)
+        token = current_agent.set(agent.name)
+        try:
+            return run(task, **kwargs)
+        finally:
+            current_agent.reset(token)
+
+    agent.run = labelled_run
+    agent.step_callbacks.append(lambda step, agent=None: emit("step", step=step))
+    return agent
@@ -0,0 +1,228 @@
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.forms.extraction import FORM_NAMES, detect_form
+
+# Bump whenever the entry layout or the routing below changes; older catalogs are rebuilt.
+CATALOG_VERSION = 2
+
+# Purchase agreement per property type, most specific first ("condo home" is a condo). Vacant land
+# comes last, so "a house on a corner lot" or "a home on half an acre" is still a house.
+PROPERTY_TYPES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("28", "a condominium unit", ("condo", "condos", "condominium*")),
+    ("20", "a multi-family / apartment building", ("multi-family", "multifamily", "multi family", "apartment building", "apartment complex", "5+ units", "five or more units")),
+    ("21", "a residential property (single-family home, townhouse, 1-4 units)", (
+        "single family", "single-family", "house", "home", "homes", "townhouse*", "townhome*", "duplex", "triplex", "fourplex", "residential",
+    )),
+    ("25", "vacant land", ("vacant", "land", "lot", "lots", "acre*", "parcel", "build a")),
+]
+# Land with the building still to come, even when the building is named ("vacant lot to build a house on")
+UNBUILT = ("vacant", "undeveloped", "raw land", "buildable", "build a", "build on", "to build")
+# "the seller is financing part of it", "owner will carry" -> "seller financing"
+SELLER_FINANCING = re.compile(
+    r"\b(?:seller|owner)s?(?: (?:is|are|will|would|can|could|may|might|to|be|also|has|have|agreed|agrees|offered|offers|offering|willing|going|partly|partially))* (?:financ|carr)\w*"
+)
+
+# Addenda by deal feature: (form, why it is attached, trigger phrases)
+FEATURES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("22C", "the seller is financing part of the price", ("seller financ*", "seller-financ*", "owner financ*", "owner-financ*", "seller carr*", "real estate contract")),
+    ("22A", "the buyer is paying with a loan", ("loan*", "mortgage*", "financ*", "fha", "va", "conventional", "usda", "lender*")),
+    ("35E", "the offer escalates against competing offers", ("escalat*", "multiple offer*", "competing offer*", "bidding war*")),
+    ("35", "the buyer wants an inspection contingency", ("inspect*",)),
+    ("35F", "the buyer needs to verify the property suits its intended use", ("feasibility", "zoning", "permit*", "develop*", "due diligence")),
+    ("22T", "the buyer wants to review the preliminary title commitment", ("title",)),
+    ("35N", "the buyer wants to review the neighborhood", ("neighborhood*", "neighbourhood*")),
+    ("22E", "the seller certifies whether it is a foreign person (FIRPTA)", ("firpta", "foreign*")),
+    ("22D", "utilities, insulation, leased items or an owners' association need terms", ("hoa", "homeowner*", "association", "leased", "utilit*", "insulation", "optional clause*")),
+    ("34", "other terms or later changes are written up", ("amend*", "counteroffer*", "counter offer*", "other terms", "change the")),
+]
+# Phrases that rule a form out even when its own phrases appear ("cash, no financing")
+EXCLUDED_BY = {
+    "22A": ("cash", "all cash", "no loan", "no financing", "without financing"),
+    "35": ("no inspection", "waive inspection", "waiving inspection", "without inspection", "as-is", "as is"),
+}
+
+# Attached unless the question rules them out
+USUAL_ADDENDA = {"21": ("22A", "35"), "28": ("22A", "35"), "20": ("22A", "35"), "25": ("22A",)}
+# Addenda an agreement already covers: Form 25 has its own feasibility contingency
+BUILT_IN = {"25": ("35F",)}
+
+
+@dataclass
+class FormEntry:
+    form_id: str
+    file: str
+    title: str
+    pages: int
+    revision: str
+    subject: str
+    sha256: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class Match:
+    entry: FormEntry
+    reason: str
+
+
+@lru_cache(maxsize=None)
+def _phrases(phrases: Tuple[str, ...]) -> "re.Pattern":
+    # Whole words, or stems marked with a trailing "*" ("financ*" matches "financing")
+    words = (re.escape(p[:-1]) + r"\w*" if p.endswith("*") else re.escape(p) + r"\b" for p in phrases)
+    return re.compile(r"\b(?:" + "|".join(words) + ")")
+
+
+def _contains(text: str, phrases: Tuple[str, ...]) -> bool:
+    return bool(phrases) and _phrases(phrases).search(text) is not None
+
+
+class FormCatalog:
+    """
+    Which forms a deal needs, answered from a table instead of a search.
+
+    Entries come from the PDFs' own metadata (FormID, FormName, Rev,
+    Subject) and page counts, read once and saved as JSON next to the
+    document index. sync() re-reads only files whose size or mtime
+    changed. lookup() maps a question's property type and deal features
+    to a purchase agreement and its addenda with plain keyword rules, so
+    the common "which forms do I need for ..." question costs no model
+    call and no retrieval.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self.entries: Dict[str, FormEntry] = {}  # form_id -> entry
+
+    @classmethod
+    def open(cls, path: Optional[str]) -> "FormCatalog":
+        catalog = cls(path)
+        if catalog.path is None or not catalog.path.exists():
+            return catalog
+        try:
+            data = json.loads(catalog.path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable form catalog {catalog.path}: {e}")
+            return catalog
+        if data.get("catalog_version") == CATALOG_VERSION:
+            catalog.entries = {e["form_id"]: FormEntry(**e) for e in data["entries"]}
+        return catalog
+
+    def sync(self, docs_dir: str, glob: str = "*.pdf") -> bool:
+        """Bring the entries in line with the PDFs under `docs_dir`; True if anything changed."""
+        from pypdf import PdfReader
+
+        from src.retrieval.index_store import file_sha256
+
+        known = {entry.file: entry for entry in self.entries.values()}
+        entries, changed = {}, False
+        for p in sorted(Path(docs_dir).rglob(glob)):
+            stat = p.stat()
+            entry = known.get(p.name)
+            if entry is None or (entry.size, entry.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                reader = PdfReader(str(p))
+                meta = reader.metadata or {}
+                form_id = str(meta.get("/FormID") or "").strip() or detect_form(path=p.name)
+                if not form_id:
+                    continue
+                entry = FormEntry(
+                    form_id=form_id,
+                    file=p.name,
+                    title=FORM_NAMES.get(form_id) or str(meta.get("/FormName") or p.stem).strip(),
+                    pages=len(reader.pages),
+                    revision=str(meta.get("/Rev") or "").strip(),
+                    subject=str(meta.get("/Subject") or "").strip(),
+                    sha256=file_sha256(str(p)),
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                )
+                changed = True
+            entries[entry.form_id] = entry
+        changed = changed or entries.keys() != self.entries.keys()
+        self.entries = entries
+        return changed
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"catalog_version": CATALOG_VERSION, "entries": [asdict(e) for e in self.entries.values()]}
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload, indent=1))
+        os.replace(tmp, self.path)
+
+    def lookup(self, question: str = "", property_type: Optional[str] = None, features: Sequence[str] = ()) -> dict:
+        """
+        The agreement and addenda for a deal described in `question` (and/or
+        an explicit `property_type` and `features`, in the same words).
+        Returns {"property_type", "agreement", "addenda", "alternatives"};
+        when no property type is recognized, "agreement" is None and every
+        purchase agreement is listed under "alternatives".
+        """
+        text = re.sub(r"\s+", " ", " ".join([question, property_type or "", *features]).lower())
+        text = re.sub(r"\b(a )?lots? of\b", " ", text)  # "a lot of" is not a building lot
+
+        text = SELLER_FINANCING.sub("seller financing", text)
+
+        agreement, label = None, None
+        types = PROPERTY_TYPES
+        if _contains(text, UNBUILT):
+            types = sorted(PROPERTY_TYPES, key=lambda t: t[0] != "25")
+        for form_id, kind, phrases in types:
+            if _contains(text, phrases) and form_id in self.entries:
+                agreement, label = form_id, kind
+                break
+
+        wanted: Dict[str, str] = {}
+        # "seller financing" must not also read as a buyer's loan
+        remaining = re.sub(r"\b(seller|owner)[ -]financ\w*", " ", text)
+        for form_id, reason, phrases in FEATURES:
+            if _contains(text if form_id == "22C" else remaining, phrases) and not _contains(text, EXCLUDED_BY.get(form_id, ())):
+                wanted.setdefault(form_id, reason)
+        if agreement:
+            for form_id in USUAL_ADDENDA.get(agreement, ()):
+                if _contains(text, EXCLUDED_BY.get(form_id, ())) or form_id == "22A" and "22C" in wanted:
+                    continue
+                wanted.setdefault(form_id, next(reason for f, reason, _ in FEATURES if f == form_id) + " (usual for this property type)")
+
+        return {
+            "property_type": label,
+            "agreement": Match(self.entries[agreement], f"purchase agreement for {label}") if agreement else None,
+            "addenda": [
+                Match(self.entries[f], reason) for f, reason in wanted.items() if f in self.entries and f not in BUILT_IN.get(agreement, ())
+            ],
+            "alternatives": [] if agreement else [
+                Match(self.entries[f], f"purchase agreement for {kind}") for f, kind, _ in PROPERTY_TYPES if f in self.entries
+            ],
+        }
+
+    @staticmethod
+    def describe(match: Match) -> str:
+        e = match.entry
+        pages = f"{e.pages} page{'s' if e.pages != 1 else ''}"
+        return f"- NWMLS Form {e.form_id}, {e.title} ({pages}, rev. {e.revision or 'n/a'}, {e.file}): {match.reason}"
+
+    def answer(self, question: str = "", property_type: Optional[str] = None, features: Sequence[str] = ()) -> str:
+        """lookup() as the markdown the agents read."""
+        result = self.lookup(question, property_type, features)
+        lines = []
+        if result["agreement"] is None:
+            lines.append("Property type not recognized; pick the purchase agreement that fits:")
+            lines += [self.describe(m) for m in result["alternatives"]]
+        else:
+            lines.append(f"Purchase agreement for {result['property_type']}:")
+            lines.append(self.describe(result["agreement"]))
+        if result["addenda"]:
+            lines.append("Addenda:")
+            lines += [self.describe(m) for m in result["addenda"]]
+        lines.append(f"All forms are in the document library ({len(self.entries)} forms); search them for the terms of any one.")
+        return "\n".join(lines)
+
+    def __len__(self) -> int:
+        return len(self.entries)
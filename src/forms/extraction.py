@@ -0,0 +1,485 @@
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Bump whenever a rule changes; results saved by older rules are dropped.
+RULES_VERSION = 1
+
+FORM_NAMES = {
+    "20": "Multi-Family Purchase and Sale Agreement",
+    "21": "Residential Purchase and Sale Agreement",
+    "22A": "Financing Addendum",
+    "22C": "Seller Financing Addendum",
+    "22D": "Optional Clauses Addendum",
+    "22E": "FIRPTA Certification",
+    "22T": "Title Contingency Addendum",
+    "25": "Vacant Land Purchase and Sale Agreement",
+    "28": "Condominium Purchase and Sale Agreement",
+    "34": "Addendum/Amendment to Purchase and Sale Agreement",
+    "35": "Inspection Addendum",
+    "35E": "Escalation Addendum",
+    "35F": "Feasibility Contingency Addendum",
+    "35N": "Neighborhood Review Contingency Addendum",
+}
+
+
+class Raw(str):
+    """A regex fragment in a rule, as opposed to label text matched literally."""
+
+
+# Whitespace, plus the private-use glyphs the forms' checkboxes extract as
+GAP = r"[\s\ue000-\uf8ff]*"
+# Blank fields print as runs of underscores, so every value token skips
+# those and only matches when something was actually filled in.
+BLANK = r"[\s_\ue000-\uf8ff]*"
+
+MONEY = Raw(BLANK + r"\$?" + BLANK + r"(?P<value>\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)")
+PERCENT = Raw(BLANK + r"(?P<value>\d+(?:\.\d+)?)" + BLANK + "%")
+DATE = Raw(
+    BLANK + r"(?P<value>(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}"
+    r"|\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2})"
+)
+# "within ____ days (10 days if not filled in)": the printed default is kept next to the blank
+DAYS = Raw(BLANK + r"(?P<value>\d+)?" + BLANK + r"(?:d\s*a\s*y\s*s)?\s*(?:\(\s*(?P<default>\d+)\s*d\s*a\s*y\s*s\s*if\s*not\s*filled\s*in\s*\))?")
+DEFAULT = Raw(r"\s*\(?\s*(?P<default>\d+)\s*")
+TEXT = Raw(r"[ \t_]*(?P<value>[^\n_]*[^\s_][^\n_]*)")
+NUMBER = Raw(r"\s*\d+")
+
+DATE_FORMATS = ("%B %d, %Y", "%B %d %Y", "%b %d, %Y", "%b. %d, %Y", "%b %d %Y", "%m/%d/%Y", "%m/%d/%y", "%Y-%m-%d")
+
+FORM_HEADER = re.compile(r"\bForm\s+(\d{2}[A-Z]?)\s*©")
+FORM_MENTION = re.compile(r"\bForm\s+(\d{2}[A-Z]?)\b")
+FORM_FILENAME = re.compile(r"^(\d{2}[A-Z]?)_")
+
+
+def _literal(text: str) -> str:
+    # PDF extraction splits words at random ("Pr operty", "da ys"), so allow a gap between any two characters
+    return GAP.join(re.escape(c) for c in text if not c.isspace())
+
+
+def _compile(parts) -> "re.Pattern":
+    return re.compile("".join(p if isinstance(p, Raw) else _literal(p) for p in parts))
+
+
+@dataclass
+class Rule:
+    """
+    One field of one form: a pattern whose `value` group holds what was
+    filled in and, for day counts, an optional `default` pattern that reads
+    the form's own "if not filled in" fallback.
+    """
+
+    field: str
+    kind: str  # money, percent, date, days or text
+    pattern: "re.Pattern"
+    default: Optional["re.Pattern"] = None
+    contingency: Optional[str] = None  # listed under contingencies as "<label>: N days after mutual acceptance"
+    action: Optional[str] = None  # listed under required_actions, formatted with {days}
+
+    def apply(self, text: str):
+        """(value, defaulted) for this rule in `text`; (None, False) if neither filled in nor defaulted."""
+        match = self.pattern.search(text)
+        value = match.group("value") if match else None
+        if value is not None:
+            return _parse(self.kind, value), False
+        default = match.groupdict().get("default") if match else None
+        if default is None and self.default is not None:
+            fallback = self.default.search(text)
+            default = fallback.group("default") if fallback else None
+        return (int(default), True) if default is not None else (None, False)
+
+
+def rule(field: str, kind: str, *parts, default=None, contingency=None, action=None) -> Rule:
+    """Rule from literal label text and value tokens, e.g. rule("purchase_price", "money", "Purchase Price:", MONEY)."""
+    return Rule(field, kind, _compile(parts), _compile(default) if default else None, contingency, action)
+
+
+def _parse(kind: str, value: str):
+    value = value.strip()
+    if kind == "money":
+        return float(value.replace(",", ""))
+    if kind == "percent":
+        return float(value)
+    if kind == "days":
+        return int(value)
+    if kind == "date":
+        cleaned = re.sub(r"\s+", " ", value)
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(cleaned, fmt).date().isoformat()
+            except ValueError:
+                continue
+        return cleaned
+    return re.sub(r"\s+", " ", value)
+
+
+AGREEMENT_DATED = rule("agreement_date", "date", "Purchase and Sale Agreement dated", DATE)
+
+PSA_RULES = [
+    rule("agreement_date", "date", "Specific Terms 1. Date:", DATE),
+    rule("offer_expiration", "date", "Offer Expiration Date:", DATE),
+    rule("purchase_price", "money", "Purchase Price:", MONEY),
+    rule("earnest_money", "money", "Earnest Money:", MONEY),
+    rule(
+        "earnest_money_days", "days", "Delivery Date", DAYS,
+        default=("Delivery Date listed in Specific Term No.", NUMBER, DEFAULT, "days after mutual acceptance if not filled in"),
+        action="Deliver the earnest money within {days} days after mutual acceptance",
+    ),
+    rule("closing_date", "date", "Closing Date:", DATE),
+    rule(
+        "information_verification_days", "days", "Information Verification Period: Expires", DAYS,
+        default=("Information Verification Period", Raw(r"[\s\S]{0,80}?"), "Specific Term No.", NUMBER, DEFAULT, "days after mutual acceptance if not filled in"),
+        contingency="Information verification period",
+    ),
+    rule("addenda", "text", "Addenda:", TEXT),
+]
+
+FORM_RULES: Dict[str, List[Rule]] = {
+    "20": PSA_RULES,
+    "21": PSA_RULES,
+    "25": PSA_RULES + [
+        rule("feasibility_days", "days", "Feasibility Contingency: Expires", DAYS, contingency="Feasibility contingency"),
+    ],
+    "28": PSA_RULES + [
+        rule("condo_assessment", "money", "Condominium Assessment:", MONEY),
+        rule(
+            "resale_certificate_days", "days", "deliver to Buyer", DAYS,
+            action="Seller delivers the public offering statement or resale certificate within {days} days after mutual acceptance",
+        ),
+    ],
+    "22A": [
+        AGREEMENT_DATED,
+        rule("down_payment", "money", "down payment in the amount of", MONEY),
+        rule("down_payment_percent", "percent", "down payment in the amount of", Raw(BLANK + r"\$?" + BLANK + r"[\d,.]*[\s_;]*"), "or", PERCENT),
+        rule(
+            "loan_application_days", "days", "pay the application fee, if required, for the subject Property within", DAYS,
+            action="Apply for the loan within {days} days after mutual acceptance",
+        ),
+        rule(
+            "financing_waiver_days", "days", "Financing Contingency shall conclusively be deemed waived unless within", DAYS,
+            contingency="Financing contingency",
+            action="Give notice of termination for financing within {days} days after mutual acceptance, or the contingency is waived",
+        ),
+        rule("seller_paid_loan_costs", "money", "LOAN COST PROVISIONS. Seller shall pay up to", MONEY),
+    ],
+    "22C": [
+        AGREEMENT_DATED,
+        rule("down_payment", "money", "Total Down Payment", MONEY),
+        rule("interest_rate", "percent", "shall accrue interest at", PERCENT),
+        rule("installment", "money", "Principal and interest installments of", MONEY),
+        rule("balloon_date", "date", "shall be due and payable in full on", DATE),
+        rule(
+            "seller_financing_review_days", "days", "Unless a party gives written notice of disapproval of this Agreement within", DAYS,
+            contingency="Seller financing review",
+        ),
+    ],
+    "22D": [AGREEMENT_DATED],
+    "22E": [],
+    "22T": [
+        AGREEMENT_DATED,
+        rule(
+            "title_review_days", "days", "restrictions of record. Buyer shall have", DAYS,
+            contingency="Title contingency",
+            action="Review the preliminary title commitment and give any notice of disapproval within {days} days",
+        ),
+    ],
+    "34": [AGREEMENT_DATED],
+    "35": [
+        AGREEMENT_DATED,
+        rule(
+            "inspection_days", "days", "obligated to make any repairs or modifications unless within", DAYS,
+            contingency="Inspection contingency",
+            action="Complete the inspection and give notice within {days} days after mutual acceptance",
+        ),
+        rule("repair_response_days", "days", "Request for Repairs or Modifications. Seller shall have", DAYS),
+    ],
+    "35E": [
+        AGREEMENT_DATED,
+        rule("escalation_amount", "money", "shall be increased by", MONEY),
+        rule("maximum_purchase_price", "money", "Purchase Price of this offer exceed", MONEY),
+        rule("competing_offer_closing_days", "days", "provides for closing no later than", DAYS),
+    ],
+    "35F": [
+        AGREEMENT_DATED,
+        rule(
+            "feasibility_days", "days", "Buyer shall verify within", DAYS,
+            contingency="Feasibility contingency",
+            action="Verify the property's suitability within {days} days after mutual acceptance",
+        ),
+    ],
+    "35N": [
+        rule(
+            "neighborhood_review_days", "days", "notice of disapproval of the Neighborhood Review within", DAYS,
+            contingency="Neighborhood review",
+            action="Give any notice of disapproval of the neighborhood within {days} days after mutual acceptance",
+        ),
+    ],
+}
+
+# For text whose form can't be told: every rule, first one per field wins
+GENERIC_RULES = list({r.field: r for rules in reversed(FORM_RULES.values()) for r in rules}.values())
+
+# Which extracted fields answer each generate_summary() key date
+KEY_DATE_FIELDS = {
+    "effective_date": ("agreement_date",),
+    "closing_date": ("closing_date",),
+    # NWMLS has no paid option period; the buyer's free walk-away window is the inspection/feasibility period
+    "option_period_end": ("inspection_days", "feasibility_days", "information_verification_days"),
+    "financing_deadline": ("financing_waiver_days",),
+}
+FINANCIAL_FIELDS = (
+    "purchase_price", "earnest_money", "down_payment", "down_payment_percent", "seller_paid_loan_costs",
+    "escalation_amount", "maximum_purchase_price", "interest_rate", "installment", "condo_assessment",
+)
+
+
+def document_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def detect_form(text: str = "", path: Optional[str] = None) -> Optional[str]:
+    """NWMLS form ID ("21", "35E", ...) from the file name, else the page header, else the first mention."""
+    if path:
+        match = FORM_FILENAME.match(Path(path).name)
+        if match and match.group(1) in FORM_RULES:
+            return match.group(1)
+    for pattern in (FORM_HEADER, FORM_MENTION):
+        match = pattern.search(text[:2000])
+        if match and match.group(1) in FORM_RULES:
+            return match.group(1)
+    return None
+
+
+def extract_fields(text: str, form_id: Optional[str] = None) -> Dict[str, dict]:
+    """Every field the form's rules find: {field: {"value": ..., "defaulted": bool}}."""
+    found = {}
+    for r in FORM_RULES.get(form_id, GENERIC_RULES):
+        if r.field in found:
+            continue
+        value, defaulted = r.apply(text)
+        if value is not None:
+            found[r.field] = {"value": value, "defaulted": defaulted}
+    return found
+
+
+def summarize(form_id: Optional[str], fields: Dict[str, dict]) -> dict:
+    """Extracted fields in the generate_summary() layout, plus the form ID and the raw fields."""
+    def after_acceptance(name):
+        field = fields[name]
+        return f"{field['value']} days after mutual acceptance" + (" (form default)" if field["defaulted"] else "")
+
+    key_dates = {}
+    for key, names in KEY_DATE_FIELDS.items():
+        name = next((n for n in names if n in fields), None)
+        if name is None:
+            key_dates[key] = None
+        elif name.endswith("_days"):
+            key_dates[key] = after_acceptance(name)
+        else:
+            key_dates[key] = fields[name]["value"]
+
+    financial_terms = {"purchase_price": 0, "earnest_money": 0, "option_fee": 0}  # no option fee on NWMLS forms
+    financial_terms.update({name: fields[name]["value"] for name in FINANCIAL_FIELDS if name in fields})
+
+    contingencies, required_actions = [], []
+    for r in FORM_RULES.get(form_id, GENERIC_RULES):
+        if r.field not in fields:
+            continue
+        if r.contingency:
+            contingencies.append(f"{r.contingency}: {after_acceptance(r.field)}")
+        if r.action:
+            required_actions.append(r.action.format(days=fields[r.field]["value"]))
+
+    special_provisions = []
+    if "maximum_purchase_price" in fields or "escalation_amount" in fields or form_id == "35E":
+        amount = fields.get("escalation_amount", {}).get("value")
+        cap = fields.get("maximum_purchase_price", {}).get("value")
+        special_provisions.append(
+            "Escalation clause"
+            + (f": ${amount:,.0f} over a competing offer's net price" if amount else "")
+            + (f", capped at ${cap:,.0f}" if cap else "")
+        )
+    if form_id == "22C" or "interest_rate" in fields:
+        rate = fields.get("interest_rate", {}).get("value")
+        special_provisions.append("Seller financing" + (f" at {rate}% per annum" if rate is not None else ""))
+    if form_id == "22E":
+        special_provisions.append("FIRPTA certification of the seller's non-foreign status")
+    if form_id == "22D":
+        special_provisions.append("Optional clauses (utilities, insulation, leased items, homeowners' association)")
+    if "addenda" in fields:
+        special_provisions.append(f"Addenda: {fields['addenda']['value']}")
+    if "offer_expiration" in fields:
+        special_provisions.append(f"Offer expires {fields['offer_expiration']['value']}")
+
+    name = FORM_NAMES.get(form_id)
+    return {
+        "form_id": form_id,
+        "contract_type": f"{name} (NWMLS Form {form_id})" if name else "",
+        "key_dates": key_dates,
+        "financial_terms": financial_terms,
+        "contingencies": contingencies,
+        "special_provisions": special_provisions,
+        "required_actions": required_actions,
+        "fields": fields,
+    }
+
+
+def analyze(text: str, form_id: Optional[str] = None) -> dict:
+    """Uncached extraction and summary of one document's text."""
+    form_id = form_id or detect_form(text)
+    return summarize(form_id, extract_fields(text, form_id))
+
+
+def merge(analyses: Iterable[dict]) -> dict:
+    """
+    One generate_summary() dict for a purchase agreement and its addenda.
+    The agreement's contract type and terms win; addenda fill whatever it
+    leaves empty and add their contingencies, provisions and actions.
+    """
+    analyses = sorted((a for a in analyses if isinstance(a, dict)), key=lambda a: a.get("form_id") not in ("20", "21", "25", "28"))
+    summary = {
+        "contract_type": "",
+        "key_dates": {key: None for key in KEY_DATE_FIELDS},
+        "financial_terms": {"purchase_price": 0, "earnest_money": 0, "option_fee": 0},
+        "contingencies": [],
+        "special_provisions": [],
+        "required_actions": [],
+    }
+    for analysis in analyses:
+        summary["contract_type"] = summary["contract_type"] or analysis.get("contract_type", "")
+        for key, value in analysis.get("key_dates", {}).items():
+            if summary["key_dates"].get(key) is None:
+                summary["key_dates"][key] = value
+        for key, value in analysis.get("financial_terms", {}).items():
+            if not summary["financial_terms"].get(key):
+                summary["financial_terms"][key] = value
+        for key in ("contingencies", "special_provisions", "required_actions"):
+            summary[key].extend(item for item in analysis.get(key, []) if item not in summary[key])
+    return summary
+
+
+def pdf_text(path: str) -> str:
+    from pypdf import PdfReader
+
+    return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+
+
+class FormExtractor:
+    """
+    Deterministic field extraction for the NWMLS forms, cached per document.
+
+    Results are keyed by the SHA-256 of the document (the file's bytes for
+    a path, the text otherwise) and kept in an LRU of `maxsize` entries.
+    With a `path`, results are also saved as JSON so the forms of the
+    library, extracted once at index time by precompute(), are answered
+    from disk after a restart. Returned dicts are copies; callers may
+    change them.
+    """
+
+    def __init__(self, path: Optional[str] = None, maxsize: int = 1024):
+        self.path = Path(path) if path else None
+        self.maxsize = maxsize
+        self.stats = {"hits": 0, "misses": 0}
+        self._results: "OrderedDict[str, dict]" = OrderedDict()
+        self._file_keys: Dict[str, tuple] = {}  # path -> (size, mtime_ns, sha256)
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable form field cache {self.path}: {e}")
+            else:
+                if data.get("rules_version") == RULES_VERSION:
+                    self._results.update(data["results"])
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._results
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._results)
+
+    def _get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                self.stats["misses"] += 1
+                return None
+            self._results.move_to_end(key)
+            self.stats["hits"] += 1
+        return copy.deepcopy(result)
+
+    def _put(self, key: str, result: dict) -> dict:
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return copy.deepcopy(result)
+
+    def extract(self, text: str, form_id: Optional[str] = None) -> dict:
+        """Summary of one document's text; the form is detected when not given."""
+        form_id = form_id or detect_form(text)
+        key = f"{form_id}:{document_hash(text)}"
+        result = self._get(key)
+        if result is None:
+            result = self._put(key, analyze(text, form_id))
+        return result
+
+    def extract_file(self, path: str, form_id: Optional[str] = None) -> dict:
+        """Summary of a PDF (or text file); the text is only read on a cache miss."""
+        form_id = form_id or detect_form(path=path)
+        key = f"{form_id}:{self._file_sha256(path)}"
+        result = self._get(key)
+        if result is None:
+            text = pdf_text(path) if path.lower().endswith(".pdf") else Path(path).read_text()
+            result = self._put(key, analyze(text, form_id))
+        return result
+
+    def _file_sha256(self, path: str) -> str:
+        stat = os.stat(path)
+        known = self._file_keys.get(path)
+        if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return known[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self._file_keys[path] = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+        return digest.hexdigest()
+
+    def precompute(self, index) -> int:
+        """
+        Extract every form of a PersistentIndex that has no result yet, from
+        the text already in the index, and save. Returns how many were added.
+        """
+        added = 0
+        for name, entry in index.files.items():
+            form_id = detect_form(path=name)
+            key = f"{form_id}:{entry['sha256']}"
+            if key in self:
+                continue
+            self._put(key, analyze(index.text(name), form_id))
+            added += 1
+        if added:
+            self.save()
+        return added
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = {"rules_version": RULES_VERSION, "results": dict(self._results)}
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, self.path)
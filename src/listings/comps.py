@@ -0,0 +1,173 @@
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+
+from src.listings.store import EARTH_RADIUS_MILES, PropertyStore
+
+if TYPE_CHECKING:
+    from sklearn.neighbors import BallTree
+
+COLUMNS = [
+    "property_id", "lat", "lon", "sqft", "beds", "baths", "year_built", "property_type",
+    "price", "status", "event_date", "address", "url",
+]
+
+# How much one unit of difference costs in the similarity score. A comp one
+# mile away, 25% bigger, one bedroom more or 20 years newer all cost about 1.
+DEFAULT_WEIGHTS = {
+    "distance": 1.0,  # per mile
+    "sqft": 4.0,  # per unit of |log(sqft ratio)|  (25% bigger ~ 0.9)
+    "beds": 1.0,  # per bedroom
+    "baths": 0.7,  # per bathroom
+    "year": 0.05,  # per year of age difference
+    "type": 3.0,  # different property type
+}
+
+
+@dataclass
+class Subject:
+    """The property comps are wanted for."""
+
+    lat: float
+    lon: float
+    sqft: Optional[float] = None
+    beds: Optional[float] = None
+    baths: Optional[float] = None
+    year_built: Optional[float] = None
+    property_type: Optional[str] = None
+    property_id: Optional[str] = None
+
+    @classmethod
+    def from_record(cls, record) -> "Subject":
+        return cls(record.lat, record.lon, record.sqft, record.beds, record.baths, record.year_built, record.property_type, record.property_id)
+
+
+@dataclass
+class CompsResult:
+    subject: Subject
+    comps: List[dict]
+    candidates: int
+    estimate: Optional[float] = None  # similarity-weighted adjusted price
+    median_price_per_sqft: Optional[float] = None
+
+
+class ComparablesEngine:
+    """
+    k-nearest comparable sales over stored listings.
+
+    Listings are indexed per status in scikit-learn BallTrees on (lat, lon)
+    with the haversine metric. A query takes the `candidates` nearest
+    listings, scores them all at once with numpy (distance plus size, beds,
+    baths, age and type differences, see DEFAULT_WEIGHTS), and keeps the
+    `k` lowest scores. Each comp's price is adjusted to the subject's size
+    with the comp's own price per square foot; the estimate is the
+    similarity-weighted mean of those adjusted prices.
+    """
+
+    def __init__(self, table: pa.Table, weights: Optional[Dict[str, float]] = None, leaf_size: int = 40):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.leaf_size = leaf_size
+        self.size = table.num_rows
+
+        def column(name, dtype=np.float64):
+            return table.column(name).to_numpy(zero_copy_only=False).astype(dtype) if name in table.column_names else np.full(self.size, np.nan)
+
+        self.lat = column("lat")
+        self.lon = column("lon")
+        self.sqft = column("sqft")
+        self.beds = column("beds")
+        self.baths = column("baths")
+        self.year = column("year_built")
+        self.price = column("price")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.price_per_sqft = np.where(self.sqft > 0, self.price / self.sqft, np.nan)
+            self.log_sqft = np.log(np.where(self.sqft > 0, self.sqft, np.nan))
+        types = table.column("property_type").combine_chunks().dictionary_encode()
+        self.type_names = types.dictionary.to_pylist()
+        self.type_codes = types.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+        self.ids = table.column("property_id").to_numpy(zero_copy_only=False)
+        self.table = table
+        statuses = table.column("status").fill_null("").to_numpy(zero_copy_only=False)
+        located = ~(np.isnan(self.lat) | np.isnan(self.lon))
+
+        self._coords = np.radians(np.column_stack([self.lat, self.lon]))
+        self._rows: Dict[Optional[str], np.ndarray] = {None: np.flatnonzero(located)}
+        for status in np.unique(statuses):
+            self._rows[status] = np.flatnonzero(located & (statuses == status))
+        self._trees: Dict[Optional[str], "BallTree"] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, store: PropertyStore, **kwargs) -> "ComparablesEngine":
+        return cls(store.query(columns=COLUMNS), **kwargs)
+
+    def tree(self, status: Optional[str] = None) -> "BallTree":
+        """BallTree over listings with `status` (None: all), built on first use."""
+        with self._lock:
+            if status not in self._trees:
+                from sklearn.neighbors import BallTree  # ~1s import, paid on the first comps query
+
+                rows = self._rows.get(status, np.empty(0, dtype=np.int64))
+                self._trees[status] = BallTree(self._coords[rows], leaf_size=self.leaf_size, metric="haversine")
+            return self._trees[status]
+
+    def query(self, subject: Subject, k: int = 5, status: Optional[str] = "sold", candidates: int = 200, max_miles: Optional[float] = None) -> CompsResult:
+        rows = self._rows.get(status, np.empty(0, dtype=np.int64))
+        if len(rows) == 0:
+            return CompsResult(subject, [], 0)
+        n = min(len(rows), candidates + 1)  # +1 in case the subject itself is indexed
+        dist, idx = self.tree(status).query(np.radians([[subject.lat, subject.lon]]), k=n)
+        miles = dist[0] * EARTH_RADIUS_MILES
+        rows = rows[idx[0]]
+        keep = self.ids[rows] != subject.property_id if subject.property_id else np.ones(len(rows), dtype=bool)
+        if max_miles is not None:
+            keep &= miles <= max_miles
+        rows, miles = rows[keep], miles[keep]
+
+        score = self.score(subject, rows, miles)
+        top = np.argpartition(score, min(k, len(score)) - 1)[:k] if len(score) > k else np.arange(len(score))
+        top = top[np.lexsort((miles[top], score[top]))]
+        rows, miles, score = rows[top], miles[top], score[top]
+
+        ppsf = self.price_per_sqft[rows]
+        adjusted = ppsf * subject.sqft if subject.sqft else np.full(len(rows), np.nan)
+        comps = []
+        for row, mi, sc, pps, adj in zip(self.table.take(rows).to_pylist(), miles, score, ppsf, adjusted):
+            record = {k: v for k, v in row.items() if v is not None}
+            if "event_date" in record:
+                record["event_date"] = record["event_date"].isoformat()
+            record["distance_miles"] = round(float(mi), 3)
+            record["score"] = round(float(sc), 3)
+            if not np.isnan(pps):
+                record["price_per_sqft"] = round(float(pps), 2)
+            if not np.isnan(adj):
+                record["adjusted_price"] = int(round(adj, -2))
+            comps.append(record)
+
+        result = CompsResult(subject, comps, int(keep.sum()))
+        valid = ~np.isnan(adjusted)
+        if valid.any():
+            weights = 1.0 / (1.0 + score[valid])
+            result.estimate = float(round(np.sum(adjusted[valid] * weights) / np.sum(weights), -2))
+        if (~np.isnan(ppsf)).any():
+            result.median_price_per_sqft = round(float(np.nanmedian(ppsf)), 2)
+        return result
+
+    def score(self, subject: Subject, rows: np.ndarray, miles: np.ndarray) -> np.ndarray:
+        """Dissimilarity of `rows` to the subject (lower is more comparable); missing values cost nothing."""
+        w = self.weights
+        score = w["distance"] * miles
+        if subject.sqft:
+            score += w["sqft"] * np.nan_to_num(np.abs(self.log_sqft[rows] - np.log(subject.sqft)))
+        if subject.beds is not None:
+            score += w["beds"] * np.nan_to_num(np.abs(self.beds[rows] - subject.beds))
+        if subject.baths is not None:
+            score += w["baths"] * np.nan_to_num(np.abs(self.baths[rows] - subject.baths))
+        if subject.year_built:
+            score += w["year"] * np.nan_to_num(np.abs(self.year[rows] - subject.year_built))
+        if subject.property_type in self.type_names:
+            score += w["type"] * (self.type_codes[rows] != self.type_names.index(subject.property_type))
+        return score
@@ -0,0 +1,387 @@
+import datetime as dt
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+from src.scraping.records import PriceEvent, PropertyRecord, TaxYear
+
+EARTH_RADIUS_MILES = 3958.8
+
+SCHEMA = pa.schema(
+    [
+        ("property_id", pa.string()),
+        ("listing_id", pa.string()),
+        ("url", pa.string()),
+        ("status", pa.string()),
+        ("price", pa.int64()),
+        ("list_price", pa.int64()),
+        ("list_date", pa.date32()),
+        ("last_sold_price", pa.int64()),
+        ("last_sold_date", pa.date32()),
+        ("event_date", pa.date32()),  # sale date for sold listings, list date otherwise
+        ("property_type", pa.string()),
+        ("beds", pa.int16()),
+        ("baths", pa.float32()),
+        ("sqft", pa.int32()),
+        ("lot_sqft", pa.int64()),
+        ("year_built", pa.int16()),
+        ("address", pa.string()),
+        ("city", pa.string()),
+        ("state", pa.string()),
+        ("lat", pa.float64()),
+        ("lon", pa.float64()),
+        ("hoa_fee", pa.int32()),
+        ("property_tax_rate", pa.float64()),
+        ("estimated_payment", pa.int32()),
+        ("remarks", pa.string()),
+        ("tax_history", pa.list_(pa.struct([("year", pa.int16()), ("tax", pa.int64()), ("assessment", pa.int64())]))),
+        ("price_history", pa.list_(pa.struct([("date", pa.string()), ("event", pa.string()), ("price", pa.int64())]))),
+        ("scraped_at", pa.timestamp("ms", tz="UTC")),
+    ]
+)
+PARTITION_KEY = "postal_code"
+PARTITIONING = ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor="hive")
+
+
+def _date(value: Optional[str]) -> Optional[dt.date]:
+    if not value:
+        return None
+    try:
+        return dt.date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def parse_date(value: str) -> dt.date:
+    """A query date, 'YYYY-MM-DD' (a time after it is ignored); ValueError if it is not one."""
+    try:
+        return dt.date.fromisoformat(value[:10])
+    except ValueError:
+        raise ValueError(f"expected a date like '2024-06-30', got {value!r}") from None
+
+
+def _zip(value: Optional[str]) -> str:
+    # Partition directory names must be path-safe
+    value = re.sub(r"[^0-9A-Za-z-]", "", value or "")
+    return value or "unknown"
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles; broadcasts over numpy arrays."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+class PropertyStore:
+    """
+    Local columnar store of every scraped listing.
+
+    Records are written as Parquet files under `<root>/postal_code=<zip>/`
+    (hive partitioning). Writes only ever add files; a listing scraped
+    again is simply appended, and reads keep the newest row per
+    `property_id` (upsert on read). `compact` rewrites a ZIP's files into
+    one once enough have piled up. Reads go through pyarrow.dataset on a
+    memory-mapped local filesystem, with ZIP filters pruning whole
+    directories before any file is opened. Reads take no lock; one that
+    loses a file to a concurrent compaction is retried under the writers'
+    lock.
+
+        store = PropertyStore("./.property_store")
+        store.append(records)
+        store.query(postal_codes=["77077"], min_price=300000, max_price=500000)
+    """
+
+    def __init__(self, root: str, compact_after: int = 8):
+        self.root = Path(root)
+        self.compact_after = compact_after
+        self.filesystem = fs.LocalFileSystem(use_mmap=True)
+        self._lock = threading.Lock()
+
+    # -- writing --------------------------------------------------------
+
+    def _table(self, records: Sequence[PropertyRecord], scraped_at: dt.datetime) -> pa.Table:
+        rows = []
+        for r in records:
+            event_date = r.last_sold_date if r.status == "sold" and r.last_sold_date else r.list_date
+            rows.append(
+                {
+                    "property_id": r.property_id,
+                    "listing_id": r.listing_id,
+                    "url": r.url,
+                    "status": r.status,
+                    "price": r.price,
+                    "list_price": r.list_price,
+                    "list_date": _date(r.list_date),
+                    "last_sold_price": r.last_sold_price,
+                    "last_sold_date": _date(r.last_sold_date),
+                    "event_date": _date(event_date),
+                    "property_type": r.property_type,
+                    "beds": r.beds,
+                    "baths": r.baths,
+                    "sqft": r.sqft,
+                    "lot_sqft": r.lot_sqft,
+                    "year_built": r.year_built,
+                    "address": r.address,
+                    "city": r.city,
+                    "state": r.state,
+                    "lat": r.lat,
+                    "lon": r.lon,
+                    "hoa_fee": r.hoa_fee,
+                    "property_tax_rate": r.property_tax_rate,
+                    "estimated_payment": r.estimated_payment,
+                    "remarks": r.remarks,
+                    "tax_history": [{"year": t.year, "tax": t.tax, "assessment": t.assessment} for t in r.tax_history],
+                    "price_history": [{"date": e.date, "event": e.event, "price": e.price} for e in r.price_history],
+                    "scraped_at": scraped_at,
+                }
+            )
+        return pa.Table.from_pylist(rows, schema=SCHEMA)
+
+    def append(self, records: Iterable[Optional[PropertyRecord]], scraped_at: Optional[dt.datetime] = None) -> int:
+        """Add records (None and id-less ones are skipped); returns how many were written."""
+        scraped_at = scraped_at or dt.datetime.now(dt.timezone.utc)
+        by_zip = {}
+        for record in records:
+            if record is not None and record.property_id:
+                by_zip.setdefault(_zip(record.postal_code), []).append(record)
+        with self._lock:
+            for postal_code, group in by_zip.items():
+                directory = self.root / f"{PARTITION_KEY}={postal_code}"
+                directory.mkdir(parents=True, exist_ok=True)
+                self._write(directory, self._table(group, scraped_at))
+                if len(list(directory.glob("*.parquet"))) > self.compact_after:
+                    self._compact(directory)
+        return sum(len(group) for group in by_zip.values())
+
+    @staticmethod
+    def _write(directory: Path, table: pa.Table):
+        # Time-ordered names so newer files sort last; write-then-rename so readers never see half a file
+        name = f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp = directory / f".{name}.tmp"
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, directory / name)
+
+    def _compact(self, directory: Path):
+        files = sorted(directory.glob("*.parquet"))
+        table = self._latest(pq.ParquetDataset([str(f) for f in files], schema=SCHEMA, memory_map=True).read())
+        self._write(directory, table)
+        for f in files:
+            f.unlink()
+
+    def compact(self):
+        """Rewrite every ZIP partition as a single file holding only the newest rows."""
+        with self._lock:
+            for directory in self.root.glob(f"{PARTITION_KEY}=*"):
+                if len(list(directory.glob("*.parquet"))) > 1:
+                    self._compact(directory)
+
+    # -- reading --------------------------------------------------------
+
+    def version(self) -> tuple:
+        """Changes whenever a file is added or compacted away; cheap enough to check per call."""
+        return tuple(sorted(p.name for p in self.root.glob(f"{PARTITION_KEY}=*/*.parquet")))
+
+    def dataset(self) -> Optional[ds.Dataset]:
+        if not any(self.root.glob(f"{PARTITION_KEY}=*/*.parquet")):
+            return None
+        return ds.dataset(
+            str(self.root.resolve()),
+            schema=SCHEMA.append(pa.field(PARTITION_KEY, pa.string())),
+            format="parquet",
+            partitioning=PARTITIONING,
+            filesystem=self.filesystem,
+            exclude_invalid_files=False,
+            ignore_prefixes=[".", "_"],
+        )
+
+    @staticmethod
+    def _latest(table: pa.Table) -> pa.Table:
+        """Keep the newest row per property_id."""
+        if table.num_rows == 0:
+            return table
+        table = table.sort_by([("property_id", "ascending"), ("scraped_at", "descending")])
+        ids = table.column("property_id").combine_chunks()
+        keep = np.ones(len(ids), dtype=bool)
+        keep[1:] = pc.not_equal(ids[1:], ids[:-1]).to_numpy(zero_copy_only=False)
+        return table.filter(pa.array(keep))
+
+    def query(
+        self,
+        postal_codes: Optional[Sequence[str]] = None,
+        city: Optional[str] = None,
+        near: Optional[Tuple[float, float]] = None,
+        radius_miles: float = 1.0,
+        property_type: Optional[str] = None,
+        status: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        exclude_ids: Sequence[str] = (),
+        columns: Optional[List[str]] = None,
+    ) -> pa.Table:
+        """
+        Newest version of every stored listing matching all given filters.
+
+        Geography is a ZIP list (prunes partitions), a city, and/or a radius
+        around `near` (lat, lon). Dates filter `event_date`: the sale date
+        for sold listings, the list date otherwise, and must be ISO dates
+        (ValueError otherwise). Prices are inclusive.
+        """
+        args = (postal_codes, city, near, radius_miles, property_type, status, min_price, max_price, date_from, date_to, exclude_ids, columns)
+        try:
+            return self._query(*args)
+        except FileNotFoundError:
+            # A compaction removed a file this read had listed; read again with writers held off
+            with self._lock:
+                return self._query(*args)
+
+    def _query(self, postal_codes, city, near, radius_miles, property_type, status, min_price, max_price, date_from, date_to, exclude_ids, columns) -> pa.Table:
+        dataset = self.dataset()
+        if dataset is None:
+            return SCHEMA.empty_table()
+
+        # Only the partition filter is pushed down before de-duplication: filtering
+        # on price or status first could surface an outdated version of a listing.
+        partition_filter = None
+        if postal_codes:
+            partition_filter = ds.field(PARTITION_KEY).isin([_zip(z) for z in postal_codes])
+        # Two passes: de-duplicate and filter on the few columns involved, then read
+        # full rows (remarks, histories) only from the files holding matches.
+        scan = ["property_id", "scraped_at", "city", "property_type", "status", "price", "event_date", "lat", "lon"]
+        fragments = list(dataset.get_fragments(filter=partition_filter))
+        parts = []
+        for number, fragment in enumerate(fragments):
+            part = fragment.to_table(columns=scan, schema=dataset.schema)
+            parts.append(
+                part.append_column("_fragment", pa.array(np.full(part.num_rows, number, dtype=np.int32)))
+                .append_column("_row", pa.array(np.arange(part.num_rows, dtype=np.int64)))
+            )
+        if not parts:
+            return SCHEMA.empty_table()
+        table = self._latest(pa.concat_tables(parts))
+
+        mask = pc.is_valid(table.column("property_id"))
+        if city:
+            mask = pc.and_(mask, pc.equal(pc.utf8_lower(table.column("city")), city.lower()))
+        if property_type:
+            mask = pc.and_(mask, pc.equal(table.column("property_type"), property_type))
+        if status:
+            mask = pc.and_(mask, pc.equal(table.column("status"), status))
+        if min_price is not None:
+            mask = pc.and_(mask, pc.greater_equal(table.column("price"), int(min_price)))
+        if max_price is not None:
+            mask = pc.and_(mask, pc.less_equal(table.column("price"), int(max_price)))
+        if date_from:
+            mask = pc.and_(mask, pc.greater_equal(table.column("event_date"), pa.scalar(parse_date(date_from), pa.date32())))
+        if date_to:
+            mask = pc.and_(mask, pc.less_equal(table.column("event_date"), pa.scalar(parse_date(date_to), pa.date32())))
+        if exclude_ids:
+            mask = pc.and_(mask, pc.invert(pc.is_in(table.column("property_id"), pa.array(list(exclude_ids)))))
+        if near is not None:
+            lat, lon = near
+            # Cheap bounding box first, exact great-circle distance on what is left
+            dlat = radius_miles / 69.0
+            dlon = radius_miles / max(1e-6, 69.0 * math.cos(math.radians(lat)))
+            box = pc.and_(
+                pc.and_(pc.greater_equal(table.column("lat"), lat - dlat), pc.less_equal(table.column("lat"), lat + dlat)),
+                pc.and_(pc.greater_equal(table.column("lon"), lon - dlon), pc.less_equal(table.column("lon"), lon + dlon)),
+            )
+            mask = pc.and_(mask, box)
+        table = table.filter(pc.fill_null(mask, False))
+        distance = None
+        if near is not None:
+            distance = haversine_miles(lat, lon, table.column("lat").to_numpy(zero_copy_only=False), table.column("lon").to_numpy(zero_copy_only=False))
+            inside = distance <= radius_miles
+            order = np.argsort(distance[inside], kind="stable")
+            table = table.filter(pa.array(inside)).take(order)
+            distance = distance[inside][order]
+        else:
+            table = table.sort_by([("_fragment", "ascending"), ("_row", "ascending")])
+
+        wanted = [c for c in columns if c in dataset.schema.names] if columns else dataset.schema.names
+        if set(wanted) <= set(scan):
+            result = table.select(wanted)
+        else:
+            result = self._take(fragments, dataset.schema, table, wanted)
+        if distance is not None:
+            result = result.append_column("distance_miles", pa.array(np.round(distance, 3)))
+        return result
+
+    @staticmethod
+    def _take(fragments, schema: pa.Schema, selected: pa.Table, columns: List[str]) -> pa.Table:
+        """Read `columns` for the selected (_fragment, _row) pairs, keeping their order."""
+        fragment_ids = selected.column("_fragment").to_numpy()
+        rows = selected.column("_row").to_numpy()
+        pieces, positions = [], []
+        for number in np.unique(fragment_ids):
+            at = np.flatnonzero(fragment_ids == number)
+            part = fragments[number].to_table(columns=columns, schema=schema).take(pa.array(rows[at]))
+            pieces.append(part)
+            positions.append(at)
+        if not pieces:
+            return schema.empty_table().select(columns)
+        table = pa.concat_tables(pieces)
+        # Undo the grouping by file so rows come back in the caller's order
+        return table.take(pa.array(np.argsort(np.concatenate(positions), kind="stable")))
+
+    def get(self, property_id: str) -> Optional[PropertyRecord]:
+        dataset = self.dataset()
+        if dataset is None:
+            return None
+        table = self._latest(dataset.to_table(filter=ds.field("property_id") == property_id))
+        records = self.records(table)
+        return records[0] if records else None
+
+    @staticmethod
+    def records(table: pa.Table) -> List[PropertyRecord]:
+        """Turn query rows back into PropertyRecords."""
+        records = []
+        for row in table.to_pylist():
+            records.append(
+                PropertyRecord(
+                    property_id=row["property_id"],
+                    listing_id=row.get("listing_id"),
+                    url=row.get("url"),
+                    status=row.get("status"),
+                    list_price=row.get("list_price"),
+                    list_date=row["list_date"].isoformat() if row.get("list_date") else None,
+                    last_sold_price=row.get("last_sold_price"),
+                    last_sold_date=row["last_sold_date"].isoformat() if row.get("last_sold_date") else None,
+                    property_type=row.get("property_type"),
+                    beds=row.get("beds"),
+                    baths=row.get("baths"),
+                    sqft=row.get("sqft"),
+                    lot_sqft=row.get("lot_sqft"),
+                    year_built=row.get("year_built"),
+                    address=row.get("address"),
+                    city=row.get("city"),
+                    state=row.get("state"),
+                    postal_code=row.get(PARTITION_KEY),
+                    lat=row.get("lat"),
+                    lon=row.get("lon"),
+                    hoa_fee=row.get("hoa_fee"),
+                    property_tax_rate=row.get("property_tax_rate"),
+                    estimated_payment=row.get("estimated_payment"),
+                    remarks=row.get("remarks"),
+                    tax_history=tuple(TaxYear(t["year"], t["tax"], t["assessment"]) for t in row.get("tax_history") or ()),
+                    price_history=tuple(PriceEvent(e["date"], e["event"], e["price"]) for e in row.get("price_history") or ()),
+                )
+            )
+        return records
+
+    def __len__(self) -> int:
+        return self.query(columns=["property_id"]).num_rows
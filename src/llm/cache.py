@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# Completion kwargs that say where/how to call the model, not what it answers
+KEY_EXCLUDE = ("api_key", "api_base", "timeout", "num_retries", "metadata")
+
+
+def request_key(completion_kwargs: Dict[str, Any]) -> str:
+    """
+    Content address of a model call: SHA-256 of the canonical JSON of the
+    model id, messages, tools and sampling parameters.
+    """
+    payload = {k: v for k, v in completion_kwargs.items() if k not in KEY_EXCLUDE and v is not None}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+@dataclass
+class CachedCompletion:
+    key: str
+    model: str
+    message: Dict[str, Any]  # ChatMessage fields: role, content, tool_calls
+    input_tokens: int
+    output_tokens: int
+    latency: float  # seconds the original call took
+    created_at: float
+
+
+class LLMCache:
+    """
+    Persistent, content-addressed store of model responses in one SQLite file.
+
+    Responses are keyed by request_key() and stored zlib-compressed with
+    the token counts and latency of the call that produced them, so a hit
+    can report what it saved. When the stored responses grow past
+    `max_bytes`, the least recently used ones are evicted down to 90% of
+    the limit.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 2**20, clock=time.time):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0, "seconds_saved": 0.0, "tokens_saved": 0}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                message BLOB NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                latency REAL NOT NULL,
+                created_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+        self._db.commit()
+        self._bytes = self.stored_bytes()
+
+    def get(self, key: str) -> Optional[CachedCompletion]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT model, message, input_tokens, output_tokens, latency, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (self.clock(), key))
+            self._db.commit()
+        model, message, input_tokens, output_tokens, latency, created_at = row
+        entry = CachedCompletion(key, model, json.loads(zlib.decompress(message)), input_tokens, output_tokens, latency, created_at)
+        self.stats["hits"] += 1
+        self.stats["seconds_saved"] += latency
+        self.stats["tokens_saved"] += input_tokens + output_tokens
+        return entry
+
+    def put(self, entry: CachedCompletion):
+        blob = zlib.compress(json.dumps(entry.message, default=str).encode(), 6)
+        with self._lock:
+            old = self._db.execute("SELECT LENGTH(message) FROM responses WHERE key = ?", (entry.key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry.key, entry.model, blob, entry.input_tokens, entry.output_tokens, entry.latency, entry.created_at, self.clock()),
+            )
+            self._bytes += len(blob) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+            self._db.commit()
+        self.stats["stored"] += 1
+
+    def _evict(self, target: int):
+        # Oldest-used first, until the stored bytes are under `target`
+        evicted = []
+        for key, size in self._db.execute("SELECT key, LENGTH(message) FROM responses ORDER BY used_at").fetchall():
+            if self._bytes <= target:
+                break
+            evicted.append((key,))
+            self._bytes -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.stats["evicted"] += len(evicted)
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._bytes = 0
+
+    def stored_bytes(self) -> int:
+        """Total compressed size of the stored responses."""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(LENGTH(message)), 0) FROM responses").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
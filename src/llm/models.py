@@ -0,0 +1,196 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+from smolagents import LiteLLMModel, Tool
+from smolagents.models import ChatMessage
+
+from src import events
+from src.llm.cache import CachedCompletion, LLMCache, request_key
+from src.telemetry import metrics
+
+MODES = ("auto", "record", "replay", "off")
+
+REQUEST_SECONDS = metrics.histogram("llm_request_seconds", "Model calls, by model and cache outcome (hit, miss, record, off)")
+TOKENS = metrics.counter("llm_tokens_total", "Tokens per model, input or output, by cache outcome")
+COST = metrics.counter("llm_cost_usd_total", "Spend on model calls at litellm's list prices")
+COST_SAVED = metrics.counter("llm_cost_saved_usd_total", "List price of the calls answered from the cache")
+CACHE_LOOKUPS = metrics.counter("llm_cache_lookups_total", "Response cache lookups, by result")
+
+
+class CacheMissError(KeyError):
+    """A replay-mode call whose request was never recorded."""
+
+
+class CachedLiteLLMModel(LiteLLMModel):
+    """
+    LiteLLMModel that serves repeated requests from an LLMCache.
+
+    The key covers everything that shapes the answer (model id, the cleaned
+    messages, tool schemas, stop sequences and sampling kwargs), so only an
+    identical request is answered from the cache. Modes:
+
+    - "auto": read-through; misses call the model and are stored.
+    - "record": always call the model and overwrite the stored response.
+    - "replay": never call the model; a miss raises CacheMissError. Runs
+      the agents offline against responses recorded earlier.
+    - "off": plain LiteLLMModel.
+
+    Every call's latency, tokens and list-price cost are recorded in the
+    llm_* metrics, labelled with the cache outcome.
+
+    One instance serves every session and parallel branch at once, so a
+    call's outcome and token counts travel as return values, never through
+    attributes. last_input_token_count / last_output_token_count are still
+    set afterwards for smolagents' step monitor, which only logs them.
+    """
+
+    def __init__(self, *args, cache: Optional[LLMCache] = None, mode: str = "auto", **kwargs):
+        super().__init__(*args, **kwargs)
+        if mode not in MODES:
+            raise ValueError(f"unknown cache mode {mode!r}, expected one of {MODES}")
+        self.cache = cache
+        self.mode = mode if cache is not None else "off"
+
+    def __call__(
+        self,
+        messages: List[Dict[str, str]],
+        stop_sequences: Optional[List[str]] = None,
+        grammar: Optional[str] = None,
+        tools_to_call_from: Optional[List[Tool]] = None,
+        **kwargs,
+    ) -> ChatMessage:
+        outcome = self.mode if self.mode in ("off", "record") else "miss"
+        with metrics.span(None, REQUEST_SECONDS, model=self.model_id, cache=outcome) as span:
+            message, hit, input_tokens, output_tokens = self._cached_call(messages, stop_sequences, grammar, tools_to_call_from, **kwargs)
+            if hit:
+                span.labels["cache"] = outcome = "hit"
+        self._record_usage(outcome, input_tokens, output_tokens)
+        self.last_input_token_count, self.last_output_token_count = input_tokens, output_tokens
+        if hit:
+            self._served_from_cache(message)
+        return message
+
+    def _cached_call(self, messages, stop_sequences=None, grammar=None, tools_to_call_from=None, **kwargs) -> Tuple[ChatMessage, bool, int, int]:
+        """(message, cache hit, input tokens, output tokens) for one call."""
+        if self.mode == "off":
+            message, input_tokens, output_tokens = self._complete(messages, stop_sequences, grammar, tools_to_call_from, **kwargs)
+            return message, False, input_tokens, output_tokens
+
+        key = request_key(
+            self._prepare_completion_kwargs(
+                messages=messages,
+                stop_sequences=stop_sequences,
+                grammar=grammar,
+                tools_to_call_from=tools_to_call_from,
+                model=self.model_id,
+                convert_images_to_image_urls=True,
+                flatten_messages_as_text=self.flatten_messages_as_text,
+                custom_role_conversions=self.custom_role_conversions,
+                **kwargs,
+            )
+        )
+        if self.mode != "record":
+            cached = self.cache.get(key)
+            CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                return ChatMessage.from_dict(dict(cached.message)), True, cached.input_tokens, cached.output_tokens
+            if self.mode == "replay":
+                raise CacheMissError(f"no recorded response for this {self.model_id} request ({key[:12]})")
+
+        start = time.perf_counter()
+        message, input_tokens, output_tokens = self._complete(messages, stop_sequences, grammar, tools_to_call_from, **kwargs)
+        self.cache.put(
+            CachedCompletion(
+                key,
+                self.model_id,
+                {"role": message.role, "content": message.content, "tool_calls": _tool_calls(message)},
+                input_tokens,
+                output_tokens,
+                time.perf_counter() - start,
+                time.time(),
+            )
+        )
+        return message, False, input_tokens, output_tokens
+
+    def _record_usage(self, outcome: str, input_tokens: int, output_tokens: int):
+        TOKENS.inc(input_tokens, model=self.model_id, kind="input", cache=outcome)
+        TOKENS.inc(output_tokens, model=self.model_id, kind="output", cache=outcome)
+        (COST_SAVED if outcome == "hit" else COST).inc(completion_cost(self.model_id, input_tokens, output_tokens), model=self.model_id)
+
+    def _served_from_cache(self, message: ChatMessage):
+        """Hook for a call answered from the cache."""
+
+    def _complete(self, messages, stop_sequences=None, grammar=None, tools_to_call_from=None, **kwargs) -> Tuple[ChatMessage, int, int]:
+        """The actual model call, made on a cache miss: (message, input tokens, output tokens)."""
+        message = LiteLLMModel.__call__(self, messages, stop_sequences, grammar, tools_to_call_from, **kwargs)
+        # Read this call's usage from its own response; the instance attributes belong to whichever call set them last
+        usage = getattr(message.raw, "usage", None)
+        return message, (usage.prompt_tokens or 0) if usage else 0, (usage.completion_tokens or 0) if usage else 0
+
+
+class StreamingLiteLLMModel(CachedLiteLLMModel):
+    """
+    CachedLiteLLMModel that streams the completion while a request is being
+    served: every chunk is emitted as a "token" event to the current
+    EventSink (see src/events.py), so the UI can show the model's output
+    as it is written and measure time to first token. A cache hit is
+    emitted as one chunk. Outside a request, and for tool-calling requests,
+    it makes the usual non-streaming call.
+    """
+
+    def _served_from_cache(self, message: ChatMessage):
+        if message.content:
+            events.emit("token", text=message.content, cached=True)
+
+    def _complete(self, messages, stop_sequences=None, grammar=None, tools_to_call_from=None, **kwargs) -> Tuple[ChatMessage, int, int]:
+        if events.current() is None or tools_to_call_from:
+            return super()._complete(messages, stop_sequences, grammar, tools_to_call_from, **kwargs)
+        import litellm
+
+        completion_kwargs = self._prepare_completion_kwargs(
+            messages=messages,
+            stop_sequences=stop_sequences,
+            grammar=grammar,
+            model=self.model_id,
+            api_base=self.api_base,
+            api_key=self.api_key,
+            convert_images_to_image_urls=True,
+            flatten_messages_as_text=self.flatten_messages_as_text,
+            custom_role_conversions=self.custom_role_conversions,
+            **kwargs,
+        )
+        parts, usage = [], None
+        for chunk in litellm.completion(**completion_kwargs, stream=True, stream_options={"include_usage": True}):
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                parts.append(text)
+                events.emit("token", text=text)
+            usage = getattr(chunk, "usage", None) or usage
+        message = ChatMessage(role="assistant", content="".join(parts))
+        return message, (usage.prompt_tokens or 0) if usage else 0, (usage.completion_tokens or 0) if usage else 0
+
+
+_UNPRICED = set()
+
+
+def completion_cost(model_id: str, input_tokens: int, output_tokens: int) -> float:
+    """USD for one call at litellm's list prices; 0 for a model it has no price for."""
+    if not (input_tokens or output_tokens) or model_id in _UNPRICED:
+        return 0.0
+    import litellm
+
+    try:
+        input_cost, output_cost = litellm.cost_per_token(model=model_id, prompt_tokens=input_tokens, completion_tokens=output_tokens)
+    except Exception:  # litellm raises a bare Exception for unmapped models
+        _UNPRICED.add(model_id)
+        return 0.0
+    return input_cost + output_cost
+
+
+def _tool_calls(message: ChatMessage) -> Optional[list]:
+    if not message.tool_calls:
+        return None
+    return [
+        {"id": call.id, "type": call.type, "function": {"name": call.function.name, "arguments": call.function.arguments}}
+        for call in message.tool_calls
+    ]
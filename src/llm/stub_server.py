@@ -0,0 +1,141 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def default_script(messages: List[dict]) -> str:
+    return "Thought: I have what I need.\nCode:\n```py\nfinal_answer('done')\n```<end_code>"
+
+
+class StubLLMServer:
+    """
+    Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+    `script(messages)` decides each reply. Replies are sent as a whole or,
+    with `stream: true`, as server-sent events one word at a time: the first
+    after `first_token_latency` seconds, then `tokens_per_second`. Stop
+    sequences are honoured. Like FixtureServer, it records requests and the
+    peak number in flight, so harnesses can drive the agents end to end
+    without network access or an API key:
+
+        with StubLLMServer(script, first_token_latency=0.4) as server:
+            model = LiteLLMModel("openai/stub", api_base=server.base_url, api_key="stub")
+    """
+
+    def __init__(
+        self,
+        script: Callable[[List[dict]], str] = default_script,
+        first_token_latency: float = 0.0,
+        tokens_per_second: float = 0.0,
+        host: str = "127.0.0.1",
+    ):
+        self.script = script
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.host = host
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self._server.server_address[1]}/v1"
+
+    def reply(self, request: dict) -> str:
+        text = self.script(request.get("messages", []))
+        stops = request.get("stop") or []
+        for stop in [stops] if isinstance(stops, str) else stops:
+            if stop in text:
+                text = text[: text.index(stop)]
+        return text
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            request = json.loads(handler.rfile.read(int(handler.headers.get("content-length", 0))) or b"{}")
+            text = self.reply(request)
+            model = request.get("model", "stub")
+            words = TOKEN.findall(text)
+            usage = {"prompt_tokens": sum(len(str(m.get("content", ""))) // 4 for m in request.get("messages", [])), "completion_tokens": len(words)}
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            time.sleep(self.first_token_latency)
+            if not request.get("stream"):
+                if self.tokens_per_second:
+                    time.sleep(len(words) / self.tokens_per_second)
+                body = {
+                    "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                    "usage": usage,
+                }
+                self._send(handler, json.dumps(body).encode(), "application/json")
+                return
+
+            handler.send_response(200)
+            handler.send_header("content-type", "text/event-stream")
+            handler.send_header("connection", "close")
+            handler.end_headers()
+            handler.close_connection = True
+
+            def event(choices, **extra):
+                chunk = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model, "choices": choices, **extra}
+                handler.wfile.write(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+                handler.wfile.flush()
+
+            for i, word in enumerate(words):
+                if i and self.tokens_per_second:
+                    time.sleep(1 / self.tokens_per_second)
+                event([{"index": 0, "delta": {"role": "assistant", "content": word}, "finish_reason": None}])
+            event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            event([], usage=usage)
+            handler.wfile.write(b"data: [DONE]\n\n")
+            handler.wfile.flush()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def _send(handler, body: bytes, content_type: str):
+        handler.send_response(200)
+        handler.send_header("content-type", content_type)
+        handler.send_header("content-length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self) -> "StubLLMServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="stub-llm-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,158 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from src.retrieval.index_store import tokenize
+from src.retrieval.partitions import Partitions, Runs
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index.
+
+    Term weights are precomputed into a CSC matrix (documents x terms), so a
+    column is exactly the posting list of one term. Scoring a query only
+    reads the postings of its terms and accumulates them with NumPy; top-k
+    uses argpartition over the matched documents. Parameters and idf
+    smoothing follow rank_bm25.BM25Okapi, which BM25Retriever uses, so
+    rankings are the same as the langchain retriever's.
+    """
+
+    def __init__(self, term_frequencies: Sequence[Dict[str, int]], k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1, self.b, self.epsilon = k1, b, epsilon
+        self.vocabulary: Dict[str, int] = {}
+        rows, cols, counts = [], [], []
+        for doc_id, tf in enumerate(term_frequencies):
+            for term, count in tf.items():
+                rows.append(doc_id)
+                cols.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                counts.append(count)
+
+        self.n_docs = len(term_frequencies)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        tf = np.asarray(counts, dtype=np.float64)
+        self.doc_len = np.bincount(rows, weights=tf, minlength=self.n_docs)
+        self.avgdl = self.doc_len.sum() / self.n_docs if self.n_docs else 0.0
+
+        df = np.bincount(cols, minlength=len(self.vocabulary)).astype(np.float64)
+        idf = np.log(self.n_docs - df + 0.5) - np.log(df + 0.5)
+        self.average_idf = idf.sum() / len(idf) if len(idf) else 0.0
+        idf[idf < 0] = self.epsilon * self.average_idf
+        self.idf = idf
+
+        norm = k1 * (1 - b + b * self.doc_len[rows] / (self.avgdl or 1.0))
+        weights = idf[cols] * (tf * (k1 + 1) / (tf + norm))
+        self.weights = sparse.csc_matrix((weights, (rows, cols)), shape=(self.n_docs, len(self.vocabulary)))
+        self.weights.sort_indices()
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str], **kwargs) -> "BM25Index":
+        return cls([Counter(tokenize(text)) for text in texts], **kwargs)
+
+    def postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(doc ids, weights) of one term, doc ids ascending."""
+        start, end = self.weights.indptr[term_id], self.weights.indptr[term_id + 1]
+        return self.weights.indices[start:end], self.weights.data[start:end]
+
+    def score(self, query: str, runs: Optional[Runs] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Matched doc ids and their BM25 scores; unmatched docs score 0.
+        With `runs`, only postings inside those [start, end) doc ranges are read.
+        """
+        counts = Counter(tokenize(query))
+        doc_parts, weight_parts = [], []
+        for term, count in counts.items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            docs, weights = self.postings(term_id)
+            if runs is None:
+                doc_parts.append(docs)
+                weight_parts.append(weights * count)
+                continue
+            for start, end in runs:
+                lo, hi = np.searchsorted(docs, (start, end))
+                doc_parts.append(docs[lo:hi])
+                weight_parts.append(weights[lo:hi] * count)
+        if not doc_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        doc_ids, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        return doc_ids, np.bincount(inverse, weights=np.concatenate(weight_parts))
+
+    def score_many(self, queries: Sequence[str], runs: Optional[Runs] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Score several queries in one pass: the columns of their terms are
+        sliced out once and multiplied by a sparse (terms x queries) count
+        matrix, giving each query's matched doc ids and scores.
+        """
+        term_ids: Dict[int, int] = {}
+        rows, cols, counts = [], [], []
+        for j, query in enumerate(queries):
+            for term, count in Counter(tokenize(query)).items():
+                term_id = self.vocabulary.get(term)
+                if term_id is None:
+                    continue
+                rows.append(term_ids.setdefault(term_id, len(term_ids)))
+                cols.append(j)
+                counts.append(count)
+        empty = (np.empty(0, dtype=np.int64), np.empty(0))
+        if not term_ids:
+            return [empty for _ in queries]
+        query_matrix = sparse.csc_matrix((counts, (rows, cols)), shape=(len(term_ids), len(queries)))
+        scores = (self.weights[:, list(term_ids)] @ query_matrix).tocsc()
+        scores.sort_indices()
+        starts = ends = None
+        if runs is not None:
+            starts = np.array([start for start, _ in runs])
+            ends = np.array([end for _, end in runs])
+        results = []
+        for j in range(len(queries)):
+            lo, hi = scores.indptr[j], scores.indptr[j + 1]
+            doc_ids, values = scores.indices[lo:hi].astype(np.int64), scores.data[lo:hi]
+            if starts is not None:
+                run = np.searchsorted(starts, doc_ids, side="right") - 1
+                inside = (run >= 0) & (doc_ids < ends[np.maximum(run, 0)])
+                doc_ids, values = doc_ids[inside], values[inside]
+            results.append((doc_ids, values))
+        return results
+
+    def search_many(self, queries: Sequence[str], k: int = 5, runs: Optional[Runs] = None) -> List[List[Tuple[int, float]]]:
+        """`search` for a batch of queries, scored together."""
+        candidates = None if runs is None else Partitions.doc_ids(runs)
+        return [self.top_k(doc_ids, scores, k, candidates) for doc_ids, scores in self.score_many(queries, runs)]
+
+    def search(self, query: str, k: int = 5, runs: Optional[Runs] = None) -> List[Tuple[int, float]]:
+        """Top-k (doc id, score) pairs, best first, optionally within `runs`."""
+        doc_ids, scores = self.score(query, runs)
+        candidates = None if runs is None else Partitions.doc_ids(runs)
+        return self.top_k(doc_ids, scores, k, candidates)
+
+    def top_k(self, doc_ids: np.ndarray, scores: np.ndarray, k: int, candidates: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Select the best k of the matched documents.
+
+        Ties and padding follow BM25Retriever (reversed argsort): equal
+        scores go to the higher doc id first, and when fewer than k docs
+        match, zero-score docs are appended from the end of `candidates`
+        (all docs by default).
+        """
+        if len(doc_ids) > k:
+            threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            keep = np.flatnonzero(scores > threshold)
+            tied = np.flatnonzero(scores == threshold)
+            keep = np.concatenate([keep, tied[np.argsort(-doc_ids[tied], kind="stable")[: k - len(keep)]]])
+            doc_ids, scores = doc_ids[keep], scores[keep]
+        order = np.lexsort((-doc_ids, -scores))
+        hits = [(int(doc_ids[i]), float(scores[i])) for i in order]
+        if len(hits) < k:
+            matched = set(doc_ids.tolist())
+            pool = range(self.n_docs - 1, -1, -1) if candidates is None else candidates[::-1]
+            for doc_id in pool:
+                if len(hits) >= k:
+                    break
+                if int(doc_id) not in matched:
+                    hits.append((int(doc_id), 0.0))
+        return hits
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from src.retrieval.index_store import tokenize
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query for cache lookups: its whitespace-separated
+    terms, rejoined with single spaces. Case, stopwords, punctuation and
+    term order are kept, since the BM25 and LSA scorers see all of them;
+    only queries that rank identically share a key.
+    """
+    return " ".join(tokenize(query))
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with a TTL for retrieval results.
+
+    Entries belong to one index version; the first lookup with a different
+    version drops everything, so a rebuilt index never serves stale hits.
+    Counters are kept for sizing: hits, misses, evictions (LRU), expirations
+    (TTL) and invalidations (version changes).
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: Optional[float] = 3600.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.version: Optional[str] = None
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    @staticmethod
+    def key(query: str, **params) -> Hashable:
+        """Normalized query plus the parameters that change the result (k, filters, mode)."""
+        return (normalize_query(query),) + tuple(sorted(params.items()))
+
+    def get(self, key: Hashable, version: Optional[str] = None) -> Optional[Any]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and self.clock() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: Optional[str] = None):
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _check_version(self, version: Optional[str]):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "version": self.version,
+            }
+
+    def __len__(self):
+        return len(self._entries)
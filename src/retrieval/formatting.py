@@ -0,0 +1,193 @@
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from langchain.docstore.document import Document
+
+# gpt-4o's tokenizer; override with RAG_TOKEN_ENCODING for other models
+DEFAULT_ENCODING = os.environ.get("RAG_TOKEN_ENCODING", "o200k_base")
+
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken. tiktoken downloads its BPE files on first
+    use; when that is not possible (offline, sandboxed) it falls back to the
+    usual ~4 characters per token estimate instead of failing the tool call.
+    """
+
+    def __init__(self, encoding: str = DEFAULT_ENCODING):
+        self.encoding_name = encoding
+        self._encoding = None
+        self._loaded = False
+
+    @property
+    def encoding(self):
+        if not self._loaded:
+            self._loaded = True
+            try:
+                import tiktoken
+
+                self._encoding = tiktoken.get_encoding(self.encoding_name)
+            except Exception as e:
+                print(f"tiktoken encoding {self.encoding_name} unavailable ({type(e).__name__}), estimating tokens")
+        return self._encoding
+
+    @property
+    def exact(self) -> bool:
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+        return text[: max_tokens * 4]
+
+
+@dataclass
+class Passage:
+    """A run of merged chunks from one page: file, page and character span."""
+
+    source: str
+    page: object
+    start: Optional[int]
+    end: Optional[int]
+    text: str
+    rank: int
+    chunks: int = 1
+
+    @property
+    def filename(self) -> str:
+        return self.source.split("/")[-1]
+
+    @property
+    def key(self) -> Tuple:
+        return (self.source, self.page, self.start, self.end)
+
+    def header(self) -> str:
+        span = f" | chars {self.start}-{self.end}" if self.start is not None else ""
+        return f"{self.filename} | page {self.page}{span}"
+
+
+def merge_chunks(docs: Sequence["Document"]) -> List[Passage]:
+    """
+    Merge retrieved chunks that overlap or touch on the same page.
+
+    The splitter's `start_index` gives each chunk's offset in its page, so
+    the 200-character overlap between neighbours can be cut exactly. Merged
+    passages keep the best rank of their chunks and are returned best first.
+    """
+    by_page: Dict[Tuple, List[Passage]] = {}
+    for rank, doc in enumerate(docs, 1):
+        start = doc.metadata.get("start_index")
+        text = doc.page_content
+        if start is None or start < 0:
+            start = end = None
+        else:
+            end = start + len(text)
+        passage = Passage(doc.metadata.get("source", ""), doc.metadata.get("page", "N/A"), start, end, text, rank)
+        by_page.setdefault((passage.source, passage.page), []).append(passage)
+
+    merged = []
+    for passages in by_page.values():
+        spans = sorted((p for p in passages if p.start is not None), key=lambda p: p.start)
+        merged.extend(p for p in passages if p.start is None)
+        current = None
+        for p in spans:
+            if current is None or p.start > current.end:
+                current = Passage(p.source, p.page, p.start, p.end, p.text, p.rank)
+                merged.append(current)
+                continue
+            if p.end > current.end:
+                current.text += p.text[current.end - p.start:]
+                current.end = p.end
+            current.rank = min(current.rank, p.rank)
+            current.chunks += 1
+    return sorted(merged, key=lambda p: p.rank)
+
+
+@dataclass
+class FormatStats:
+    chunks: int = 0
+    passages: int = 0
+    raw_tokens: int = 0  # what the five full chunks would have cost
+    tokens: int = 0  # passage text actually returned
+    truncated: int = 0  # passages cut or dropped by the budget
+    exact: bool = True
+
+    @property
+    def saved(self) -> int:
+        return self.raw_tokens - self.tokens
+
+
+@dataclass
+class FormattedResult:
+    text: str
+    stats: FormatStats
+    passages: List[Passage] = field(default_factory=list)
+
+
+class ResultFormatter:
+    """
+    Renders retriever hits as compact, de-duplicated passages under a token
+    budget. `format` takes one or more (title, docs) groups so batched
+    searches share the budget (split evenly, unused share carried forward)
+    and never repeat a passage.
+    """
+
+    def __init__(self, token_budget: int = 1500, counter: Optional[TokenCounter] = None, min_tail_tokens: int = 40):
+        self.token_budget = token_budget
+        self.counter = counter or TokenCounter()
+        self.min_tail_tokens = min_tail_tokens
+
+    def format(self, groups: Sequence[Tuple[Optional[str], Sequence["Document"]]], heading: str = "Relevant Documents Found") -> FormattedResult:
+        stats = FormatStats(exact=self.counter.exact)
+        remaining = self.token_budget
+        shown: Dict[Tuple, str] = {}
+        all_passages = []
+        lines = []
+        for group_num, (title, docs) in enumerate(groups):
+            # Each group gets an even share of what is left, so later queries are not starved
+            allowance = remaining // (len(groups) - group_num)
+            stats.chunks += len(docs)
+            stats.raw_tokens += sum(self.counter.count(doc.page_content.strip()) for doc in docs)
+            if title is not None:
+                lines.append(f"\n--- {title} ---")
+            for passage in merge_chunks(docs):
+                label = f"[{len(all_passages) + 1}]"
+                if passage.key in shown:
+                    lines.append(f"\n{shown[passage.key]} (repeated) {passage.header()}")
+                    continue
+                text = passage.text.strip()
+                tokens = self.counter.count(text)
+                if tokens > allowance:
+                    stats.truncated += 1
+                    if allowance < self.min_tail_tokens:
+                        continue
+                    text = self.counter.truncate(text, allowance) + " [...]"
+                    tokens = self.counter.count(text)
+                allowance -= tokens
+                remaining -= tokens
+                stats.tokens += tokens
+                shown[passage.key] = label
+                passage.text = text
+                all_passages.append(passage)
+                lines.append(f"\n{label} {passage.header()}\n{text}")
+        stats.passages = len(all_passages)
+
+        approx = "" if stats.exact else "~"
+        footer = (
+            f"\n({stats.chunks} chunks -> {stats.passages} passages, {approx}{stats.tokens} tokens, "
+            f"{approx}{stats.saved} tokens saved"
+            + (f", {stats.truncated} cut by the {self.token_budget}-token budget" if stats.truncated else "")
+            + ")"
+        )
+        text = f"\n{heading}:\n" + "\n".join(lines) + "\n" + footer + "\n"
+        return FormattedResult(text, stats, all_passages)
@@ -0,0 +1,16 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """
+    Merge ranked doc id lists with RRF: score(d) = sum 1 / (k + rank).
+
+    Ranks start at 1. Only ranks are used, so the BM25 and cosine scores
+    never need to be put on the same scale.
+    """
+    scores: Dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
@@ -0,0 +1,168 @@
+import hashlib
+import os
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List
+
+import orjson
+
+if TYPE_CHECKING:
+    from langchain.docstore.document import Document
+
+# Bump whenever the on-disk layout changes; older files are rebuilt from scratch.
+FORMAT_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Same whitespace tokenization BM25Retriever uses by default."""
+    return text.split()
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PersistentIndex:
+    """
+    On-disk chunk index for the form corpus.
+
+    Every source file is stored with its content hash, its split chunks
+    (text + metadata) and per-chunk term frequencies, so the BM25 index can
+    be built without re-tokenizing anything (it derives document
+    frequencies and lengths from these counts). `sync` only re-extracts
+    files whose hash changed; a file that was only touched is re-hashed
+    once and its new size and mtime are saved with the next save().
+    """
+
+    def __init__(self, path: str, splitter_config: dict):
+        self.path = Path(path)
+        self.splitter_config = splitter_config
+        self.files: Dict[str, dict] = {}
+
+    @classmethod
+    def open(cls, path: str, splitter_config: dict) -> "PersistentIndex":
+        """Load the index at `path`, or start an empty one if it is missing or stale."""
+        index = cls(path, splitter_config)
+        if not index.path.exists():
+            return index
+        try:
+            data = orjson.loads(index.path.read_bytes())
+        except (OSError, orjson.JSONDecodeError) as e:
+            print(f"Ignoring unreadable index {index.path}: {e}")
+            return index
+        if data.get("format_version") != FORMAT_VERSION or data.get("splitter") != splitter_config:
+            print(f"Index {index.path} was built with different settings, rebuilding")
+            return index
+        index.files = data["files"]
+        return index
+
+    @property
+    def version(self) -> str:
+        """Content hash of the whole corpus; changes whenever any file or setting does."""
+        digest = hashlib.sha256()
+        digest.update(orjson.dumps({"format_version": FORMAT_VERSION, "splitter": self.splitter_config}, option=orjson.OPT_SORT_KEYS))
+        for name in sorted(self.files):
+            digest.update(f"{name}:{self.files[name]['sha256']}\n".encode())
+        return digest.hexdigest()[:16]
+
+    def sync(
+        self,
+        source_dir: str,
+        extract: Callable[[List[str]], Dict[str, List["Document"]]],
+        glob: str = "*.pdf",
+    ) -> Dict[str, List[str]]:
+        """
+        Bring the index in line with the files under `source_dir`.
+
+        `extract` receives the paths that need (re-)processing and returns
+        their split chunks keyed by path. Unchanged files are never touched.
+        Returns the added/updated/removed file names, and the "touched" ones
+        whose content is unchanged but whose stat fingerprint was refreshed;
+        any of them means the index should be saved.
+        """
+        root = Path(source_dir)
+        current = {str(p.relative_to(root)): p for p in sorted(root.rglob(glob)) if p.is_file()}
+        changes = {"added": [], "updated": [], "removed": [], "touched": []}
+
+        for name in list(self.files):
+            if name not in current:
+                self._remove_file(name)
+                changes["removed"].append(name)
+
+        stale = {}
+        for name, p in current.items():
+            entry = self.files.get(name)
+            stat = p.stat()
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+            sha = file_sha256(str(p))
+            if entry and entry["sha256"] == sha:
+                # Touched but not modified; just refresh the stat fingerprint.
+                entry["size"], entry["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+                changes["touched"].append(name)
+                continue
+            stale[name] = (p, sha, stat)
+
+        if stale:
+            chunks_by_path = extract([str(p) for p, _, _ in stale.values()])
+            for name, (p, sha, stat) in stale.items():
+                changes["updated" if name in self.files else "added"].append(name)
+                self._remove_file(name)
+                self._add_file(name, sha, stat, chunks_by_path.get(str(p), []))
+
+        if any(changes.values()):
+            # Keep files in sorted order so chunk ids are stable across rebuilds.
+            self.files = {name: self.files[name] for name in sorted(self.files)}
+        return changes
+
+    def _add_file(self, name: str, sha: str, stat: os.stat_result, chunks: Iterable["Document"]):
+        stored = []
+        for chunk in chunks:
+            tf = Counter(tokenize(chunk.page_content))
+            stored.append({"page_content": chunk.page_content, "metadata": chunk.metadata, "tf": tf})
+        self.files[name] = {"sha256": sha, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "chunks": stored}
+
+    def _remove_file(self, name: str):
+        self.files.pop(name, None)
+
+    def save(self):
+        """Atomically write the index next to its final location."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "format_version": FORMAT_VERSION,
+            "version": self.version,
+            "splitter": self.splitter_config,
+            "files": self.files,
+        }
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_bytes(orjson.dumps(payload))
+        os.replace(tmp, self.path)
+
+    def documents(self) -> List["Document"]:
+        """All chunks in index order, as langchain Documents."""
+        from langchain.docstore.document import Document
+
+        return [
+            Document(page_content=c["page_content"], metadata=c["metadata"])
+            for entry in self.files.values()
+            for c in entry["chunks"]
+        ]
+
+    def text(self, name: str) -> str:
+        """A file's page text, stitched back together from its overlapping chunks."""
+        pages: Dict[int, str] = {}
+        for c in self.files[name]["chunks"]:
+            page, start = c["metadata"].get("page", 0), c["metadata"].get("start_index", 0)
+            pages[page] = pages.get(page, "")[:start].ljust(start) + c["page_content"]
+        return "\n".join(pages[page] for page in sorted(pages))
+
+    def term_frequencies(self) -> List[Dict[str, int]]:
+        """Per-chunk term counts, aligned with `documents()`."""
+        return [c["tf"] for entry in self.files.values() for c in entry["chunks"]]
+
+    def __len__(self):
+        return sum(len(entry["chunks"]) for entry in self.files.values())
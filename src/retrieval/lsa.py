@@ -0,0 +1,83 @@
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from src.retrieval.partitions import Partitions, Runs
+
+
+class LSAIndex:
+    """
+    Latent semantic vectors (TF-IDF + TruncatedSVD) for every chunk.
+
+    Chunk vectors are L2-normalized and stored as one C-contiguous float32
+    matrix, so a query is a single matrix-vector product. Everything is fit
+    locally with scikit-learn; nothing is downloaded.
+    """
+
+    def __init__(self, texts: Sequence[str], n_components: int = 128, random_state: int = 0):
+        self.vectorizer = TfidfVectorizer(sublinear_tf=True, stop_words="english", ngram_range=(1, 2), dtype=np.float32)
+        tfidf = self.vectorizer.fit_transform(texts)
+        n_components = max(1, min(n_components, tfidf.shape[0] - 1, tfidf.shape[1] - 1))
+        self.svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+        vectors = self.svd.fit_transform(tfidf)
+        self.vectors = np.ascontiguousarray(normalize(vectors), dtype=np.float32)
+        self.version = None
+
+    @classmethod
+    def load_or_build(cls, path: str, version: str, texts: Sequence[str], **kwargs) -> "LSAIndex":
+        """Reuse the model saved for this corpus version, fitting a new one otherwise."""
+        path = Path(path)
+        if path.exists():
+            try:
+                index = joblib.load(path)
+                if index.version == version:
+                    return index
+            except Exception as e:
+                print(f"Ignoring unreadable LSA index {path}: {e}")
+        index = cls(texts, **kwargs)
+        index.version = version
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        joblib.dump(index, tmp)
+        os.replace(tmp, path)
+        return index
+
+    def embed(self, query: str) -> np.ndarray:
+        vector = self.svd.transform(self.vectorizer.transform([query]))[0]
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).astype(np.float32)
+
+    def embed_many(self, queries: Sequence[str]) -> np.ndarray:
+        """(queries x components) float32 matrix of unit query vectors."""
+        vectors = self.svd.transform(self.vectorizer.transform(queries))
+        return np.ascontiguousarray(normalize(vectors), dtype=np.float32)
+
+    def search(self, query: str, k: int = 5, runs: Optional[Runs] = None) -> List[Tuple[int, float]]:
+        """Top-k (doc id, cosine similarity) pairs, best first, optionally within `runs`."""
+        return self._top_k(self._scores(self.embed(query), runs), k, runs)
+
+    def search_many(self, queries: Sequence[str], k: int = 5, runs: Optional[Runs] = None) -> List[List[Tuple[int, float]]]:
+        """`search` for a batch of queries with one matrix-matrix product."""
+        scores = self._scores(self.embed_many(queries).T, runs)
+        return [self._top_k(scores[:, j], k, runs) for j in range(len(queries))]
+
+    def _scores(self, q: np.ndarray, runs: Optional[Runs]) -> np.ndarray:
+        if runs is None:
+            return self.vectors @ q
+        # Row slices are views, so each partition is still one product
+        return np.concatenate([self.vectors[start:end] @ q for start, end in runs])
+
+    def _top_k(self, scores: np.ndarray, k: int, runs: Optional[Runs]) -> List[Tuple[int, float]]:
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        ids = top if runs is None else Partitions.doc_ids(runs)[top]
+        return [(int(i), float(scores[j])) for i, j in zip(ids, top)]
@@ -0,0 +1,102 @@
+import os
+import re
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from langchain.docstore.document import Document
+
+_FORM_ID = re.compile(r"^(\d+[A-Za-z]?)(?:_|\.|$)")
+
+PSA_FORMS = frozenset({"20", "21", "25", "28"})
+
+FAMILY_DESCRIPTIONS = {
+    "psa": "purchase and sale agreements (20, 21, 25, 28)",
+    "22x": "22-series addenda (financing, seller financing, optional clauses, FIRPTA, title)",
+    "35x": "35-series contingencies (inspection, escalation, feasibility, neighborhood review)",
+    "other": "other forms (e.g. 34 blank addendum)",
+}
+
+Runs = Tuple[Tuple[int, int], ...]
+
+
+def form_id(source: str) -> Optional[str]:
+    """'reator_agent_docs/22A_Financing.pdf' -> '22A'."""
+    match = _FORM_ID.match(os.path.basename(source or ""))
+    return match.group(1).upper() if match else None
+
+
+def form_family(fid: str) -> str:
+    if fid in PSA_FORMS:
+        return "psa"
+    if fid.startswith("22"):
+        return "22x"
+    if fid.startswith("35"):
+        return "35x"
+    return "other"
+
+
+def _runs(doc_ids: Sequence[int]) -> Runs:
+    """Collapse sorted doc ids into half-open [start, end) runs."""
+    runs = []
+    for doc_id in doc_ids:
+        if runs and runs[-1][1] == doc_id:
+            runs[-1][1] = doc_id + 1
+        else:
+            runs.append([doc_id, doc_id + 1])
+    return tuple((start, end) for start, end in runs)
+
+
+class Partitions:
+    """
+    Per-form and per-family sub-indexes over the chunk list.
+
+    A partition is stored as runs of consecutive chunk ids. The persistent
+    index keeps each file's chunks together, so every form is a single run
+    and a family is at most a handful. Scorers use the runs to slice
+    posting lists and vector rows instead of filtering the whole corpus.
+    """
+
+    def __init__(self, docs: Sequence["Document"]):
+        members: Dict[str, List[int]] = {}
+        for doc_id, doc in enumerate(docs):
+            fid = form_id(doc.metadata.get("source", ""))
+            if fid is None:
+                continue
+            members.setdefault(fid, []).append(doc_id)
+            members.setdefault(form_family(fid), []).append(doc_id)
+        self.runs: Dict[str, Runs] = {name: _runs(ids) for name, ids in members.items()}
+
+    def names(self) -> List[str]:
+        return sorted(self.runs)
+
+    def resolve(self, spec: Union[str, Iterable[str], None]) -> Optional[Runs]:
+        """
+        Turn a filter into chunk runs. Accepts form ids ('22A', '22A_',
+        '22A_Financing.pdf'), family names ('psa', '22x', '35x') or several
+        of them (list or comma-separated). None/empty means no filter.
+        """
+        if not spec:
+            return None
+        parts = spec.split(",") if isinstance(spec, str) else list(spec)
+        selected = []
+        for part in parts:
+            part = part.strip()
+            if not part:
+                continue
+            name = part.lower() if part.lower() in FAMILY_DESCRIPTIONS else form_id(part)
+            if name not in self.runs:
+                raise ValueError(f"Unknown document_type {part!r}. Use a form id or one of: {', '.join(self.names())}")
+            selected.extend(self.runs[name])
+        merged = []
+        for start, end in sorted(selected):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return tuple((start, end) for start, end in merged) or None
+
+    @staticmethod
+    def doc_ids(runs: Runs) -> np.ndarray:
+        return np.concatenate([np.arange(start, end) for start, end in runs])
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+from typing import Callable, List, Optional, Sequence
+
+import httpx
+
+from src.scraping.http_cache import ResponseCache
+from src.scraping.throttle import FetchScheduler
+from src.telemetry import metrics
+
+# Browser-like headers to avoid instant blocking
+BASE_HEADERS = {
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
+    "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8",
+    "accept-language": "en-US;en;q=0.9",
+    "accept-encoding": "gzip, deflate, br",
+}
+
+FETCH_SECONDS = metrics.histogram("scrape_fetch_seconds", "Page fetches incl. retries, by source (network, hit, revalidated, stale) and status")
+CACHE_LOOKUPS = metrics.counter("scrape_cache_lookups_total", "Page cache lookups, by result (hit, revalidated, stale, miss)")
+
+
+class AsyncScraper:
+    """
+    Concurrent page fetcher on one shared httpx.AsyncClient.
+
+    The client (and its connection pool) lives on a private event loop in a
+    daemon thread, so it survives between tool calls and can be used from
+    sync code, including code that already runs inside an event loop.
+    Requests go through a FetchScheduler: `per_host_concurrency` is the
+    ceiling of each host's adaptive limit, and throttled responses are
+    retried with backoff. Results always come back in the order of the
+    input URLs.
+
+    With a ResponseCache, fresh pages are served from disk, stale ones are
+    revalidated conditionally, and a stale page is still returned if the
+    site cannot be reached.
+    """
+
+    def __init__(
+        self,
+        per_host_concurrency: int = 4,
+        max_connections: int = 20,
+        timeout: float = 30.0,
+        http2: bool = True,
+        headers: Optional[dict] = None,
+        scheduler: Optional[FetchScheduler] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.per_host_concurrency = per_host_concurrency
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.http2 = http2
+        self.headers = headers or BASE_HEADERS
+        self.scheduler = scheduler or FetchScheduler(max_concurrency=per_host_concurrency)
+        self.cache = cache
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _client_for_loop(self) -> httpx.AsyncClient:
+        if self._client is None:
+            try:
+                self._client = self._make_client(self.http2)
+            except ImportError:
+                # http2=True needs the `h2` package; plain HTTP/1.1 still works
+                print("h2 is not installed, falling back to HTTP/1.1")
+                self._client = self._make_client(False)
+        return self._client
+
+    def _make_client(self, http2: bool) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=http2,
+            headers=self.headers,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+        )
+
+    async def fetch(self, url: str) -> Optional[httpx.Response]:
+        """GET one URL; network errors are reported and returned as None."""
+        with metrics.span(None, FETCH_SECONDS) as span:
+            response = await self._fetch(url)
+            source = response.headers.get("x-cache", "network") if response is not None else "none"
+            span.labels.update(source=source, code=response.status_code if response is not None else "error")
+        if self.cache is not None:
+            CACHE_LOOKUPS.inc(result="miss" if source in ("network", "none") else source)
+        return response
+
+    async def _fetch(self, url: str) -> Optional[httpx.Response]:
+        cache = self.cache
+        cached = cache.get(url) if cache is not None else None
+        if cache is not None and (cache.offline or (cached is not None and cached.fresh(cache.clock()))):
+            if cached is None:
+                cache.stats["misses"] += 1
+                print(f"|not in the offline cache: {url}")
+                return None
+            cache.stats["hits"] += 1
+            return cached.to_response(url)
+        if cache is not None:
+            cache.stats["misses"] += 1
+
+        try:
+            response = await self.scheduler.fetch(self._client_for_loop(), url, headers=cached.validators() if cached else None)
+        except httpx.HTTPError as e:
+            print(f"|can't fetch {url}: {type(e).__name__}: {e}")
+            response = None
+
+        if cached is not None:
+            if response is not None and response.status_code == 304:
+                return cache.refresh(cached, response).to_response(url, "revalidated")
+            if response is None or response.status_code >= 500 or response.status_code in (403, 429):
+                # Better an hour-old listing than none while the site is throttling us
+                cache.stats["stale_served"] += 1
+                return cached.to_response(url, "stale")
+        if cache is not None and response is not None and response.status_code == 200:
+            cache.put(url, response)
+        return response
+
+    async def fetch_all(self, urls: Sequence[str], on_result: Optional[Callable[[str, Optional[httpx.Response]], None]] = None) -> List[Optional[httpx.Response]]:
+        """Fetch concurrently; the result list lines up with `urls`. `on_result` is called as each page arrives."""
+        if on_result is None:
+            return list(await asyncio.gather(*(self.fetch(url) for url in urls)))
+
+        async def fetch_and_report(url):
+            response = await self.fetch(url)
+            on_result(url, response)
+            return response
+
+        return list(await asyncio.gather(*(fetch_and_report(url) for url in urls)))
+
+    # -- sync bridge ----------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="scraper-loop", daemon=True).start()
+        return self._loop
+
+    def run(self, coro):
+        """Run a coroutine on the scraper's loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    def fetch_all_sync(self, urls: Sequence[str], on_result: Optional[Callable[[str, Optional[httpx.Response]], None]] = None) -> List[Optional[httpx.Response]]:
+        return self.run(self.fetch_all(urls, on_result))
+
+    def warm(self) -> "AsyncScraper":
+        """Start the loop thread and create the client now rather than on the first fetch."""
+
+        async def create():
+            self._client_for_loop()
+
+        self.run(create())
+        return self
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self._client is not None:
+            self.run(self._client.aclose())
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        self.scheduler.hosts = {}  # their asyncio primitives belonged to the old loop
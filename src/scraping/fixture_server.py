@@ -0,0 +1,140 @@
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class FixtureServer:
+    """
+    Local stand-in for realtor.com that serves saved listing pages.
+
+    `/realestateandhomes-detail/<slug>` returns `<fixtures_dir>/<slug>.html`.
+    Every response can be delayed by `latency` seconds to mimic the network,
+    and `responses` can script per-path status codes/headers (e.g. a 429 with
+    Retry-After). With `max_in_flight`, requests above that many in flight
+    get a 429 (+ `retry_after`), like a site that throttles bursts. Pages
+    carry an ETag and Last-Modified and a matching If-None-Match gets a 304.
+    The server records every request and the peak number of requests in flight,
+    which is what the concurrency harnesses check.
+
+        with FixtureServer("benchmarks/fixtures/realtor", latency=0.2) as server:
+            urls = server.listing_urls()
+    """
+
+    def __init__(
+        self,
+        fixtures_dir: str,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        max_in_flight: Optional[int] = None,
+        retry_after: Optional[str] = None,
+    ):
+        self.fixtures_dir = Path(fixtures_dir)
+        self.latency = latency
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.throttled = 0
+        self.host = host
+        self.responses: Dict[str, List[tuple]] = {}
+        self.requests: List[dict] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def slugs(self) -> List[str]:
+        return sorted(p.stem for p in self.fixtures_dir.glob("*.html"))
+
+    def listing_urls(self, repeat: int = 1) -> List[str]:
+        """URLs for every fixture; `repeat` > 1 adds a query string so each URL is distinct."""
+        urls = []
+        for i in range(repeat):
+            suffix = f"?v={i}" if repeat > 1 else ""
+            urls.extend(f"{self.base_url}/realestateandhomes-detail/{slug}{suffix}" for slug in self.slugs())
+        return urls
+
+    def script(self, path: str, *responses: tuple):
+        """Queue (status, headers) replies for `path`; once used up, the fixture is served."""
+        self.responses.setdefault(path, []).extend(responses)
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.requests.append({"path": handler.path, "headers": dict(handler.headers), "at": time.monotonic()})
+            over_limit = self.max_in_flight is not None and self.in_flight > self.max_in_flight
+            if over_limit:
+                self.throttled += 1
+        try:
+            if over_limit:
+                self._send(handler, 429, b"slow down", {"retry-after": self.retry_after} if self.retry_after else None)
+                return
+            if self.latency:
+                time.sleep(self.latency)
+            path = handler.path.split("?", 1)[0]
+            with self._lock:
+                scripted = self.responses.get(path)
+                reply = scripted.pop(0) if scripted else None
+            if reply is not None:
+                status, headers = reply
+                self._send(handler, status, b"", headers)
+                return
+            fixture = self.fixtures_dir / f"{path.rstrip('/').rsplit('/', 1)[-1]}.html"
+            if not fixture.is_file():
+                self._send(handler, 404, b"not found")
+                return
+            body = fixture.read_bytes()
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+            validators = {"etag": etag, "last-modified": formatdate(fixture.stat().st_mtime, usegmt=True)}
+            if handler.headers.get("if-none-match") == etag:
+                self._send(handler, 304, b"", validators)
+                return
+            self._send(handler, 200, body, dict(validators, **{"content-type": "text/html; charset=utf-8"}))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    @staticmethod
+    def _send(handler, status: int, body: bytes, headers: Optional[dict] = None):
+        handler.send_response(status)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header("content-length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self) -> "FixtureServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fixture-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
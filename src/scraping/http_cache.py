@@ -0,0 +1,179 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+# How long a cached page counts as fresh, by listing status. Sold and
+# off-market pages hardly change; active listings move (price cuts, status).
+DEFAULT_TTLS = {
+    "sold": 7 * 24 * 3600,
+    "off_market": 24 * 3600,
+    "pending": 3600,
+    "contingent": 3600,
+    "for_sale": 3600,
+    "for_rent": 3600,
+}
+DEFAULT_TTL = 3600
+
+# Headers worth keeping with the body; encoding/length describe the wire format only
+KEEP_HEADERS = ("content-type", "etag", "last-modified", "date", "cache-control")
+
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|cid|from)$")
+LISTING_STATUS = re.compile(rb'"status"\s*:\s*"(for_sale|for_rent|ready_to_build|pending|contingent|sold|off_market)"')
+
+
+def canonical_url(url: str) -> str:
+    """Cache key for a URL: lower-cased host, no fragment/tracking params, sorted query."""
+    parts = urlsplit(url.strip())
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMS.match(k))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def listing_status(body: bytes) -> Optional[str]:
+    """Listing status from a page's embedded JSON, without parsing it."""
+    match = LISTING_STATUS.search(body)
+    return match.group(1).decode() if match else None
+
+
+@dataclass
+class CachedPage:
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+    listing_status: Optional[str]
+    fetched_at: float
+    expires_at: float
+
+    def fresh(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this page."""
+        headers = {}
+        if "etag" in self.headers:
+            headers["if-none-match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            headers["if-modified-since"] = self.headers["last-modified"]
+        return headers
+
+    def to_response(self, url: str, source: str = "hit") -> httpx.Response:
+        headers = dict(self.headers, **{"x-cache": source})
+        return httpx.Response(self.status_code, headers=headers, content=self.body, request=httpx.Request("GET", url))
+
+
+class ResponseCache:
+    """
+    Persistent cache of listing pages in one SQLite file.
+
+    Pages are keyed by canonical URL and stored zlib-compressed with their
+    ETag/Last-Modified. Freshness comes from `ttls`, looked up by the
+    listing status found in the page (sold pages keep for days, active ones
+    for an hour). Stale pages are revalidated with If-None-Match /
+    If-Modified-Since; a 304 just extends them. With `offline=True` the
+    cache never touches the network: every stored page is served as-is and
+    a miss returns None, which makes scrapes reproducible in tests and
+    replays.
+    """
+
+    def __init__(self, path: str, ttls: Optional[Dict[str, float]] = None, default_ttl: float = DEFAULT_TTL, offline: bool = False, clock=time.time):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.offline = offline
+        self.clock = clock
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "stored": 0, "stale_served": 0}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                listing_status TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        self._db.commit()
+
+    def ttl_for(self, status: Optional[str]) -> float:
+        return self.ttls.get(status, self.default_ttl)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        key = canonical_url(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status_code, headers, body, listing_status, fetched_at, expires_at FROM pages WHERE url = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status_code, headers, body, status, fetched_at, expires_at = row
+        return CachedPage(key, status_code, json.loads(headers), zlib.decompress(body), status, fetched_at, expires_at)
+
+    def put(self, url: str, response: httpx.Response) -> CachedPage:
+        now = self.clock()
+        body = response.content
+        status = listing_status(body)
+        headers = {k: v for k, v in response.headers.items() if k.lower() in KEEP_HEADERS}
+        page = CachedPage(canonical_url(url), response.status_code, headers, body, status, now, now + self.ttl_for(status))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (page.url, page.status_code, json.dumps(headers), zlib.compress(body, 6), status, now, page.expires_at),
+            )
+            self._db.commit()
+        self.stats["stored"] += 1
+        return page
+
+    def refresh(self, page: CachedPage, response: httpx.Response) -> CachedPage:
+        """Extend a page after a 304, taking any new validators from the response."""
+        now = self.clock()
+        for name in ("etag", "last-modified", "date"):
+            if name in response.headers:
+                page.headers[name] = response.headers[name]
+        page.fetched_at, page.expires_at = now, now + self.ttl_for(page.listing_status)
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET headers = ?, fetched_at = ?, expires_at = ? WHERE url = ?",
+                (json.dumps(page.headers), page.fetched_at, page.expires_at, page.url),
+            )
+            self._db.commit()
+        self.stats["revalidated"] += 1
+        return page
+
+    def invalidate(self, url: str):
+        with self._lock:
+            self._db.execute("DELETE FROM pages WHERE url = ?", (canonical_url(url),))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+            self._db.commit()
+
+    def stored_bytes(self) -> int:
+        """Total compressed size of the cached bodies."""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM pages").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,153 @@
+import re
+from typing import Any, Optional, Sequence, Union
+
+import orjson
+from parsel import Selector
+
+# Where listing pages keep the property data inside __NEXT_DATA__
+REDUX_PATH = ("props", "pageProps", "initialReduxState")
+
+_MARKER = b"__NEXT_DATA__"
+_SCRIPT_END = b"</script"
+# One JSON string (escapes included) or one bracket; everything else is skipped in C
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.S)
+_NOT_STRUCTURE = bytes(b for b in range(256) if b not in b'[]{}"')
+_COLON = re.compile(rb"\s*:\s*")
+_MISSING = object()
+# Below this the bracket scan costs more than decoding the whole blob with orjson
+SUBTREE_MIN_BYTES = 256 * 1024
+
+
+def find_next_data(body: bytes) -> Optional[memoryview]:
+    """
+    Locate the text of `<script id="__NEXT_DATA__">` with plain byte scans.
+
+    Returns a zero-copy view of the JSON between the tag's `>` and its
+    `</script>`, or None if the page has no such tag.
+    """
+    pos = body.find(_MARKER)
+    while pos != -1:
+        tag_start = body.rfind(b"<", 0, pos)
+        if tag_start != -1 and body.startswith(b"<script", tag_start) and body.find(b">", tag_start, pos) == -1:
+            open_end = body.find(b">", pos)
+            close = body.find(_SCRIPT_END, open_end)
+            if open_end == -1 or close == -1:
+                return None
+            return memoryview(body)[open_end + 1 : close]
+        pos = body.find(_MARKER, pos + len(_MARKER))
+    return None
+
+
+def _brackets(chunk: bytes) -> bytes:
+    # The brackets of a JSON fragment that starts outside a string. With escapes gone the quotes
+    # alternate open/close, so after dropping everything but quotes and brackets (and the "" pairs
+    # that leaves behind) every other piece of a split on '"' is string content.
+    if b"\\" in chunk:
+        chunk = chunk.replace(b"\\\\", b"").replace(b'\\"', b"")
+    kept = chunk.translate(None, _NOT_STRUCTURE).replace(b'""', b"")
+    return b"".join(kept.split(b'"')[::2]) if b'"' in kept else kept
+
+
+def _unmatched(brackets: bytes) -> bytes:
+    # Drop matched pairs until only the unmatched closers, then openers, are left
+    while True:
+        reduced = brackets.replace(b"{}", b"").replace(b"[]", b"")
+        if reduced == brackets:
+            return reduced
+        brackets = reduced
+
+
+def _subtree(data: bytes, path: Sequence[str]) -> Any:
+    """
+    Decode only the value at `path` inside the JSON document `data`.
+
+    Each key is found with a byte search and must sit directly in the
+    object that the previous key's value opened: the brackets between the
+    two, outside strings, have to balance. That check drops strings by
+    splitting on quotes and cancels bracket pairs with bytes.replace, so
+    it stays in C however large the skipped siblings are. The last key's value is then
+    cut out by matching brackets and handed to orjson. Returns _MISSING
+    when the shortcut does not apply, so the caller can decode the whole
+    document.
+    """
+    start = len(data) - len(data.lstrip())
+    for key in path:
+        if data[start : start + 1] != b"{":
+            return _MISSING
+        quoted = b'"%s"' % key.encode()
+        pos, open_brackets = start + 1, b""
+        while True:
+            found = data.find(quoted, pos)
+            if found == -1:
+                return _MISSING
+            open_brackets = _unmatched(open_brackets + _brackets(data[pos:found]))
+            if open_brackets[:1] in (b"}", b"]"):
+                return _MISSING  # the object closed before the key turned up
+            pos = found + len(quoted)
+            colon = _COLON.match(data, pos)
+            if colon and not open_brackets:
+                break
+        start = colon.end()
+    if start >= len(data) or data[start] not in b"{[":
+        return _MISSING
+
+    depth = 0
+    for match in _TOKEN.finditer(data, start):
+        token = match.group()
+        if token[0] == 0x22:  # '"'
+            continue
+        depth += 1 if token in (b"{", b"[") else -1
+        if depth == 0:
+            try:
+                return orjson.loads(data[start : match.end()])
+            except orjson.JSONDecodeError:
+                return _MISSING
+    return _MISSING
+
+
+def extract_next_data(body: Union[bytes, str], path: Sequence[str] = (), subtree: Optional[bool] = None) -> Optional[Any]:
+    """
+    Parse a Next.js page's __NEXT_DATA__ and return the value at `path`.
+
+    The script tag is found with byte scans and decoded with orjson; no DOM
+    is built. With `subtree=True` only the value at `path` is decoded,
+    which pays off when the rest of the blob is large and unrelated; the
+    default picks it for scripts over SUBTREE_MIN_BYTES. If the
+    byte scan finds nothing usable, e.g. after a layout change, the page is
+    parsed with parsel the slow way. Returns None when the page has no
+    __NEXT_DATA__ or the path is missing.
+    """
+    if isinstance(body, str):
+        body = body.encode()
+    script = find_next_data(body)
+    data = None
+    if script is not None:
+        if subtree is None:
+            subtree = len(script) >= SUBTREE_MIN_BYTES
+        if subtree and path:
+            value = _subtree(bytes(script), path)
+            if value is not _MISSING:
+                return value
+        try:
+            data = orjson.loads(script)
+        except orjson.JSONDecodeError:
+            data = None
+    if data is None:
+        data = _parsel_next_data(body)
+        if data is None:
+            return None
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def _parsel_next_data(body: bytes) -> Optional[Any]:
+    text = Selector(text=body.decode("utf-8", "replace")).css("script#__NEXT_DATA__::text").get()
+    if not text:
+        return None
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return None
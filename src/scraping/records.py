@@ -0,0 +1,150 @@
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+# Listing descriptions are mostly boilerplate; the agent only needs the gist
+REMARKS_CHARS = 280
+
+
+def _get(data: Any, *keys, default=None):
+    for key in keys:
+        if not isinstance(data, dict):
+            return default
+        data = data.get(key)
+        if data is None:
+            return default
+    return data
+
+
+@dataclass(slots=True, frozen=True)
+class PriceEvent:
+    date: Optional[str]
+    event: Optional[str]
+    price: Optional[int]
+
+
+@dataclass(slots=True, frozen=True)
+class TaxYear:
+    year: Optional[int]
+    tax: Optional[int]
+    assessment: Optional[int]
+
+
+@dataclass(slots=True)
+class PropertyRecord:
+    """
+    The parts of a realtor.com listing the agents actually use.
+
+    `from_redux` projects a page's initialReduxState onto these fields;
+    everything else (photos, schools, ads, tracking) is dropped unless
+    `keep_raw` is set. `to_dict` / `to_json` give the compact form handed to
+    the LLM: None fields are left out and history entries become short
+    lists, which is a small fraction of the raw state's tokens.
+    """
+
+    property_id: Optional[str]
+    listing_id: Optional[str] = None
+    url: Optional[str] = None
+    status: Optional[str] = None
+    list_price: Optional[int] = None
+    list_date: Optional[str] = None
+    last_sold_price: Optional[int] = None
+    last_sold_date: Optional[str] = None
+    property_type: Optional[str] = None
+    beds: Optional[int] = None
+    baths: Optional[float] = None
+    sqft: Optional[int] = None
+    lot_sqft: Optional[int] = None
+    year_built: Optional[int] = None
+    address: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    postal_code: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    hoa_fee: Optional[int] = None
+    property_tax_rate: Optional[float] = None
+    estimated_payment: Optional[int] = None
+    remarks: Optional[str] = None
+    tax_history: Tuple[TaxYear, ...] = ()
+    price_history: Tuple[PriceEvent, ...] = ()
+    raw: Optional[dict] = None
+
+    @classmethod
+    def from_redux(cls, state: dict, keep_raw: bool = False) -> Optional["PropertyRecord"]:
+        details = _get(state, "propertyDetails")
+        if not isinstance(details, dict):
+            return None
+        description = details.get("description") or {}
+        address = _get(details, "location", "address", default={})
+        remarks = description.get("text")
+        if remarks and len(remarks) > REMARKS_CHARS:
+            remarks = remarks[:REMARKS_CHARS].rsplit(" ", 1)[0] + "..."
+        return cls(
+            property_id=details.get("property_id"),
+            listing_id=details.get("listing_id"),
+            url=details.get("href"),
+            status=details.get("status"),
+            list_price=details.get("list_price"),
+            list_date=(details.get("list_date") or "")[:10] or None,
+            last_sold_price=details.get("last_sold_price"),
+            last_sold_date=details.get("last_sold_date"),
+            property_type=description.get("type"),
+            beds=description.get("beds"),
+            baths=description.get("baths"),
+            sqft=description.get("sqft"),
+            lot_sqft=description.get("lot_sqft"),
+            year_built=description.get("year_built"),
+            address=address.get("line"),
+            city=address.get("city"),
+            state=address.get("state_code"),
+            postal_code=address.get("postal_code"),
+            lat=_get(address, "coordinate", "lat"),
+            lon=_get(address, "coordinate", "lon"),
+            hoa_fee=_get(details, "hoa", "fee"),
+            property_tax_rate=_get(details, "mortgage", "property_tax_rate"),
+            estimated_payment=_get(details, "mortgage", "estimate", "monthly_payment"),
+            remarks=remarks,
+            tax_history=tuple(
+                TaxYear(t.get("year"), t.get("tax"), _get(t, "assessment", "total")) for t in details.get("tax_history") or ()
+            ),
+            price_history=tuple(
+                PriceEvent(e.get("date"), e.get("event_name"), e.get("price")) for e in details.get("property_history") or ()
+            ),
+            raw=state if keep_raw else None,
+        )
+
+    @property
+    def price(self) -> Optional[int]:
+        """Asking price, or the last sale price for sold listings."""
+        if self.status == "sold" and self.last_sold_price:
+            return self.last_sold_price
+        return self.list_price or self.last_sold_price
+
+    @property
+    def price_per_sqft(self) -> Optional[float]:
+        if not self.price or not self.sqft:
+            return None
+        return round(self.price / self.sqft, 2)
+
+    def to_dict(self, include_raw: bool = False) -> Dict[str, Any]:
+        """Compact form: None/empty fields dropped, histories as [date, event, price] / [year, tax, assessment]."""
+        data = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if f.name == "raw" and not include_raw:
+                continue
+            if value is None or value == ():
+                continue
+            if f.name == "tax_history":
+                value = [[t.year, t.tax, t.assessment] for t in value]
+            elif f.name == "price_history":
+                value = [[e.date, e.event, e.price] for e in value]
+            data[f.name] = value
+        if self.price_per_sqft is not None:
+            data["price_per_sqft"] = self.price_per_sqft
+        return data
+
+    def to_json(self, include_raw: bool = False) -> str:
+        return orjson.dumps(self.to_dict(include_raw)).decode()
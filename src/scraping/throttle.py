@@ -0,0 +1,259 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from tenacity import AsyncRetrying, RetryError, retry_if_exception_type, wait_random_exponential
+
+THROTTLE_STATUSES = frozenset({403, 429, 503})
+RETRY_STATUSES = THROTTLE_STATUSES | {500, 502, 504}
+# Usually a bot block rather than load: rarely lifted by waiting, so it gets a short retry budget
+BLOCK_STATUSES = frozenset({403})
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+class RetryableResponse(Exception):
+    """A throttled or 5xx response that should be retried."""
+
+    def __init__(self, response: httpx.Response, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {response.status_code} for {response.url}")
+        self.response = response
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Async token bucket; `pause` blocks all takers until a deadline (Retry-After)."""
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self.clock()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+
+class AIMDLimit:
+    """
+    Concurrency limit with additive increase / multiplicative decrease.
+
+    Every success adds 1/limit (so about +1 per window of `limit` requests)
+    up to `maximum`. A throttled response halves the limit, but only if the
+    request was sent after the previous decrease: responses to requests
+    already in flight describe the old limit, so one burst of 429s counts
+    as a single congestion signal (as in TCP).
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1, decrease: float = 0.5, clock=time.monotonic):
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.minimum = minimum
+        self.decrease = decrease
+        self.clock = clock
+        self.in_flight = 0
+        self.last_decrease = float("-inf")
+        self._changed = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc):
+        async with self._changed:
+            self.in_flight -= 1
+            self._changed.notify_all()
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_throttle(self, sent_at: float) -> bool:
+        """Register a throttled response to a request sent at `sent_at`; True if the limit dropped."""
+        if sent_at < self.last_decrease:
+            return False
+        self.last_decrease = self.clock()
+        self.limit = max(self.minimum, self.limit * self.decrease)
+        return True
+
+
+@dataclass
+class HostMetrics:
+    requests: int = 0
+    succeeded: int = 0
+    throttled: int = 0
+    retried: int = 0
+    failed: int = 0
+    client_errors: int = 0
+    retry_after_waits: int = 0
+    concurrency: float = 0.0
+    rate: float = 0.0
+
+
+@dataclass
+class HostState:
+    bucket: TokenBucket
+    limit: AIMDLimit
+    metrics: HostMetrics = field(default_factory=HostMetrics)
+
+
+class FetchScheduler:
+    """
+    Per-host admission control and retries for listing fetches.
+
+    Each host gets a token bucket (request rate) and an AIMD concurrency
+    limit. 403/429/503 responses count as throttling: they halve the host's
+    concurrency and rate, honour Retry-After by pausing the whole host, and
+    are retried with jittered exponential backoff (tenacity), up to
+    `max_attempts` tries in all; a 403 only gets `block_attempts`, so a bot
+    block fails the tool call quickly. Successes slowly raise both again up
+    to the configured ceilings, which keeps the scraper near the highest
+    rate the site tolerates. Other 4xx responses are returned as they are
+    and count as neither success nor throttling.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        rate: float = 4.0,
+        max_rate: float = 8.0,
+        max_attempts: int = 6,
+        block_attempts: int = 2,
+        backoff_max: float = 30.0,
+        max_retry_after: float = 120.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.max_rate = max_rate
+        self.max_attempts = max_attempts
+        self.block_attempts = block_attempts
+        self.backoff = wait_random_exponential(multiplier=0.5, max=backoff_max)
+        self.max_retry_after = max_retry_after
+        self.hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def host(self, url: str) -> HostState:
+        name = urlsplit(url).netloc
+        with self._lock:
+            if name not in self.hosts:
+                self.hosts[name] = HostState(
+                    TokenBucket(self.rate, capacity=self.max_concurrency),
+                    AIMDLimit(initial=self.max_concurrency, maximum=self.max_concurrency),
+                )
+            return self.hosts[name]
+
+    def _wait(self, retry_state) -> float:
+        exc = retry_state.outcome.exception()
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            return retry_after
+        return self.backoff(retry_state)
+
+    def _stop(self, retry_state) -> bool:
+        exc = retry_state.outcome.exception()
+        blocked = isinstance(exc, RetryableResponse) and exc.response.status_code in BLOCK_STATUSES
+        return retry_state.attempt_number >= (self.block_attempts if blocked else self.max_attempts)
+
+    async def fetch(self, client: httpx.AsyncClient, url: str, **kwargs) -> Optional[httpx.Response]:
+        """GET `url` under the host's limits; returns the last response, or None on network failure."""
+        state = self.host(url)
+
+        def before_sleep(retry_state):
+            state.metrics.retried += 1
+
+        retrying = AsyncRetrying(
+            stop=self._stop,
+            wait=self._wait,
+            retry=retry_if_exception_type((RetryableResponse, httpx.TransportError)),
+            before_sleep=before_sleep,
+        )
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    return await self._attempt(client, url, state, **kwargs)
+        except RetryError as e:
+            state.metrics.failed += 1
+            exc = e.last_attempt.exception()
+            if isinstance(exc, RetryableResponse):
+                return exc.response
+            print(f"|can't fetch {url}: {type(exc).__name__}: {exc}")
+            return None
+
+    async def _attempt(self, client: httpx.AsyncClient, url: str, state: HostState, **kwargs) -> httpx.Response:
+        await state.bucket.acquire()
+        async with state.limit:
+            state.metrics.requests += 1
+            sent_at = state.limit.clock()
+            response = await client.get(url, **kwargs)
+
+        if response.status_code in THROTTLE_STATUSES:
+            state.metrics.throttled += 1
+            if state.limit.on_throttle(sent_at):
+                state.bucket.rate = max(0.1, state.bucket.rate * state.limit.decrease)
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if retry_after is not None:
+                state.metrics.retry_after_waits += 1
+                if retry_after > self.max_retry_after:
+                    # Not worth holding the agent for; give up on this URL now
+                    state.metrics.failed += 1
+                    return response
+                state.bucket.pause(retry_after)
+            raise RetryableResponse(response, retry_after)
+        if response.status_code in RETRY_STATUSES:
+            raise RetryableResponse(response)
+        if response.status_code >= 400:
+            # A missing or gone listing says nothing about how hard we may push the host
+            state.metrics.client_errors += 1
+            return response
+
+        state.metrics.succeeded += 1
+        state.limit.on_success()
+        state.bucket.rate = min(self.max_rate, state.bucket.rate + 0.1)
+        return response
+
+    def metrics(self) -> Dict[str, dict]:
+        """Per-host counters plus a 'total' row."""
+        rows = {}
+        total = HostMetrics()
+        for name, state in self.hosts.items():
+            state.metrics.concurrency = round(state.limit.limit, 2)
+            state.metrics.rate = round(state.bucket.rate, 2)
+            rows[name] = dict(state.metrics.__dict__)
+            for key in ("requests", "succeeded", "throttled", "retried", "failed", "client_errors", "retry_after_waits"):
+                setattr(total, key, getattr(total, key) + getattr(state.metrics, key))
+        rows["total"] = {k: v for k, v in total.__dict__.items() if k not in ("concurrency", "rate")}
+        return rows
@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from src.events import EventSink
+from src.tools.human_intervention import HumanChannel
+
+
+@dataclass
+class Session:
+    id: str
+    agent: Any  # the session's own manager agent (and, through it, its managed agents)
+    channel: HumanChannel
+    run_lock: threading.Lock = field(default_factory=threading.Lock)  # one run at a time per session
+    sink: Optional[EventSink] = None  # events of the run in progress, kept while it waits for the user
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def busy(self) -> bool:
+        return self.run_lock.locked()
+
+
+class AgentPool:
+    """
+    One agent tree per user session, so concurrent users never share memory.
+
+    `factory(channel)` builds a session's manager agent; it should reuse the
+    process-wide read-only pieces (model client, retriever, stores) and
+    create only the agents and the per-session human channel. Sessions idle
+    for `idle_ttl` seconds, or the least recently used beyond
+    `max_sessions`, are dropped; a dropped session that was waiting for the
+    user is released.
+    """
+
+    def __init__(self, factory: Callable[[HumanChannel], Any], max_sessions: int = 64, idle_ttl: float = 3600.0, clock=time.monotonic):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.clock = clock
+        self.stats = {"created": 0, "evicted": 0}
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Session:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_used = self.clock()
+                return session
+        # Built outside the lock so one slow factory call does not stall other users
+        channel = HumanChannel()
+        session = Session(session_id, self.factory(channel), channel, last_used=self.clock())
+        with self._lock:
+            session = self._sessions.setdefault(session_id, session)
+            self.stats["created"] += session.channel is channel
+            self._evict()
+        return session
+
+    def _evict(self):
+        now = self.clock()
+        for session_id, session in list(self._sessions.items()):
+            too_many = len(self._sessions) > self.max_sessions
+            if not too_many and now - session.last_used < self.idle_ttl:
+                break
+            if session.busy and not session.channel.pending:
+                continue  # never drop a session mid-run
+            del self._sessions[session_id]
+            session.channel.cancel()
+            self.stats["evicted"] += 1
+
+    def close(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.channel.cancel()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
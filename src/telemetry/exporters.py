@@ -0,0 +1,191 @@
+import atexit
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, List, Optional
+
+from src.telemetry import metrics
+
+EXPORTERS = ("console", "prometheus", "otlp", "arize")
+
+
+def summary(registry: metrics.Registry = metrics.registry) -> str:
+    """The registry as a plain-text table: latency percentiles, totals and cache hit rates."""
+    lines = []
+    for name, metric in sorted(registry.metrics.items()):
+        if isinstance(metric, metrics.Histogram):
+            for row in metric.summary():
+                labels = ",".join(f"{k}={v}" for k, v in row["labels"].items())
+                lines.append(
+                    f"{name}{{{labels}}}  n={row['count']}  mean={row['mean'] * 1e3:.1f}ms  "
+                    f"p50={row['p50'] * 1e3:.1f}ms  p95={row['p95'] * 1e3:.1f}ms  p99={row['p99'] * 1e3:.1f}ms"
+                )
+        else:
+            for key, value in sorted(list(metric.values.items())):
+                lines.append(f"{name}{{{','.join(f'{k}={v}' for k, v in key)}}}  {value:g}")
+            if name.endswith("_cache_lookups_total"):
+                hits, lookups = metric.total(result="hit"), metric.total()
+                if lookups:
+                    lines.append(f"{name[: -len('_lookups_total')]} hit rate  {hits / lookups:.1%} of {lookups:g}")
+    return "\n".join(lines)
+
+
+class ConsoleExporter:
+    """
+    Prints summary() every `interval` seconds while new observations come
+    in, and once more when the process exits.
+    """
+
+    def __init__(self, interval: float = 60.0, registry: metrics.Registry = metrics.registry):
+        self.interval = interval
+        self.registry = registry
+        self._printed = 0
+        self._stop = threading.Event()
+
+    def start(self) -> "ConsoleExporter":
+        threading.Thread(target=self._run, name="telemetry-console", daemon=True).start()
+        atexit.register(self.flush)
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        seen = self.registry.observations()
+        if seen != self._printed:
+            self._printed = seen
+            print("-- telemetry --\n" + summary(self.registry), flush=True)
+
+    def stop(self):
+        self._stop.set()
+
+
+class PrometheusExporter:
+    """Serves the registry as Prometheus text at http://host:port/metrics for a local scraper."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9464, registry: metrics.Registry = metrics.registry):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._server.server_address[1]}/metrics"
+
+    def start(self) -> "PrometheusExporter":
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="telemetry-prometheus", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def tracer_provider(exporters: Iterable[str], sample_rate: float = 1.0, project_name: str = "default"):
+    """
+    An OpenTelemetry TracerProvider that sends spans to the span exporters
+    among `exporters`, or None if there are none. "otlp" posts to a local
+    collector over HTTP (OTEL_EXPORTER_OTLP_ENDPOINT, default
+    http://localhost:4318); "arize" needs ARIZE_SPACE_ID and ARIZE_API_KEY.
+    A trace is kept with probability `sample_rate`, decided at its root.
+    """
+    exporters = set(exporters)
+    if not exporters & {"otlp", "arize"}:
+        return None
+    from openinference.semconv.resource import ResourceAttributes
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": project_name, ResourceAttributes.PROJECT_NAME: project_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_rate)),
+    )
+    if "otlp" in exporters:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    if "arize" in exporters:
+        from arize.otel import BatchSpanProcessor as ArizeSpanProcessor
+
+        space_id, api_key = os.environ.get("ARIZE_SPACE_ID"), os.environ.get("ARIZE_API_KEY")
+        if not space_id or not api_key:
+            raise ValueError("The arize exporter needs ARIZE_SPACE_ID and ARIZE_API_KEY.")
+        provider.add_span_processor(ArizeSpanProcessor(space_id=space_id, api_key=api_key))
+    return provider
+
+
+class Telemetry:
+    """What configure() started: the exporters and the tracer provider (None without span exporters)."""
+
+    def __init__(self, exporters: List[str], sample_rate: float, provider=None, console=None, prometheus=None):
+        self.exporters = exporters
+        self.sample_rate = sample_rate
+        self.provider = provider
+        self.console = console
+        self.prometheus = prometheus
+
+    def shutdown(self):
+        if self.console is not None:
+            self.console.stop()
+            self.console.flush()
+        if self.prometheus is not None:
+            self.prometheus.stop()
+        if self.provider is not None:
+            metrics.set_tracer(None)
+            self.provider.shutdown()
+
+
+def configure(
+    exporters: Iterable[str],
+    sample_rate: float = 1.0,
+    project_name: str = "default",
+    console_interval: float = 60.0,
+    prometheus_host: str = "127.0.0.1",
+    prometheus_port: int = 9464,
+) -> Telemetry:
+    """
+    Start the named exporters (see EXPORTERS). Metrics are recorded in
+    any case; this only decides where they and the spans go.
+    """
+    exporters = [e for e in exporters if e]
+    unknown = set(exporters) - set(EXPORTERS)
+    if unknown:
+        raise ValueError(f"unknown telemetry exporter(s) {sorted(unknown)}, expected some of {EXPORTERS}")
+    if not 0.0 <= sample_rate <= 1.0:
+        raise ValueError(f"sample rate must be between 0 and 1, got {sample_rate}")
+    telemetry = Telemetry(exporters, sample_rate)
+    if "console" in exporters:
+        telemetry.console = ConsoleExporter(console_interval).start()
+    if "prometheus" in exporters:
+        telemetry.prometheus = PrometheusExporter(prometheus_host, prometheus_port).start()
+        print(f"Prometheus metrics at {telemetry.prometheus.url}")
+    if sample_rate > 0:  # at 0 no trace would be kept; skip the tracer and its per-span cost
+        telemetry.provider = tracer_provider(exporters, sample_rate, project_name)
+    if telemetry.provider is not None:
+        metrics.set_tracer(telemetry.provider.get_tracer("realtor-agent"))
+    return telemetry
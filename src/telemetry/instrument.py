@@ -0,0 +1,46 @@
+from smolagents import Tool
+from smolagents.agents import MultiStepAgent
+
+from src.telemetry import metrics
+
+TOOL_SECONDS = metrics.histogram("agent_tool_call_seconds", "Tool calls made by the agents, by tool")
+AGENT_SECONDS = metrics.histogram("agent_run_seconds", "Agent runs (the manager's whole request or a managed agent's task), by agent")
+
+_installed = False
+
+
+def instrument_smolagents():
+    """
+    Time every Tool call and agent run into the histograms above.
+
+    Patches the smolagents base classes once, so it covers agents built
+    before and after the call. Spans for the same calls come from the
+    OpenInference instrumentor when a span exporter is configured; this
+    only feeds the always-on metrics.
+    """
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    tool_call = Tool.__call__
+    agent_run = MultiStepAgent.run
+
+    def timed_call(self, *args, **kwargs):
+        with metrics.span(None, TOOL_SECONDS, tool=self.name):
+            return tool_call(self, *args, **kwargs)
+
+    def timed_run(self, task, stream=False, *args, **kwargs):
+        agent = self.name or "manager"
+        if stream:
+            return _timed_steps(agent_run(self, task, stream, *args, **kwargs), agent)
+        with metrics.span(None, AGENT_SECONDS, agent=agent):
+            return agent_run(self, task, stream, *args, **kwargs)
+
+    Tool.__call__ = timed_call
+    MultiStepAgent.run = timed_run
+
+
+def _timed_steps(steps, agent):
+    # A streamed run lasts until its last step has been consumed
+    with metrics.span(None, AGENT_SECONDS, agent=agent):
+        yield from steps
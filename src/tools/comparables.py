@@ -0,0 +1,94 @@
+import json
+import threading
+from typing import Optional
+
+from smolagents import Tool
+
+from src.listings.comps import ComparablesEngine, Subject
+from src.listings.store import PropertyStore
+
+SUBJECT_FIELDS = ("sqft", "beds", "baths", "year_built", "property_type")
+
+
+class ComparablesTool(Tool):
+    name = "find_comparables"
+    description = (
+        "Finds comparable properties (comps) among listings already scraped and stored locally, without browsing the web. "
+        "Give the property_id of a stored listing (load it with load_realtor_data first), or 'lat,lon' plus its features. "
+        "Comps are ranked by distance and similarity (size, beds, baths, age, type). Returns JSON with each comp's price, "
+        "price_per_sqft, distance_miles and adjusted_price (comp price per sqft times the subject's sqft), and a "
+        "similarity-weighted value estimate."
+    )
+    inputs = {
+        "property_id": {"type": "string", "description": "property_id of a stored listing to find comps for.", "nullable": True},
+        "location": {"type": "string", "description": "'lat,lon' of the subject if it is not stored.", "nullable": True},
+        "sqft": {"type": "number", "description": "Subject living area (with `location`).", "nullable": True},
+        "beds": {"type": "number", "description": "Subject bedrooms (with `location`).", "nullable": True},
+        "baths": {"type": "number", "description": "Subject bathrooms (with `location`).", "nullable": True},
+        "year_built": {"type": "integer", "description": "Subject year built (with `location`).", "nullable": True},
+        "property_type": {"type": "string", "description": "e.g. 'single_family', 'condos' (with `location`).", "nullable": True},
+        "status": {"type": "string", "description": "Comps' status: 'sold' (default), 'for_sale', or 'any'.", "nullable": True},
+        "k": {"type": "integer", "description": "Number of comps (default 5).", "nullable": True},
+        "max_miles": {"type": "number", "description": "Ignore comps farther than this.", "nullable": True},
+    }
+    output_type = "string"
+
+    def __init__(self, store: PropertyStore, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+        self._engine: Optional[ComparablesEngine] = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def engine(self) -> ComparablesEngine:
+        """The engine over the store's current contents; rebuilt only after new listings were stored."""
+        with self._lock:
+            version = self.store.version()
+            if self._engine is None or version != self._version:
+                self._engine, self._version = ComparablesEngine.from_store(self.store), version
+            return self._engine
+
+    def forward(
+        self,
+        property_id: Optional[str] = None,
+        location: Optional[str] = None,
+        sqft: Optional[float] = None,
+        beds: Optional[float] = None,
+        baths: Optional[float] = None,
+        year_built: Optional[int] = None,
+        property_type: Optional[str] = None,
+        status: Optional[str] = None,
+        k: Optional[int] = None,
+        max_miles: Optional[float] = None,
+    ) -> str:
+        if property_id:
+            record = self.store.get(property_id)
+            if record is None:
+                return f"No stored listing with property_id {property_id}; load it with load_realtor_data first."
+            if record.lat is None or record.lon is None:
+                return f"Listing {property_id} has no coordinates; pass `location` instead."
+            subject = Subject.from_record(record)
+        elif location:
+            try:
+                lat, lon = (float(v) for v in location.split(","))
+            except ValueError:
+                return "Invalid `location`: expected 'lat,lon', e.g. '29.7445,-95.6021'."
+            subject = Subject(lat, lon, sqft, beds, baths, year_built, property_type)
+        else:
+            return "Give either property_id or location."
+        # Explicit features override the stored ones
+        for name, value in zip(SUBJECT_FIELDS, (sqft, beds, baths, year_built, property_type)):
+            if value is not None:
+                setattr(subject, name, value)
+
+        result = self.engine().query(subject, k=k or 5, status=None if status == "any" else (status or "sold"), max_miles=max_miles)
+        subject_info = {name: getattr(subject, name) for name in ("property_id", "lat", "lon", *SUBJECT_FIELDS) if getattr(subject, name) is not None}
+        return json.dumps(
+            {
+                "subject": subject_info,
+                "estimate": result.estimate,
+                "median_price_per_sqft": result.median_price_per_sqft,
+                "candidates_considered": result.candidates,
+                "comps": result.comps,
+            }
+        )
@@ -0,0 +1,157 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from smolagents import Tool
+
+from src import events
+
+
+class BranchCancelled(Exception):
+    """Raised at a step boundary inside a sub-agent whose branch timed out."""
+
+
+class AgentBusy(Exception):
+    """Raised when a sub-agent is called while a cancelled branch of it is still winding down."""
+
+
+@dataclass
+class Branch:
+    agent: str
+    task: str
+    status: str = "pending"  # ok, error, timeout
+    result: Optional[str] = None
+    seconds: Optional[float] = None
+
+
+class _CancelCheck:
+    """
+    Step callback that stops an agent at its next step boundary once its
+    branch is cancelled. A model call already in flight cannot be
+    interrupted, so a timed-out branch finishes that call and then stops.
+
+    guard() wraps the agent's run so only one run of it is in flight: the
+    abandoned thread of a timed-out branch still owns the agent (and its
+    memory) until it stops, so any call meanwhile, through fan_out or as an
+    ordinary managed agent, raises AgentBusy. The cancel flag is cleared
+    when that run ends.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self, step, agent=None):
+        if self.event.is_set():
+            raise BranchCancelled(f"{getattr(agent, 'name', 'agent')} was cancelled")
+
+    def guard(self, agent):
+        run = agent.run
+
+        def guarded_run(task, stream=False, **kwargs):
+            if stream:
+                return run(task, stream=True, **kwargs)
+            if not self.lock.acquire(blocking=False):
+                raise AgentBusy(f"{agent.name} is still stopping a cancelled task; try again in a moment")
+            try:
+                return run(task, **kwargs)
+            finally:
+                self.event.clear()
+                self.lock.release()
+
+        agent.run = guarded_run
+
+
+def fan_out(agents: Dict[str, object], tasks: Dict[str, str], timeout: float, cancel: Dict[str, _CancelCheck]) -> List[Branch]:
+    """
+    Run each agent on its task concurrently and return one Branch per task,
+    in the order of `agents` (not completion order), so the merged answer
+    is the same however the threads interleave.
+    """
+    branches = [Branch(name, tasks[name]) for name in agents if name in tasks]
+    if not branches:
+        return branches
+
+    def run(branch: Branch):
+        # Results are only written back by the caller, so a branch that timed out stays reported as such
+        start = time.perf_counter()
+        try:
+            result, status = str(agents[branch.agent](branch.task)), "ok"
+        except BranchCancelled:
+            result, status = None, "timeout"
+        except Exception as e:
+            result, status = f"{type(e).__name__}: {e}", "error"
+        return status, result, time.perf_counter() - start
+
+    pool = ThreadPoolExecutor(max_workers=len(branches), thread_name_prefix="fan-out")
+    start = time.perf_counter()
+    # Each branch gets a copy of the caller's context, so its events reach the same UI request
+    futures = {pool.submit(contextvars.copy_context().run, run, branch): branch for branch in branches}
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            branch = futures[future]
+            branch.status, branch.result, branch.seconds = future.result()
+            events.emit("progress", text=f"{branch.agent} finished ({branch.status}, {branch.seconds:.1f}s)")
+    except FuturesTimeout:
+        pass
+    for branch in branches:
+        if branch.status == "pending":
+            cancel[branch.agent].event.set()
+            branch.status, branch.seconds = "timeout", time.perf_counter() - start
+            branch.result = f"No answer within {timeout:.0f}s; the branch was cancelled."
+    pool.shutdown(wait=False)  # cancelled branches stop at their next step and clear their flag on their own
+    return branches
+
+
+class ParallelDelegationTool(Tool):
+    name = "delegate_parallel"
+    description = (
+        "Sends independent tasks to several team members at once and waits for all of them, instead of calling them one "
+        "after another. Pass `tasks` as a dict mapping a team member's name to its task, e.g. "
+        "{'realtor_agent': 'Analyze <url>', 'document_agent': 'Which forms are needed for a single family home?'}. "
+        "Only use it when no task needs another's answer. Returns every member's answer in a fixed order, each with its "
+        "status and run time; a member that exceeds the timeout is cancelled and reported as such."
+    )
+    inputs = {
+        "tasks": {"type": "object", "description": "Map of team member name to the task for it."},
+        "timeout": {"type": "number", "description": "Seconds to wait for each member (default 300).", "nullable": True},
+    }
+    output_type = "string"
+
+    def __init__(self, agents: Sequence, timeout: Optional[float] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.agents = {agent.name: agent for agent in agents}
+        self.timeout = timeout if timeout is not None else float(os.environ.get("AGENT_FANOUT_TIMEOUT", 300))
+        self.cancel = {}
+        for agent in agents:
+            self.cancel[agent.name] = _CancelCheck()
+            self.cancel[agent.name].guard(agent)
+            agent.step_callbacks.append(self.cancel[agent.name])
+        self.last_branches: List[Branch] = []
+        self.last_wall_seconds: Optional[float] = None
+
+    def forward(self, tasks: dict, timeout: Optional[float] = None) -> str:
+        if not isinstance(tasks, dict) or not tasks:
+            return "Pass `tasks` as a non-empty dict of team member name to task."
+        unknown = [name for name in tasks if name not in self.agents]
+        if unknown:
+            return f"Unknown team members: {', '.join(unknown)}. Available: {', '.join(self.agents)}."
+
+        start = time.perf_counter()
+        branches = fan_out(self.agents, {k: str(v) for k, v in tasks.items()}, timeout or self.timeout, self.cancel)
+        wall = time.perf_counter() - start
+        self.last_branches, self.last_wall_seconds = branches, wall
+
+        sections = [f"### {b.agent} ({b.status}, {b.seconds:.1f}s)\n{b.result}" for b in branches]
+        critical = max(branches, key=lambda b: b.seconds)
+        timings = ", ".join(f"{b.agent} {b.seconds:.1f}s" for b in branches)
+        sections.append(
+            f"Timings: {timings}; wall {wall:.1f}s vs {sum(b.seconds for b in branches):.1f}s sequential; "
+            f"critical path: {critical.agent}."
+        )
+        return "\n\n".join(sections)
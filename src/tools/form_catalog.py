@@ -0,0 +1,41 @@
+from typing import List, Optional
+
+from smolagents import Tool
+
+from src.forms.catalog import FormCatalog
+
+
+class FormCatalogTool(Tool):
+    name = "form_catalog"
+    description = (
+        "Answers 'which forms do I need for ...' instantly from the catalog of NWMLS forms in the document library, "
+        "without searching. Describe the deal: property type (single-family home, condo, vacant land, multi-family) and "
+        "features (loan, cash, seller financing, escalation / multiple offers, inspection, feasibility, title review, "
+        "HOA, foreign seller). Returns the purchase agreement and the addenda, each with its form number, title, "
+        "page count, revision, file name and why it applies. Use the retriever or the document_agent for what a "
+        "form says."
+    )
+    inputs = {
+        "query": {
+            "type": "string",
+            "description": "The deal or question in plain words, e.g. 'condo with an FHA loan and multiple offers'.",
+        },
+        "property_type": {
+            "type": "string",
+            "description": "Optional: 'single family', 'condo', 'vacant land' or 'multi-family', if not in the query.",
+            "nullable": True,
+        },
+        "features": {
+            "type": "array",
+            "description": "Optional: deal features not in the query, e.g. ['seller financing', 'escalation'].",
+            "nullable": True,
+        },
+    }
+    output_type = "string"
+
+    def __init__(self, catalog: FormCatalog, **kwargs):
+        super().__init__(**kwargs)
+        self.catalog = catalog
+
+    def forward(self, query: str, property_type: Optional[str] = None, features: Optional[List[str]] = None) -> str:
+        return self.catalog.answer(query, property_type, features or ())
@@ -1,6 +1,66 @@
+import threading
+from typing import Optional
+
 from smolagents import Tool
 
+from src import events
+
+
+class HumanChannel:
+    """
+    Hands an agent's question to the UI and the user's reply back to the agent.
+
+    ask() parks the calling thread (the agent's worker, never the server
+    thread) and emits a "question" event; the UI shows it and routes the
+    user's next message to answer(), which resumes the run. One question
+    can be pending at a time per channel, i.e. per session.
+    """
+
+    def __init__(self, timeout: float = 900.0):
+        self.timeout = timeout
+        self.pending: Optional[str] = None
+        self._answer: Optional[str] = None
+        self._answered = threading.Event()
+        self._lock = threading.Lock()
+
+    def ask(self, question: str) -> str:
+        with self._lock:
+            self.pending, self._answer = question, None
+            self._answered.clear()
+        events.emit("question", text=question)
+        answered = self._answered.wait(self.timeout)
+        with self._lock:
+            self.pending = None
+            answer = self._answer
+        if not answered or answer is None:
+            return "The user did not answer; continue with the most reasonable assumption and say which one you made."
+        return answer
+
+    def answer(self, text: str) -> bool:
+        """Resume the parked run with `text`; False if nothing was asked."""
+        with self._lock:
+            if self.pending is None:
+                return False
+            self._answer = text
+            self._answered.set()
+            return True
+
+    def cancel(self):
+        """Release a parked run (e.g. when its session is closed); the agent is told nobody answered."""
+        with self._lock:
+            self._answered.set()
+
+
 class HumanInterventionTool(Tool):
+    """
+    A universal human-in-the-loop tool:
+      - scenario="clarification": ask open-ended question.
+      - scenario="approval": ask yes/no (type 'YES' or 'NO').
+      - scenario="multiple_choice": present list of options.
+
+    With a HumanChannel the question goes to the chat UI and the run waits
+    for the reply there; without one it falls back to the console.
+    """
     name = "human_intervention"
     description = (
         "Single tool for clarifications, approvals, or multiple-choice from the user. "
@@ -23,5 +83,29 @@ class HumanInterventionTool(Tool):
     }
     output_type = "string"
 
+    def __init__(self, channel: Optional[HumanChannel] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.channel = channel
+
     def forward(self, scenario: str, message_for_human: str, choices: list = None) -> str:
-        # ... existing implementation ... 
\ No newline at end of file
+        if scenario not in ("clarification", "approval", "multiple_choice"):
+            return "Error: Invalid scenario."
+        if scenario == "multiple_choice" and not choices:
+            return "No choices provided."
+
+        if scenario == "clarification":
+            question, prompt = message_for_human, "(Type your clarification): "
+        elif scenario == "approval":
+            question, prompt = f"{message_for_human}\n\nReply YES or NO to proceed.", "Your decision: "
+        else:
+            options = "\n".join(f"{i}. {option}" for i, option in enumerate(choices, start=1))
+            question, prompt = f"{message_for_human}\n\n{options}\n\nReply with an option number.", "\nPick an option number: "
+
+        if self.channel is not None:
+            reply = self.channel.ask(question)
+        else:
+            print("\n[HUMAN INTERVENTION]")
+            print(f"Scenario: {scenario}")
+            print(f"Agent says: {question}")
+            reply = input(prompt)
+        return reply.strip().upper() if scenario == "approval" else reply
@@ -0,0 +1,154 @@
+import json
+from dataclasses import asdict
+from typing import List, Optional
+
+import numpy as np
+from smolagents import Tool
+
+from src.analysis.investment import Assumptions, amortization_schedule, property_metrics, scenario_grid, yearly_schedule
+
+BASE_METRICS = (
+    "price_per_sqft", "monthly_rent", "gross_yield", "grm", "noi", "cap_rate", "monthly_payment",
+    "monthly_cash_flow", "cash_invested", "cash_on_cash", "dscr",
+)
+GRID_METRICS = ("monthly_cash_flow", "cash_on_cash", "dscr", "cap_rate")
+NUMERIC_FIELDS = (
+    "price", "list_price", "last_sold_price", "monthly_rent", "sqft", "hoa_fee", "property_tax_rate", "insurance_rate",
+)
+
+
+def _number(value) -> Optional[float]:
+    # Models often copy prices as displayed: "$350,000"
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = value.strip().replace(",", "").replace("$", "")
+    return float(value)
+
+
+def _numbers(item: dict) -> dict:
+    """`item` with its numeric fields as floats; ValueError names the first one that is not a number."""
+    item = dict(item)
+    for key in NUMERIC_FIELDS:
+        if key in item:
+            try:
+                item[key] = _number(item[key])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid `{key}`: expected a number like 350000 or '$350,000', got {item[key]!r}.") from None
+    return item
+
+
+def _price(item: dict) -> Optional[float]:
+    # Accepts load_realtor_data records as they are: sold listings carry last_sold_price
+    for key in ("price", "list_price", "last_sold_price"):
+        if item.get(key):
+            return float(item[key])
+    return None
+
+
+def _round(value: float):
+    if np.isnan(value) or np.isinf(value):
+        return None
+    return round(float(value), 4) if abs(value) < 10 else round(float(value), 2)
+
+
+class InvestmentMetricsTool(Tool):
+    name = "investment_metrics"
+    description = (
+        "Computes investment metrics for one or more properties in a single call: price per sqft, gross yield, GRM, NOI, "
+        "cap rate, mortgage payment, monthly cash flow, cash-on-cash return and DSCR, plus a scenario grid over mortgage "
+        "rates x down payments x rent levels, and optionally a yearly amortization schedule. Pass the records from "
+        "load_realtor_data directly (price/list_price, sqft, hoa_fee, property_tax_rate are picked up) and add "
+        "monthly_rent where known; otherwise rent is estimated at 0.7% of price per month and flagged. "
+        "Rates are fractions (0.07 = 7%). Use this instead of writing the calculations yourself."
+    )
+    inputs = {
+        "properties": {
+            "type": "array",
+            "description": "List of dicts, each with price (or list_price), and optionally monthly_rent, sqft, hoa_fee, property_tax_rate, insurance_rate, property_id/address.",
+        },
+        "rates": {"type": "array", "description": "Mortgage rates for the grid, default [0.06, 0.07, 0.08].", "nullable": True},
+        "down_payments": {"type": "array", "description": "Down payment fractions for the grid, default [0.1, 0.2, 0.25].", "nullable": True},
+        "rent_factors": {"type": "array", "description": "Rent multipliers for the grid, default [0.9, 1.0, 1.1].", "nullable": True},
+        "assumptions": {
+            "type": "object",
+            "description": "Overrides for the base case: rate, down_payment, years, closing_costs, vacancy, management, maintenance, property_tax_rate, insurance_rate, rent_to_price.",
+            "nullable": True,
+        },
+        "include_schedule": {"type": "boolean", "description": "Add a yearly amortization schedule for the base case.", "nullable": True},
+    }
+    output_type = "string"
+
+    def forward(
+        self,
+        properties: List[dict],
+        rates: Optional[List[float]] = None,
+        down_payments: Optional[List[float]] = None,
+        rent_factors: Optional[List[float]] = None,
+        assumptions: Optional[dict] = None,
+        include_schedule: Optional[bool] = None,
+    ) -> str:
+        if isinstance(properties, dict):
+            properties = [properties]
+        try:
+            items = [_numbers(p) for p in properties if isinstance(p, dict)]
+        except ValueError as e:
+            return str(e)
+        items = [p for p in items if _price(p)]
+        if not items:
+            return "No properties with a price were given."
+        a = Assumptions.from_dict(assumptions)
+        rates = list(rates or (0.06, 0.07, 0.08))
+        down_payments = list(down_payments or (0.10, 0.20, 0.25))
+        rent_factors = list(rent_factors or (0.9, 1.0, 1.1))
+
+        price = np.array([_price(p) for p in items])
+
+        def column(key):
+            return [p.get(key) for p in items]
+
+        base = property_metrics(
+            price,
+            monthly_rent=column("monthly_rent"),
+            sqft=column("sqft"),
+            hoa_fee=column("hoa_fee"),
+            property_tax_rate=column("property_tax_rate"),
+            insurance_rate=column("insurance_rate"),
+            assumptions=a,
+        )
+        grid = scenario_grid(
+            price,
+            monthly_rent=column("monthly_rent"),
+            hoa_fee=column("hoa_fee"),
+            property_tax_rate=column("property_tax_rate"),
+            insurance_rate=column("insurance_rate"),
+            rates=rates,
+            down_payments=down_payments,
+            rent_factors=rent_factors,
+            assumptions=a,
+        )
+        schedule = None
+        if include_schedule:
+            schedule = yearly_schedule(amortization_schedule(price * (1 - a.down_payment), np.full(len(price), a.rate), a.years))
+
+        results = []
+        for i, item in enumerate(items):
+            result = {"property": item.get("property_id") or item.get("address") or i, "price": price[i]}
+            result.update({name: _round(base[name][i]) for name in BASE_METRICS})
+            result["rent_estimated"] = bool(base["rent_estimated"][i])
+            rows = []
+            for r, rate in enumerate(rates):
+                for d, down in enumerate(down_payments):
+                    for f, factor in enumerate(rent_factors):
+                        rows.append([rate, down, factor] + [_round(grid[name][i, r, d, f]) for name in GRID_METRICS])
+            result["scenarios"] = {"columns": ["rate", "down_payment", "rent_factor", *GRID_METRICS], "rows": rows}
+            if schedule is not None:
+                result["amortization_by_year"] = {
+                    "columns": ["year", "interest", "principal", "balance"],
+                    "rows": [
+                        [year + 1, round(schedule["interest"][i, year]), round(schedule["principal"][i, year]), round(schedule["balance"][i, year])]
+                        for year in range(schedule["balance"].shape[1])
+                    ],
+                }
+            results.append(result)
+        return json.dumps({"assumptions": asdict(a), "properties": results})
@@ -0,0 +1,85 @@
+import json
+from typing import Optional
+
+from smolagents import Tool
+
+from src.listings.store import PropertyStore, parse_date
+
+# Columns handed back to the agent; full records stay in the store
+RESULT_COLUMNS = [
+    "property_id", "url", "status", "price", "event_date", "property_type", "beds", "baths", "sqft",
+    "lot_sqft", "year_built", "address", "city", "postal_code", "hoa_fee", "distance_miles",
+]
+
+
+class PropertySearchTool(Tool):
+    name = "search_saved_properties"
+    description = (
+        "Searches listings already scraped from realtor.com (stored locally, no web access). "
+        "Filter by ZIP codes, city, distance from a point, property type, status, price band and date range. "
+        "Returns JSON: the number of matches and up to `limit` listings (cheapest first, or nearest first with `near`). "
+        "Use this before scraping again, e.g. to find comparable properties."
+    )
+    inputs = {
+        "zip_codes": {"type": "string", "description": "Comma-separated ZIP codes, e.g. '77077,77079'.", "nullable": True},
+        "city": {"type": "string", "description": "City name.", "nullable": True},
+        "near": {"type": "string", "description": "'lat,lon' to search around, e.g. '29.7445,-95.6021'.", "nullable": True},
+        "radius_miles": {"type": "number", "description": "Radius for `near` (default 1 mile).", "nullable": True},
+        "property_type": {"type": "string", "description": "e.g. 'single_family', 'condos', 'townhomes'.", "nullable": True},
+        "status": {"type": "string", "description": "'for_sale', 'sold', 'pending', ...", "nullable": True},
+        "min_price": {"type": "number", "description": "Lowest price (list price, or sale price if sold).", "nullable": True},
+        "max_price": {"type": "number", "description": "Highest price.", "nullable": True},
+        "date_from": {"type": "string", "description": "YYYY-MM-DD; sale date for sold listings, list date otherwise.", "nullable": True},
+        "date_to": {"type": "string", "description": "YYYY-MM-DD, inclusive.", "nullable": True},
+        "limit": {"type": "integer", "description": "Maximum listings to return (default 20).", "nullable": True},
+    }
+    output_type = "string"
+
+    def __init__(self, store: PropertyStore, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    def forward(
+        self,
+        zip_codes: Optional[str] = None,
+        city: Optional[str] = None,
+        near: Optional[str] = None,
+        radius_miles: Optional[float] = None,
+        property_type: Optional[str] = None,
+        status: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> str:
+        point = None
+        if near:
+            try:
+                lat, lon = (float(v) for v in near.split(","))
+            except ValueError:
+                return "Invalid `near`: expected 'lat,lon', e.g. '29.7445,-95.6021'."
+            point = (lat, lon)
+        for name, value in (("date_from", date_from), ("date_to", date_to)):
+            if value:
+                try:
+                    parse_date(value)
+                except ValueError as e:
+                    return f"Invalid `{name}`: {e}."
+        table = self.store.query(
+            postal_codes=[z.strip() for z in zip_codes.split(",") if z.strip()] if zip_codes else None,
+            city=city,
+            near=point,
+            radius_miles=radius_miles or 1.0,
+            property_type=property_type,
+            status=status,
+            min_price=min_price,
+            max_price=max_price,
+            date_from=date_from,
+            date_to=date_to,
+        )
+        if point is None and table.num_rows:
+            table = table.sort_by([("price", "ascending")])
+        rows = table.select([c for c in RESULT_COLUMNS if c in table.column_names]).slice(0, limit or 20).to_pylist()
+        listings = [{k: (v.isoformat() if hasattr(v, "isoformat") else v) for k, v in row.items() if v is not None} for row in rows]
+        return json.dumps({"matches": table.num_rows, "listings": listings})
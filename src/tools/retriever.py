@@ -1,33 +1,162 @@
+from typing import TYPE_CHECKING, Dict, List, Optional
+
 from smolagents import Tool
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
-from langchain_community.retrievers import BM25Retriever
+
+from src.retrieval.bm25 import BM25Index
+from src.retrieval.cache import QueryCache
+from src.retrieval.formatting import ResultFormatter
+from src.retrieval.fusion import reciprocal_rank_fusion
+from src.retrieval.partitions import Partitions
+from src.telemetry import metrics
+
+if TYPE_CHECKING:  # langchain and scikit-learn take ~2s to import; rag.py imports them when the index is built
+    from langchain.docstore.document import Document
+
+    from src.retrieval.lsa import LSAIndex
+
+
+SEARCH_SECONDS = metrics.histogram("retriever_search_seconds", "Ranking one batch of queries (cache included), by mode")
+CACHE_LOOKUPS = metrics.counter("retriever_cache_lookups_total", "Query cache lookups, by result")
+
 
 class RetrieverTool(Tool):
     name = "retriever"
-    description = "Retrieves and searches through real estate forms and documents to find relevant information."
+    description = "Retrieves and searches through real estate forms and documents to find relevant information, Go through the documents and find the most relevant information for the user's query. Provide the document header information and the document file name. Provide the page number of the document where the information is found. "
     inputs = {
         "query": {
             "type": "string",
-            "description": "The query to search for in the documents.",
-        }
+            "description": "The query to search for in the documents. Be specific about the form or information you need.",
+        },
+        "document_type": {
+            "type": "string",
+            "description": "Optional: restrict the search to a form id (e.g. '22A', '35E_') or family ('psa', '22x', '35x'). Comma-separate several.",
+            "nullable": True,
+        },
+    }
+    output_type = "string"
+
+    def __init__(
+        self,
+        docs: List["Document"],
+        term_frequencies: Optional[List[Dict[str, int]]] = None,
+        dense: Optional["LSAIndex"] = None,
+        k: int = 5,
+        fusion_depth: int = 50,
+        cache: Optional[QueryCache] = None,
+        index_version: Optional[str] = None,
+        token_budget: int = 1500,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.docs = docs  # Store original documents for metadata access
+        self.k = k  # Reduced number of results for clearer output
+        self.dense = dense  # Optional LSA vectors; when set, results are fused with BM25
+        self.fusion_depth = fusion_depth
+        self.cache = cache  # Shared across rebuilds; entries are dropped when index_version changes
+        self.index_version = index_version
+        self.partitions = Partitions(docs)
+        self.formatter = ResultFormatter(token_budget=token_budget)
+        self.last_stats = None  # FormatStats of the last call, incl. tokens saved
+        if term_frequencies is not None:
+            # Term statistics saved by the persistent index; no need to re-tokenize
+            self.engine = BM25Index(term_frequencies)
+        else:
+            self.engine = BM25Index.from_texts(doc.page_content for doc in docs)
+
+    def search(self, query: str, document_type: Optional[str] = None) -> List["Document"]:
+        return self.search_many([query], document_type)[0]
+
+    def search_many(self, queries: List[str], document_type: Optional[str] = None) -> List[List["Document"]]:
+        """Ranked chunks per query; cache misses are scored together in one batch."""
+        with metrics.span("retriever.search", SEARCH_SECONDS, mode="bm25" if self.dense is None else "hybrid"):
+            return self._search_many(queries, document_type)
+
+    def _search_many(self, queries: List[str], document_type: Optional[str] = None) -> List[List["Document"]]:
+        runs = self.partitions.resolve(document_type)
+        ranked: List[Optional[List[int]]] = [None] * len(queries)
+        keys = []
+        if self.cache is not None:
+            keys = [self.cache.key(q, k=self.k, hybrid=self.dense is not None, runs=runs) for q in queries]
+            ranked = [self.cache.get(key, self.index_version) for key in keys]
+        missing = [i for i, doc_ids in enumerate(ranked) if doc_ids is None]
+        if self.cache is not None:
+            CACHE_LOOKUPS.inc(len(queries) - len(missing), result="hit")
+            CACHE_LOOKUPS.inc(len(missing), result="miss")
+        if len(missing) == 1:
+            ranked[missing[0]] = self._rank(queries[missing[0]], runs)
+        elif missing:
+            for i, doc_ids in zip(missing, self._rank_many([queries[i] for i in missing], runs)):
+                ranked[i] = doc_ids
+        if self.cache is not None:
+            for i in missing:
+                self.cache.put(keys[i], ranked[i], self.index_version)
+        return [[self.docs[doc_id] for doc_id in doc_ids] for doc_ids in ranked]
+
+    def _rank(self, query: str, runs=None) -> List[int]:
+        if self.dense is None:
+            return [doc_id for doc_id, _ in self.engine.search(query, self.k, runs)]
+        lexical = self.engine.search(query, self.fusion_depth, runs)
+        semantic = self.dense.search(query, self.fusion_depth, runs)
+        return self._fuse(lexical, semantic)
+
+    def _rank_many(self, queries: List[str], runs=None) -> List[List[int]]:
+        if self.dense is None:
+            return [[doc_id for doc_id, _ in hits] for hits in self.engine.search_many(queries, self.k, runs)]
+        lexical = self.engine.search_many(queries, self.fusion_depth, runs)
+        semantic = self.dense.search_many(queries, self.fusion_depth, runs)
+        return [self._fuse(lex, sem) for lex, sem in zip(lexical, semantic)]
+
+    def _fuse(self, lexical, semantic) -> List[int]:
+        # Hybrid: reciprocal rank fusion of the BM25 and LSA candidate lists
+        fused = reciprocal_rank_fusion([
+            [doc_id for doc_id, score in lexical if score > 0],
+            [doc_id for doc_id, _ in semantic],
+        ])
+        return [doc_id for doc_id, _ in fused[: self.k]]
+
+    def forward(self, query: str, document_type: Optional[str] = None) -> str:
+        assert isinstance(query, str), "Your search query must be a string"
+
+        docs = self.search(query, document_type)
+
+        # Overlapping chunks are merged and the output is capped at the token budget
+        result = self.formatter.format([(None, docs)])
+        self.last_stats = result.stats
+        return result.text
+
+    def forward_many(self, queries: List[str], document_type: Optional[str] = None) -> str:
+        """
+        Answer several sub-questions in one call. Results are grouped by
+        query under one shared token budget; a passage that several queries
+        hit is printed once and referenced by the later queries.
+        """
+        assert isinstance(queries, list) and all(isinstance(q, str) for q in queries), "queries must be a list of strings"
+
+        groups = [(f"Query {i}: {q}", docs) for i, (q, docs) in enumerate(zip(queries, self.search_many(queries, document_type)), 1)]
+        result = self.formatter.format(groups, heading=f"Relevant Documents Found for {len(queries)} queries")
+        self.last_stats = result.stats
+        return result.text
+
+
+class BatchRetrieverTool(Tool):
+    name = "retriever_batch"
+    description = "Searches the real estate forms for several questions at once. Use it instead of calling `retriever` in a loop; results are grouped per question and chunks shared between questions are only shown once."
+    inputs = {
+        "queries": {
+            "type": "array",
+            "description": "List of search queries, one per sub-question.",
+        },
+        "document_type": {
+            "type": "string",
+            "description": "Optional: restrict the search to a form id (e.g. '22A', '35E_') or family ('psa', '22x', '35x'). Comma-separate several.",
+            "nullable": True,
+        },
     }
     output_type = "string"
 
-    def __init__(self, docs, **kwargs):
+    def __init__(self, retriever: RetrieverTool, **kwargs):
         super().__init__(**kwargs)
-        self.docs = docs
-        self.retriever = BM25Retriever.from_documents(docs, k=5)
-
-    def forward(self, query: str) -> str:
-        assert isinstance(query, str), "Query must be a string"
-        docs = self.retriever.invoke(query)
-        
-        output = "\nRelevant Documents Found:\n"
-        for i, doc in enumerate(docs, 1):
-            filename = doc.metadata.get('source', '').split('/')[-1]
-            output += f"\n=== Document {i}: {filename} ===\n"
-            output += f"Page {doc.metadata.get('page', 'N/A')}\n"
-            output += f"Content: {doc.page_content.strip()}\n"
-        
-        return output 
\ No newline at end of file
+        self.retriever = retriever
+
+    def forward(self, queries: list, document_type: Optional[str] = None) -> str:
+        return self.retriever.forward_many(queries, document_type)
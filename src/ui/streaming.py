@@ -0,0 +1,203 @@
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List
+
+from smolagents import GradioUI
+from smolagents.gradio_ui import stream_to_gradio
+
+from src import events
+from src.sessions import AgentPool, Session
+from src.tools.human_intervention import HumanChannel
+
+logger = logging.getLogger(__name__)
+
+# Token events are batched into one UI update at most this often
+REFRESH_SECONDS = 0.05
+OBSERVATION_CHARS = 1500
+
+
+def _step_markdown(step) -> str:
+    """A managed agent's step as one markdown block: what it wrote, then what came back."""
+    parts = []
+    if getattr(step, "model_output", None):
+        output = re.sub(r"\s*<end_code>\s*", "", step.model_output.strip())
+        parts.append(output)
+    observations = (getattr(step, "observations", None) or "").strip()
+    if observations:
+        observations = re.sub(r"^Execution logs:\s*", "", observations)
+        if len(observations) > OBSERVATION_CHARS:
+            observations = observations[:OBSERVATION_CHARS] + " ..."
+        parts.append(f"**Observations:**\n```\n{observations}\n```")
+    if getattr(step, "error", None) is not None:
+        parts.append(f"**Error:** {step.error}")
+    return "\n\n".join(parts) or "(no output)"
+
+
+class StreamingGradioUI(GradioUI):
+    """
+    GradioUI that shows a run as it happens instead of at step boundaries.
+
+    The agent runs on a worker thread inside its own EventSink context.
+    The chat shows model tokens as they stream (one live message per
+    agent), managed agents' steps and tool results as soon as each step
+    ends, and progress from long operations (index loading, scraping,
+    parallel branches). The manager's own steps and the final answer are
+    rendered the same way smolagents does. Every request's time to first
+    token is kept in `request_stats` (and logged at debug level).
+
+    Given an AgentPool instead of an agent, every browser session gets its
+    own agents. When an agent asks the user something (human_intervention),
+    the question is shown and the run stays parked on its worker thread;
+    the session's next message is taken as the answer and the same run
+    resumes.
+    """
+
+    def __init__(self, agent, file_upload_folder=None):
+        self.pool = agent if isinstance(agent, AgentPool) else None
+        super().__init__(None if self.pool else agent, file_upload_folder)
+        self._default = None if self.pool else Session("default", agent, HumanChannel())
+        self.request_stats: List[dict] = []
+
+    def session(self, session_id: str) -> Session:
+        return self.pool.get(session_id) if self.pool is not None else self._default
+
+    def run_with_events(self, session: Session, prompt: str, sink: events.EventSink):
+        """Run the session's agent with every event going to `sink`; closes it when the run ends."""
+        try:
+            for message in stream_to_gradio(session.agent, task=prompt, reset_agent_memory=False):
+                sink.emit("message", message=message)
+        except Exception as e:
+            sink.emit("error", text=f"{type(e).__name__}: {e}")
+        finally:
+            session.sink = None
+            session.run_lock.release()
+            sink.close()
+
+    def interact_with_agent(self, prompt, messages, session_id: str = "default"):
+        import gradio as gr
+
+        session = self.session(session_id)
+        messages.append(gr.ChatMessage(role="user", content=prompt))
+        yield messages
+
+        sink = session.sink
+        if sink is not None:
+            # A run of this session is in progress: either it asked the user something, or it is still busy
+            if not session.channel.answer(prompt):
+                messages.append(gr.ChatMessage(role="assistant", content="Still working on your previous request; please wait for it to finish."))
+                yield messages
+                return
+        else:
+            if not session.run_lock.acquire(blocking=False):
+                messages.append(gr.ChatMessage(role="assistant", content="Still working on your previous request; please wait for it to finish."))
+                yield messages
+                return
+            sink = session.sink = events.EventSink()
+            with events.subscribe(sink):
+                context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(self.run_with_events, session, prompt, sink), name="agent-run", daemon=True).start()
+        yield from self._render(sink, messages)
+
+    def _render(self, sink: events.EventSink, messages):
+        import gradio as gr
+
+        live: Dict[str, int] = {}  # agent -> index of its streaming message
+
+        def close_live(agent):
+            # The step's final rendering replaces what was streamed
+            index = live.pop(agent, None)
+            if index is not None:
+                messages.pop(index)
+                for other, i in live.items():
+                    if i > index:
+                        live[other] = i - 1
+
+        last_refresh = 0.0
+        pending = False  # tokens added since the last update
+        for event in sink.drain(REFRESH_SECONDS):
+            if event is None:
+                # Idle: show the tail of a burst that was held back by the throttle
+                if pending:
+                    pending = False
+                    last_refresh = time.perf_counter()
+                    yield messages
+                continue
+            if event.kind == "token":
+                if event.agent not in live:
+                    messages.append(gr.ChatMessage(role="assistant", content="", metadata={"title": f"✍️ {event.agent} is writing...", "status": "pending"}))
+                    live[event.agent] = len(messages) - 1
+                messages[live[event.agent]].content += event.data["text"]
+                if time.perf_counter() - last_refresh < REFRESH_SECONDS:
+                    pending = True
+                    continue
+            elif event.kind == "step":
+                close_live(event.agent)
+                step = event.data["step"]
+                messages.append(gr.ChatMessage(role="assistant", content=_step_markdown(step), metadata={"title": f"🤖 {event.agent} · step {step.step_number}", "status": "done"}))
+            elif event.kind == "message":
+                close_live(event.agent)
+                messages.append(event.data["message"])
+            elif event.kind == "progress":
+                messages.append(gr.ChatMessage(role="assistant", content=event.data["text"], metadata={"title": f"⏳ {event.agent}", "status": "done"}))
+            elif event.kind == "question":
+                # The run is parked until the user replies; end this UI update and leave the sink to the reply
+                for agent in list(live):
+                    close_live(agent)
+                messages.append(gr.ChatMessage(role="assistant", content=f"**{event.agent} asks:** {event.data['text']}"))
+                yield messages
+                return
+            elif event.kind == "error":
+                messages.append(gr.ChatMessage(role="assistant", content=f"**Error:** {event.data['text']}"))
+            pending = False
+            last_refresh = time.perf_counter()
+            yield messages
+
+        for agent in list(live):
+            close_live(agent)
+        stats = sink.summary()
+        self.request_stats.append(stats)
+        logger.debug("request done: time to first token %ss, first output %ss, total %ss", stats["ttft_s"], stats["first_event_s"], stats["total_s"])
+        yield messages
+
+    def launch(self, share: bool = False, **kwargs):
+        """
+        The smolagents chat layout, with each browser session routed to its
+        own agents and up to UI_CONCURRENCY (default 16) runs at a time.
+        """
+        import gradio as gr
+
+        def interact(prompt, messages, request: gr.Request):
+            yield from self.interact_with_agent(prompt, messages, request.session_hash or "default")
+
+        # Gradio only passes the request to parameters annotated with gr.Request
+        def close_session(request: gr.Request):
+            self.pool.close(request.session_hash or "default")
+
+        with gr.Blocks(fill_height=True) as demo:
+            stored_messages = gr.State([])
+            file_uploads_log = gr.State([])
+            chatbot = gr.Chatbot(
+                label="Agent",
+                type="messages",
+                avatar_images=(
+                    None,
+                    "https://huggingface.co/datasets/huggingface/documentation-images/resolve/main/smolagents/mascot_smol.png",
+                ),
+                resizeable=True,
+                scale=1,
+            )
+            text_input = gr.Textbox(lines=1, label="Chat Message")
+            text_input.submit(
+                self.log_user_message,
+                [text_input, file_uploads_log],
+                [stored_messages, text_input],
+            ).then(interact, [stored_messages, chatbot], [chatbot])
+            if self.pool is not None:
+                demo.unload(close_session)
+
+        demo.queue(default_concurrency_limit=int(os.environ.get("UI_CONCURRENCY", 16)))
+        demo.launch(debug=True, share=share, **kwargs)